@@ -0,0 +1,122 @@
+"""
+Measures how long it takes to import the modules of the repo.  Each import is timed in a fresh interpreter so that
+nothing is already cached in ``sys.modules``.  Also lists the heavy third-party packages (NumPy, matplotlib, networkx,
+etc) that each module pulls in.
+
+The parsing and container layers should only import the standard library; the plotting, sentiment, and wordcloud
+backends are imported on first use.  For comparison, the time to import the heavy packages themselves (i.e., what every
+run paid when they were imported at the top of ``plot_characters.py``) is also reported.
+
+Run from the root of the repo:
+
+.. code::
+
+    $ python -m benchmarks.bench_import
+    $ python -m benchmarks.bench_import --modules plot_characters --repeat 10
+
+Author: Jacob Seiler
+"""
+
+import argparse
+import importlib.util
+import json
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+MODULES = [
+    "containers.line",
+    "containers.character_utils",
+    "script_tools.parse_script",
+    "instrumentation",
+    "plot_characters",
+]
+
+HEAVY_PACKAGES = ["numpy", "scipy", "pandas", "matplotlib", "networkx", "wordcloud", "textblob"]
+
+# Run in a fresh interpreter. Prints the time taken to import the module and the heavy packages it imported.
+_TIMING_SCRIPT = """
+import json, sys, time
+start_time = time.perf_counter()
+for module in {modules!r}:
+    __import__(module)
+elapsed = time.perf_counter() - start_time
+print(json.dumps([elapsed, [package for package in {heavy!r} if package in sys.modules]]))
+"""
+
+
+def time_import(modules: List[str], repeat: int = 5) -> Dict[str, object]:
+    """
+    Imports ``modules`` in ``repeat`` fresh interpreters.
+
+    Returns
+    -------
+    result : dict
+        ``"time_s"`` is the best time taken to import the modules and ``"heavy"`` lists the heavy packages that were
+        imported along the way.
+    """
+
+    script = _TIMING_SCRIPT.format(modules=modules, heavy=HEAVY_PACKAGES)
+
+    best_time = float("inf")
+    heavy: List[str] = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", script], check=True, stdout=subprocess.PIPE, universal_newlines=True
+        ).stdout
+        elapsed, heavy = json.loads(output.strip().splitlines()[-1])
+        best_time = min(best_time, elapsed)
+
+    return {"time_s": best_time, "heavy": heavy}
+
+
+def run_benchmark(modules: Optional[List[str]] = None, repeat: int = 5) -> Dict[str, Dict[str, object]]:
+    """
+    Times the import of each module in ``modules`` (default :py:data:`~MODULES`) and of the heavy packages.
+    """
+
+    if modules is None:
+        modules = MODULES
+
+    results = {}
+    for module in modules:
+        print(f"Importing {module}...", file=sys.stderr)
+        results[module] = time_import([module], repeat=repeat)
+
+    # The packages that are no longer imported up front. Only the ones that are installed.
+    eager = [package for package in HEAVY_PACKAGES if importlib.util.find_spec(package) is not None]
+    if "matplotlib" in eager:
+        eager.append("matplotlib.pyplot")
+
+    print("Importing the heavy packages...", file=sys.stderr)
+    results["(heavy packages)"] = time_import(eager, repeat=repeat)
+
+    return results
+
+
+def print_report(results: Dict[str, Dict[str, object]]) -> None:
+    """
+    Prints the import time of each module and the heavy packages it imported.
+    """
+
+    print(f"{'Module':<32}{'Import (ms)':>12}  Heavy packages imported")
+    for module, result in results.items():
+        heavy = ", ".join(result["heavy"]) if len(result["heavy"]) > 0 else "-"
+        print(f"{module:<32}{result['time_s'] * 1e3:>12.1f}  {heavy}")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Measures how long it takes to import the modules of the repo.")
+    parser.add_argument("--modules", nargs="+", default=MODULES, help="Modules to import.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of times each import is timed. Reports the best.")
+    parser.add_argument("--json", metavar="PATH", help="Also save the results as JSON.")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.modules, repeat=args.repeat)
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.json}")
@@ -0,0 +1,130 @@
+"""
+Measures the memory used by the containers (:py:class:`~containers.line.Line`, :py:class:`~containers.scene.Scene`,
+:py:class:`~containers.episode.Episode`, and :py:class:`~containers.character.Character`) for the full Game of Thrones
+corpus.  The slotted containers are compared against equivalent objects that store their attributes in a per-instance
+``__dict__`` (i.e., how the containers used to be defined).
+
+Run from the root of the repo:
+
+.. code::
+
+    $ python -m benchmarks.bench_memory
+
+Author: Jacob Seiler
+"""
+
+import argparse
+import gc
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+import containers.character_utils as c_utils
+from containers.character import Character
+from containers.episode import Episode
+from containers.line import Line
+from containers.scene import Scene
+from script_tools.parse_script import parse_all_eps
+
+
+class _DictObject(object):
+    """
+    Stores every attribute in a ``__dict__``.  Used as the baseline to compare the slotted containers against.
+    """
+
+    def __init__(self, attributes: Dict[str, object]) -> None:
+        for name, value in attributes.items():
+            setattr(self, name, value)
+
+
+def _slot_values(instance: object) -> Dict[str, object]:
+
+    attributes = {}
+    for name in type(instance).__slots__:
+        try:
+            attributes[name] = getattr(instance, name)
+        except AttributeError:
+            pass
+
+    return attributes
+
+
+def _measure(build: Callable[[], List[object]]) -> Tuple[int, List[object]]:
+    """
+    Returns the number of bytes allocated by ``build`` that are still alive afterwards, alongside the built objects.
+    """
+
+    gc.collect()
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+
+    objects = build()
+
+    gc.collect()
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return end - start, objects
+
+
+def _count_objects(episodes: List[Episode], characters: Dict[str, Character]) -> Dict[str, List[object]]:
+
+    objects: Dict[str, List[object]] = {"Line": [], "Scene": [], "Episode": list(episodes),
+                                        "Character": list(characters.values())}
+    for episode in episodes:
+        objects["Scene"].extend(episode.scenes)
+        for scene in episode.scenes:
+            objects["Line"].extend(scene.lines)
+
+    return objects
+
+
+def run_benchmark(season_nums: List[int], episode_nums: List[int]) -> None:
+    """
+    Parses the episodes and prints the memory used by each type of container.
+    """
+
+    corpus_bytes, episodes = _measure(lambda: parse_all_eps(season_nums, episode_nums))
+
+    characters = c_utils.init_characters_in_episodes(episodes)
+    c_utils.determine_lines_per_episode(episodes, characters)
+    c_utils.determine_scene_interaction(episodes, characters)
+
+    objects = _count_objects(episodes, characters)
+
+    print(f"Parsed {len(episodes)} episodes. Live memory of parsed episodes: {corpus_bytes / 1e6:.2f} MB")
+    print("")
+    print(f"{'Container':<12}{'Count':>10}{'Slotted B/obj':>16}{'__dict__ B/obj':>16}{'Saved MB':>12}")
+
+    for container_name, container_objects in objects.items():
+
+        # Only the cost of the objects themselves is compared; the attribute values are shared by both.
+        values = [_slot_values(instance) for instance in container_objects]
+
+        cls = {"Line": Line, "Scene": Scene, "Episode": Episode, "Character": Character}[container_name]
+        slotted_bytes, _ = _measure(lambda: [_new_slotted(cls, attributes) for attributes in values])
+        dict_bytes, _ = _measure(lambda: [_DictObject(attributes) for attributes in values])
+
+        num_objects = max(len(container_objects), 1)
+        print(
+            f"{container_name:<12}{len(container_objects):>10}{slotted_bytes / num_objects:>16.1f}"
+            f"{dict_bytes / num_objects:>16.1f}{(dict_bytes - slotted_bytes) / 1e6:>12.2f}"
+        )
+
+
+def _new_slotted(cls: type, attributes: Dict[str, object]) -> object:
+
+    instance = cls.__new__(cls)
+    for name, value in attributes.items():
+        object.__setattr__(instance, name, value)
+
+    return instance
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seasons", type=int, nargs="+", default=list(range(1, 9)))
+    parser.add_argument("--episodes", type=int, nargs="+", default=list(range(1, 11)))
+    args = parser.parse_args()
+
+    run_benchmark(args.seasons, args.episodes)
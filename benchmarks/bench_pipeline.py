@@ -0,0 +1,339 @@
+"""
+Measures the time and peak memory of each stage of the parse -> aggregate -> plot pipeline:
+
+- ``parse``: :py:func:`~script_tools.parse_script.parse_all_eps` (or
+  :py:func:`~script_tools.parse_script.parse_episode` for the scaled corpora).
+- ``lines_per_episode``: :py:func:`~containers.character_utils.init_characters_in_episodes` and
+  :py:func:`~containers.character_utils.determine_lines_per_episode`.
+- ``scene_interaction``: :py:func:`~containers.character_utils.determine_scene_interaction`.
+- ``interactions_for_graph``: :py:func:`~plot_characters.generate_scene_interactions_for_graph`.
+- ``plot_line_count_hist`` and ``plot_scene_network_graph``: the plots in ``plot_characters.py``.
+
+Each stage is run on the bundled scripts and on corpora scaled up by replicating every bundled episode (e.g., a scale
+of 10 parses every script 10 times as 10 different episodes).  Alternatively, ``--synthetic`` runs each stage on
+synthetic corpora of the same sizes written by :py:mod:`~script_tools.generate_synthetic`.  Results can be saved as a
+baseline and later runs compared against it.
+
+Run from the root of the repo:
+
+.. code::
+
+    $ python -m benchmarks.bench_pipeline --scales 1 10 --save-baseline baseline.json
+    $ python -m benchmarks.bench_pipeline --scales 1 10 --compare baseline.json
+    $ python -m benchmarks.bench_pipeline --scales 1 10 100 --synthetic
+
+Author: Jacob Seiler
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+import containers.character_utils as c_utils
+from containers.episode import Episode
+from script_tools.generate_synthetic import generate_corpus
+from script_tools.parse_script import init_episodes, parse_all_eps, parse_episode
+
+STAGES = [
+    "parse",
+    "lines_per_episode",
+    "scene_interaction",
+    "interactions_for_graph",
+    "plot_line_count_hist",
+    "plot_scene_network_graph",
+]
+
+
+def _time_and_peak(
+    stage: Callable[[], object],
+    repeat: int,
+    trace_memory: bool,
+    setup: Optional[Callable[[], None]] = None,
+) -> Tuple[float, Optional[float], object]:
+    """
+    Runs ``stage`` ``repeat`` times and returns the best time (in seconds), the peak memory allocated while it ran (in
+    MB), and its result.  Tracing memory slows Python down considerably so the peak memory is measured in a separate
+    run.
+
+    ``stage`` is first run once without being timed so that one-off costs (e.g., lazily importing SciPy) aren't counted.
+    If specified, ``setup`` is called (untimed) before every run, e.g., to clear caches that would otherwise be hit.
+    """
+
+    if setup is not None:
+        setup()
+    result = stage()
+
+    best_time = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        del result
+        gc.collect()
+        start_time = time.perf_counter()
+        result = stage()
+        best_time = min(best_time, time.perf_counter() - start_time)
+
+    peak_mb = None
+    if trace_memory:
+        if setup is not None:
+            setup()
+        del result
+        gc.collect()
+        tracemalloc.start()
+        result = stage()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_mb = peak / 1e6
+
+    return best_time, peak_mb, result
+
+
+def scaled_episodes(episodes: List[Episode], scale: int) -> List[Episode]:
+    """
+    Unparsed copies of ``episodes`` repeated ``scale`` times.  Each copy is given a unique season number (and hence
+    key) so that it is treated as a different episode.
+    """
+
+    num_seasons = max(episode.season_num for episode in episodes)
+
+    copies = []
+    for copy_idx in range(scale):
+        for episode in episodes:
+            season_num = episode.season_num + copy_idx * num_seasons
+            key = f"s{season_num:02}e{episode.episode_num:02}"
+
+            copy = Episode(season_num, episode.episode_num, key, episode.script_path)
+            copy.character_format = episode.character_format
+            copy.scene_format = episode.scene_format
+            copies.append(copy)
+
+    return copies
+
+
+def run_stages(
+    season_nums: List[int],
+    episode_nums: List[int],
+    scale: int,
+    plot_output_dir: str,
+    repeat: int = 1,
+    trace_memory: bool = True,
+    plots: bool = True,
+    script_dir: str = "./script_tools/scripts",
+    formats_path: str = "./formats.txt",
+) -> Dict[str, Dict[str, Optional[float]]]:
+    """
+    Runs every stage of the pipeline on a corpus ``scale`` times the size of the scripts in ``script_dir``.
+
+    Returns
+    -------
+    results : dict["stage", dict["time_s" or "peak_mb", float]]
+        Best time and peak memory of each stage.
+    """
+
+    # Only import the plotting stack if we're going to use it.
+    import network_layout
+    import plot_characters
+
+    if scale == 1:
+        def parse():
+            return parse_all_eps(season_nums, episode_nums, script_dir=script_dir, formats_path=formats_path)
+    else:
+        shells = init_episodes(season_nums, episode_nums, script_dir, formats_path)
+
+        def parse():
+            episodes = scaled_episodes(shells, scale)
+            for episode in episodes:
+                parse_episode(episode.script_path, episode)
+            return episodes
+
+    def lines_per_episode():
+        characters = c_utils.init_characters_in_episodes(episodes)
+        c_utils.determine_lines_per_episode(episodes, characters)
+        return characters
+
+    def scene_interaction():
+        characters = c_utils.init_characters_in_episodes(episodes)
+        c_utils.determine_scene_interaction(episodes, characters)
+        return characters
+
+    def interactions_for_graph():
+        return plot_characters.generate_scene_interactions_for_graph(episodes, True, True)
+
+    def plot_line_count_hist():
+        plot_characters.plot_line_count_hist(
+            characters, episodes, characters_to_plot=list(characters_to_plot)[:3], plot_output_path=plot_output_dir
+        )
+
+    def plot_scene_network_graph():
+        plot_characters.plot_scene_network_graph(
+            graph_characters, episodes, f"{plot_output_dir}/scene_graph.png", plot_method="networkx"
+        )
+
+    # Every run of the graph stage should compute the layout rather than fetch it from the cache.
+    def clear_layout_cache():
+        network_layout._default_cache.clear()
+
+    results = {}
+
+    def run(stage_name, stage, setup=None):
+        print(f"Running {stage_name} at scale {scale}...", file=sys.stderr)
+        stage_time, peak_mb, result = _time_and_peak(stage, repeat, trace_memory, setup=setup)
+        results[stage_name] = {"time_s": stage_time, "peak_mb": peak_mb}
+        return result
+
+    episodes = run("parse", parse)
+    characters = run("lines_per_episode", lines_per_episode)
+    run("scene_interaction", scene_interaction)
+    graph_characters = run("interactions_for_graph", interactions_for_graph)
+
+    if plots:
+        characters_to_plot = graph_characters.keys() if len(graph_characters) > 0 else characters.keys()
+        run("plot_line_count_hist", plot_line_count_hist)
+        run("plot_scene_network_graph", plot_scene_network_graph, setup=clear_layout_cache)
+
+    return results
+
+
+def run_benchmark(
+    season_nums: List[int],
+    episode_nums: List[int],
+    scales: List[int],
+    repeat: int = 1,
+    trace_memory: bool = True,
+    max_plot_scale: int = 10,
+    synthetic: bool = False,
+) -> Dict[str, object]:
+    """
+    Runs every stage at every scale.  If ``synthetic`` is specified, a synthetic corpus with ``scale`` times as many
+    seasons is written for each scale rather than replicating the bundled scripts.
+
+    Returns
+    -------
+    report : dict
+        ``report["results"][str(scale)][stage]`` holds the time and peak memory of each stage.  Also records the
+        Python version and platform the benchmark was run on.
+    """
+
+    report: Dict[str, object] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "synthetic": synthetic,
+        "results": {},
+    }
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        for scale in scales:
+
+            if not synthetic:
+                report["results"][str(scale)] = run_stages(
+                    season_nums, episode_nums, scale, output_dir, repeat=repeat, trace_memory=trace_memory,
+                    plots=scale <= max_plot_scale,
+                )
+                continue
+
+            script_dir = f"{output_dir}/synthetic_{scale}"
+            num_seasons = len(season_nums) * scale
+            print(f"Writing synthetic corpus with {num_seasons * len(episode_nums)} episodes...", file=sys.stderr)
+            generate_corpus(script_dir, num_seasons, len(episode_nums))
+
+            report["results"][str(scale)] = run_stages(
+                list(range(1, num_seasons + 1)), list(range(1, len(episode_nums) + 1)), 1, output_dir,
+                repeat=repeat, trace_memory=trace_memory, plots=scale <= max_plot_scale, script_dir=script_dir,
+                formats_path=f"{script_dir}/formats.txt",
+            )
+
+    return report
+
+
+def print_report(
+    report: Dict[str, object], baseline: Optional[Dict[str, object]] = None, tolerance: float = 0.1
+) -> bool:
+    """
+    Prints the time and peak memory of each stage.  If ``baseline`` is specified, also prints the ratio to the
+    baseline time and flags stages that are more than ``tolerance`` slower.
+
+    Returns
+    -------
+    regressed
+        Whether any stage regressed compared to ``baseline``.
+    """
+
+    regressed = False
+
+    header = f"{'Scale':>6}  {'Stage':<26}{'Time (s)':>10}{'Peak (MB)':>11}"
+    if baseline is not None:
+        header += f"{'Base (s)':>10}{'Ratio':>8}"
+    print(header)
+
+    for scale, stages in report["results"].items():
+        for stage_name in STAGES:
+            if stage_name not in stages:
+                continue
+
+            stage = stages[stage_name]
+            peak = f"{stage['peak_mb']:.1f}" if stage["peak_mb"] is not None else "-"
+            row = f"{scale:>6}  {stage_name:<26}{stage['time_s']:>10.3f}{peak:>11}"
+
+            try:
+                base_time = baseline["results"][scale][stage_name]["time_s"]
+            except (KeyError, TypeError):
+                base_time = None
+
+            if base_time is not None:
+                ratio = stage["time_s"] / base_time if base_time > 0 else float("inf")
+                row += f"{base_time:>10.3f}{ratio:>8.2f}"
+                if ratio > 1.0 + tolerance:
+                    row += "  REGRESSION"
+                    regressed = True
+
+            print(row)
+
+    return regressed
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seasons", type=int, nargs="+", default=list(range(1, 9)))
+    parser.add_argument("--episodes", type=int, nargs="+", default=list(range(1, 11)))
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10],
+                        help="Size of each corpus relative to the bundled scripts, e.g., 1 10 100 1000.")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="Use synthetic corpora rather than replicating the bundled scripts.")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of times each stage is timed. Reports the best.")
+    parser.add_argument("--no-memory", action="store_true", help="Don't measure the peak memory of each stage.")
+    parser.add_argument("--max-plot-scale", type=int, default=10,
+                        help="The plotting stages are skipped for corpora larger than this.")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Save the results as JSON to compare against later.")
+    parser.add_argument("--compare", metavar="PATH", help="Compare the results against a saved baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Fractional slow down compared to the baseline that is flagged as a regression.")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        args.seasons, args.episodes, args.scales, repeat=args.repeat, trace_memory=not args.no_memory,
+        max_plot_scale=args.max_plot_scale, synthetic=args.synthetic,
+    )
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+
+    regressed = print_report(report, baseline, tolerance=args.tolerance)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if regressed:
+        sys.exit(1)
@@ -0,0 +1,315 @@
+"""
+Checks :py:mod:`~script_tools.async_scraper` against a local stand-in for the script website rather than the real one.
+The stand-in server serves a page listing the episodes of each season and a (tiny) script for each episode, with:
+
+- A fixed latency for every request, so the scraper is only fast if the requests actually overlap.
+- ``503`` responses (with ``Retry-After``) injected for some pages, which the scraper must retry.
+- ``ETag`` and ``Last-Modified`` headers, answering ``304`` to conditional requests for pages that haven't changed.
+
+The scraper is run three times against the same output directory:
+
+1. From scratch. Every script must be written, with brackets removed, after retrying the failed pages.
+2. Again. Every episode page must be answered with ``304`` and none of the scripts rewritten.
+3. After changing one script on the server. Only that script must be rewritten.
+
+Finally, a page that always fails must raise ``RuntimeError`` after the configured number of retries.  Exits with a
+non-zero status if any check fails.
+
+Run from the root of the repo:
+
+.. code::
+
+    $ python -m benchmarks.check_scraper
+
+Author: Jacob Seiler
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+
+from script_tools.async_scraper import VALIDATORS_FNAME, AsyncScraper, scrape_seasons
+from script_tools.generate_script import episode_url, season_url
+
+# The scripts are tiny. Only the latency of each request matters.
+SCRIPT_TEMPLATE = "<p>JON: (to Sam) Season {season_num}, episode {episode_num}, version {version}.</p><p>CUT TO:</p>"
+
+# Time (since the epoch) the first version of every page was last modified.
+LAST_MODIFIED = 1_500_000_000
+
+
+class StandInServer(object):
+    """
+    Handles a local HTTP server standing in for the script website.
+    """
+
+    def __init__(self, num_seasons: int, num_episodes: int, latency: float = 0.1) -> None:
+        """
+        Parameters
+        ----------
+
+        num_seasons, num_episodes : int
+            Number of seasons served and number of episodes in each season.
+
+        latency : float, optional
+            Seconds the server waits before answering each request.
+        """
+
+        self._num_seasons = num_seasons
+        self._num_episodes = num_episodes
+        self._latency = latency
+
+        # Number of ``503`` responses still to be sent for each path.
+        self._failures: Dict[str, int] = {}
+
+        # The version of each script. Changing the version changes the page (and its ``ETag``).
+        self._versions: Dict[Tuple[int, int], int] = {}
+
+        # ``(path, status_code)`` of every response sent.
+        self._responses: List[Tuple[str, int]] = []
+        self._lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        """
+        string : The URL of the server.  Pass this as the ``base_url`` of the scraper.
+        """
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    @property
+    def responses(self):
+        """
+        list of ``(path, status_code)`` tuples : Every response sent so far, in order.
+        """
+        with self._lock:
+            return list(self._responses)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def episode_path(self, season_num: int, episode_num: int) -> str:
+        """
+        The path of the script of an episode, as requested by the scraper.
+        """
+        return episode_url(_episode_name(season_num, episode_num), "")
+
+    def fail(self, path: str, num_failures: int) -> None:
+        """
+        Answers the next ``num_failures`` requests for ``path`` with ``503``.
+        """
+        with self._lock:
+            self._failures[path] = num_failures
+
+    def change_script(self, season_num: int, episode_num: int) -> None:
+        """
+        Changes the script of an episode so that conditional requests for it are answered in full.
+        """
+        with self._lock:
+            self._versions[(season_num, episode_num)] = self._versions.get((season_num, episode_num), 1) + 1
+
+    def _page(self, path: str) -> Tuple[str, str, int]:
+        """
+        The body, ``ETag``, and version of the page at ``path``.  Raises ``KeyError`` if there is no such page.
+        """
+
+        for season_num in range(1, self._num_seasons + 1):
+
+            if path == season_url(season_num, ""):
+                # Like the real website, each episode name is preceded by a non-breaking space.
+                body = "".join(
+                    f"<h3>\xa0{_episode_name(season_num, episode_num)} Lyrics</h3>"
+                    for episode_num in range(1, self._num_episodes + 1)
+                )
+                return f"<html><body>{body}</body></html>", f'"season-{season_num}"', 1
+
+            for episode_num in range(1, self._num_episodes + 1):
+                if path == self.episode_path(season_num, episode_num):
+                    version = self._versions.get((season_num, episode_num), 1)
+                    body = SCRIPT_TEMPLATE.format(season_num=season_num, episode_num=episode_num, version=version)
+                    return f"<html><body>{body}</body></html>", f'"s{season_num}e{episode_num}v{version}"', version
+
+        raise KeyError(path)
+
+    def _respond(self, path: str, if_none_match: str) -> Tuple[int, Dict[str, str], bytes]:
+
+        time.sleep(self._latency)
+
+        with self._lock:
+
+            if self._failures.get(path, 0) > 0:
+                self._failures[path] -= 1
+                status = (503, {"Retry-After": "0"}, b"")
+
+            else:
+                try:
+                    body, etag, version = self._page(path)
+                except KeyError:
+                    status = (404, {}, b"")
+                else:
+                    # Every version of a page was modified a day after the previous one.  As the scraper sends both
+                    # validators, the ``ETag`` takes precedence (as it does for real servers).
+                    headers = {"ETag": etag, "Last-Modified": formatdate(LAST_MODIFIED + version * 86400, usegmt=True)}
+                    if if_none_match == etag:
+                        status = (304, headers, b"")
+                    else:
+                        status = (200, headers, body.encode("utf-8"))
+
+            self._responses.append((path, status[0]))
+
+        return status
+
+    def _handler_class(self) -> type:
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                status_code, headers, data = server._respond(self.path, self.headers.get("If-None-Match"))
+                self.send_response(status_code)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def _episode_name(season_num: int, episode_num: int) -> str:
+    return f"Season {season_num} Episode {episode_num}"
+
+
+def _script_mtimes(fnames: Dict[int, List[str]]) -> Dict[str, int]:
+    return {fname: os.stat(fname).st_mtime_ns for season in fnames.values() for fname in season}
+
+
+def run_check(num_seasons: int = 2, num_episodes: int = 5, latency: float = 0.1, concurrency: int = 8) -> bool:
+    """
+    Runs the scraper against the stand-in server and prints the result of each check.
+
+    Returns
+    -------
+    passed
+        Whether every check passed.
+    """
+
+    failures = []
+
+    def check(passed: bool, description: str) -> None:
+        print(f"{'PASS' if passed else 'FAIL'}: {description}")
+        if not passed:
+            failures.append(description)
+
+    server = StandInServer(num_seasons, num_episodes, latency=latency)
+    server.start()
+
+    season_nums = list(range(1, num_seasons + 1))
+    num_scripts = num_seasons * num_episodes
+    scraper_kwargs = {"base_url": server.base_url, "concurrency": concurrency, "backoff": 0.05}
+
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+
+            # 1. From scratch, with the first episode failing twice before it succeeds.
+            failing_path = server.episode_path(1, 1)
+            server.fail(failing_path, 2)
+
+            start_time = time.perf_counter()
+            fnames = scrape_seasons(season_nums, output_dir, **scraper_kwargs)
+            elapsed = time.perf_counter() - start_time
+
+            check(sum(len(season) for season in fnames.values()) == num_scripts, f"All {num_scripts} scripts written")
+            with open(fnames[1][0], "r") as f:
+                script = f.read()
+            check("JON:" in script and "(to Sam)" not in script, "Brackets removed from the scripts")
+            check(
+                [status for path, status in server.responses if path == failing_path] == [503, 503, 200],
+                "Failed page retried until it succeeded",
+            )
+            check(os.path.exists(f"{output_dir}/{VALIDATORS_FNAME}"), "Validators saved")
+
+            # Every request waits ``latency`` seconds, so fetching one page at a time takes at least this long.
+            sequential_time = (num_seasons + num_scripts + 2) * latency
+            check(
+                elapsed < sequential_time,
+                f"Requests overlap ({elapsed:.2f} s versus at least {sequential_time:.2f} s one at a time)",
+            )
+
+            # 2. Nothing has changed, so every script should be answered with ``304`` and left untouched.
+            mtimes = _script_mtimes(fnames)
+            num_responses = len(server.responses)
+            scrape_seasons(season_nums, output_dir, **scraper_kwargs)
+
+            episode_statuses = [
+                status for path, status in server.responses[num_responses:] if "albums" not in path
+            ]
+            check(episode_statuses == [304] * num_scripts, "Unchanged scripts answered with 304")
+            check(_script_mtimes(fnames) == mtimes, "Unchanged scripts not rewritten")
+
+            # 3. Only the changed script should be downloaded and rewritten.
+            server.change_script(num_seasons, num_episodes)
+            scrape_seasons(season_nums, output_dir, **scraper_kwargs)
+
+            new_mtimes = _script_mtimes(fnames)
+            rewritten = [fname for fname in mtimes if new_mtimes[fname] != mtimes[fname]]
+            check(rewritten == [fnames[num_seasons][-1]], "Only the changed script rewritten")
+            with open(fnames[num_seasons][-1], "r") as f:
+                check("version 2" in f.read(), "Changed script has the new contents")
+
+        # 4. A page that never succeeds gives up after the retries.
+        failing_path = server.episode_path(1, 2)
+        server.fail(failing_path, 100)
+        num_responses = len(server.responses)
+
+        scraper = AsyncScraper(max_retries=2, **scraper_kwargs)
+        try:
+            asyncio.run(scraper.fetch(f"{server.base_url}{failing_path}"))
+        except RuntimeError:
+            gave_up = True
+        else:
+            gave_up = False
+        finally:
+            scraper.close()
+
+        num_attempts = sum(1 for path, _ in server.responses[num_responses:] if path == failing_path)
+        check(gave_up and num_attempts == 3, f"Gave up after 3 attempts ({num_attempts} made)")
+
+    finally:
+        server.stop()
+
+    print("")
+    print(f"{len(failures)} checks failed." if failures else "All checks passed.")
+
+    return len(failures) == 0
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seasons", type=int, default=2, help="Number of seasons served.")
+    parser.add_argument("--episodes", type=int, default=5, help="Number of episodes in each season.")
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds the server waits before each response.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum number of requests in flight at once.")
+    args = parser.parse_args()
+
+    if not run_check(args.seasons, args.episodes, latency=args.latency, concurrency=args.concurrency):
+        sys.exit(1)
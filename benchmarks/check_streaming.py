@@ -0,0 +1,98 @@
+"""
+Checks that streaming the scripts gives the same scene interactions as parsing them into memory.  The interactions are
+accumulated twice:
+
+- In memory: every episode is parsed with :py:func:`~script_tools.parse_script.parse_all_eps` and added with
+  :py:meth:`~containers.scene_matrix.InteractionAccumulator.add_episode`.
+- Streamed: the scenes are streamed with :py:func:`~script_tools.parse_script.iter_scenes` and added with
+  :py:meth:`~containers.scene_matrix.InteractionAccumulator.add_scenes`.
+
+The total number of scenes and the number of scenes (and shared scenes) of every character must agree.  Exits with a
+non-zero status if they don't.
+
+Run from the root of the repo:
+
+.. code::
+
+    $ python -m benchmarks.check_streaming
+
+Author: Jacob Seiler
+"""
+
+import argparse
+import sys
+from typing import List
+
+from containers.scene_matrix import InteractionAccumulator
+from script_tools.parse_script import init_episodes, iter_scenes, parse_all_eps
+
+
+def compare_accumulators(in_memory: InteractionAccumulator, streamed: InteractionAccumulator) -> List[str]:
+    """
+    Every difference between the totals of two accumulators.
+
+    Returns
+    -------
+    differences
+        A message describing each difference.  Empty if the accumulators agree.
+    """
+
+    differences = []
+
+    if in_memory.tot_num_scenes != streamed.tot_num_scenes:
+        differences.append(
+            f"Total number of scenes differs: {in_memory.tot_num_scenes} in memory, {streamed.tot_num_scenes} streamed."
+        )
+
+    if in_memory.num_scenes != streamed.num_scenes:
+        differences.append("Number of scenes of each character differs.")
+
+    in_memory_characters = in_memory.characters()
+    streamed_characters = streamed.characters()
+    for character_name, character in in_memory_characters.items():
+        if character_name not in streamed_characters:
+            continue
+        if character.scene_appearance_dict != streamed_characters[character_name].scene_appearance_dict:
+            differences.append(f"Shared scenes of {character_name} differ.")
+
+    return differences
+
+
+def run_check(season_nums: List[int], episode_nums: List[int], batch_size: int = 1000) -> bool:
+    """
+    Accumulates the interactions in memory and streamed, and prints any differences.
+
+    Returns
+    -------
+    agree
+        Whether the two accumulators agree.
+    """
+
+    in_memory = InteractionAccumulator()
+    for episode in parse_all_eps(season_nums, episode_nums):
+        in_memory.add_episode(episode)
+
+    streamed = InteractionAccumulator()
+    streamed.add_scenes(iter_scenes(init_episodes(season_nums, episode_nums)), batch_size=batch_size)
+
+    differences = compare_accumulators(in_memory, streamed)
+    for difference in differences:
+        print(difference)
+
+    if len(differences) == 0:
+        print(f"In memory and streamed interactions agree ({in_memory.tot_num_scenes} scenes, "
+              f"{len(in_memory.num_scenes)} characters).")
+
+    return len(differences) == 0
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--seasons", type=int, nargs="+", default=list(range(1, 9)))
+    parser.add_argument("--episodes", type=int, nargs="+", default=list(range(1, 11)))
+    parser.add_argument("--batch-size", type=int, default=1000, help="Number of scenes streamed in each batch.")
+    args = parser.parse_args()
+
+    if not run_check(args.seasons, args.episodes, batch_size=args.batch_size):
+        sys.exit(1)
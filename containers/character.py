@@ -8,7 +8,7 @@ found in ``character_utils.py``.
 Author: Jacob Seiler.
 """
 
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional
 
 
 class Character(object):
@@ -16,6 +16,10 @@ class Character(object):
     Handles all of the data associated with an individual character.
     """
 
+    __slots__ = (
+        "_name", "_episode_lines", "_unique_words", "_scene_appearance_dict", "_num_scenes", "_episode_death"
+    )
+
     def __init__(self, name: str) -> None:
         """
         Initialize empty lists and dictionaries.
@@ -63,7 +67,8 @@ class Character(object):
     @property
     def unique_words(self):
         """
-        TODO: Update this when I actually use it...
+        list of strings : Every word spoken by the character, sorted alphabetically.  Set by
+        :py:meth:`~calc_unique_words` or :py:meth:`~containers.word_matrix.WordCountMatrix.apply_to_characters`.
         """
         return self._unique_words
 
@@ -106,15 +111,29 @@ class Character(object):
     def episode_death(self, episode_death: str):
         self._episode_death = episode_death
 
-    def calc_unique_words(self):
+    def calc_unique_words(self, stopwords: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Counts the words spoken by the character across all episodes and sets :py:attr:`~unique_words`.  To count the
+        words of many characters, build a single :py:class:`~containers.word_matrix.WordCountMatrix` instead.
+
+        Parameters
+        ----------
+        stopwords : optional
+            Words that are not counted.
+
+        Returns
+        -------
+        word_frequencies
+            Number of times the character says each word.  Key is the word.
+        """
+
+        # Imported here as the word matrix module needs this one.
+        from containers.word_matrix import WordCountMatrix
 
-        from collections import Counter
+        lines = (line for lines in self._episode_lines.values() for line in lines)
+        word_counts = WordCountMatrix.from_lines(lines, character_names=[self._name], stopwords=stopwords)
 
-        count = Counter()
+        # Lines are stored under the name of the character so they'll all be counted in the one row.
+        self._unique_words = word_counts.unique_words(self._name)
 
-        # For each episode, the spoken lines are kept in a list...
-        # [line0, line1, line2, ..., lineN].
-        for episode in self._episode_lines.keys():
-            for line in self._episode_lines[episode]:
-                for word in line.split():
-                    count[word] += 1
+        return word_counts.word_frequencies(self._name)
@@ -2,11 +2,18 @@
 Functions to handle and investigate characters throughout many episodes.
 """
 
-from typing import Dict, List, Optional
+import string
+from functools import lru_cache
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, List, Optional
 
 from containers.character import Character
 from containers.episode import Episode
 
+# ``containers.line`` imports this module so only import ``Line`` for type checking.
+if TYPE_CHECKING:
+    from containers.line import Line
+
 
 def init_characters_in_episodes(episodes: List[Episode]) -> Dict[str, Character]:
     """
@@ -76,6 +83,76 @@ def determine_lines_per_episode(episodes: List[Episode], characters: List[Charac
             character.episode_lines[key_name] = lines_in_ep
 
 
+def determine_line_count_matrix(episodes: List[Episode], character_names: List[str]):
+    """
+    Builds a matrix of the number of lines spoken by each character in each episode in a single pass over the episodes.
+
+    Parameters
+    ----------
+    episodes : List of :py:class:`~Episode` instances
+        The episodes we're analysing.  These are the columns of the matrix.
+
+    character_names : List of strings
+        The characters we're analysing.  These are the rows of the matrix.  Characters that never speak in
+        ``episodes`` have zero lines.
+
+    Returns
+    -------
+    line_counts : ``numpy.ndarray`` of shape ``(len(character_names), len(episodes))``
+        Number of lines spoken by each character in each episode.
+    """
+
+    # Only needed here so don't pay for importing it unless we have to.
+    import numpy as np
+
+    character_rows = {character_name: row for row, character_name in enumerate(character_names)}
+    line_counts = np.zeros((len(character_names), len(episodes)), dtype=np.int64)
+
+    # Only visit the characters that actually speak in each episode rather than every (character, episode) pair.
+    for episode_idx, episode in enumerate(episodes):
+        for character_name, lines in episode.character_lines.items():
+            row = character_rows.get(character_name)
+            if row is not None:
+                line_counts[row, episode_idx] = len(lines)
+
+    return line_counts
+
+
+def count_lines_per_episode(lines: Iterable["Line"]) -> Dict[str, Dict[str, int]]:
+    """
+    Counts the number of lines spoken by each character in each episode.  Only the counts are kept, so ``lines`` can be
+    a stream such as :py:func:`~script_tools.parse_script.iter_lines` covering arbitrarily many scripts.
+
+    Parameters
+    ----------
+    lines : iterable of :py:class:`~containers.line.Line` instances
+        The lines being counted.  Each line must have its season and episode number set.
+
+    Returns
+    -------
+    line_counts : dict["Character_Name", dict["sXXeYY", int]]
+        Number of lines spoken by each character in each episode.  Episodes where a character didn't speak are not
+        included.
+    """
+
+    line_counts: Dict[str, Dict[str, int]] = {}
+    episode_key_cache: Dict[tuple, str] = {}
+
+    for line in lines:
+
+        episode_nums = (line.season_num, line.episode_num)
+        try:
+            key_name = episode_key_cache[episode_nums]
+        except KeyError:
+            key_name = f"s{line.season_num:02}e{line.episode_num:02}"
+            episode_key_cache[episode_nums] = key_name
+
+        episode_counts = line_counts.setdefault(line.character_name, {})
+        episode_counts[key_name] = episode_counts.get(key_name, 0) + 1
+
+    return line_counts
+
+
 def determine_scene_interaction(
     episodes: List[Episode],
     characters: List[Character],
@@ -99,37 +176,25 @@ def determine_scene_interaction(
 
     Returns
     -------
-    None.  The values of :py:attr:`~Character.scene_appearance_dict` are updated directly.
+    None.  The values of :py:attr:`~Character.scene_appearance_dict` and :py:attr:`~Character.num_scenes` are updated
+    directly.  See :py:class:`~containers.scene_matrix.SceneInteractionMatrix` for the underlying co-occurrence matrix.
     """
 
-    # Go through each episode and add the characters in each scene to a dictionary.
-    for episode in episodes:
-        for scene_num, scene in enumerate(episode.scenes):
-
-            # Then within each scene, we want to add all OTHER characters to that
-            # character's appearance dict.
-            for character_name in scene.characters:
-
-                scene_dict = characters[character_name].scene_appearance_dict
-
-                # Track how many scenes each character was in.
-                characters[character_name].num_scenes += 1
-
-                for other_character_name in scene.characters:
+    # The numpy/scipy stack is only needed here so don't pay for importing it unless we have to.
+    from containers.scene_matrix import SceneInteractionMatrix
 
-                    if character_name == debug_name_one and other_character_name == debug_name_two:
-                        print(episode.scene_lines[scene_num])
-                        print(f"{episode.season_num} {episode.episode_num}")
+    # Rather than looping over every pair of characters in every scene, build a sparse scene x character matrix and
+    # let a single sparse product count the scenes each pair shares.
+    interactions = SceneInteractionMatrix(episodes)
+    interactions.apply_to_characters(characters)
 
-                    # Skip the i = j case.
-                    if other_character_name == character_name:
-                        continue
-
-                    # Initialize the first time.
-                    try:
-                        scene_dict[other_character_name] += 1
-                    except KeyError:
-                        scene_dict[other_character_name] = 1
+    if debug_name_one is not None and debug_name_two is not None:
+        for episode in episodes:
+            for scene in episode.scenes:
+                scene_characters = scene.characters
+                if debug_name_one in scene_characters and debug_name_two in scene_characters:
+                    print(scene.lines)
+                    print(f"{episode.season_num} {episode.episode_num}")
 
 
 def determine_character_classes(
@@ -171,6 +236,64 @@ def determine_character_classes(
 # TODO: These should be ported into their own module and listed as "GoT_Names".
 # This way the user can load the desired names to populate the list.
 # Explicitly split into 'named_character' and 'NPC'?
+
+# There are only a handful of names we (by default) allow to be multiple words.
+DEFAULT_ALLOWED_DOUBLE_NAMES = frozenset([
+    "The Hound", "Khal Drogo", "Maester Luwin", "Septa Mordane",
+    "Waymar", "Grand Maester Pycelle", "Maester Pycelle", "Street Urchin",
+    "King's Landing Baker", "Hot Pie", "Ser Alliser",
+    "Maryn Trant", "King Joffrey", "King's Landing Page",
+    "Wine Merchant", "Stable Boy", "Old Nan", "Little Bird",
+    "The Group", "The Others At The Table", "Gold Cloak", "Crowd",
+    "Black Lorren", "The Mountain", "Pyatt Pree", "Eddison Tollett",
+    "Kraznys Mo Nakloz", "Grey Worm", "Ser Dontos", "Dying Man", "Old Man",
+    "Blone Prostitute", "Black Haired Prostitute", "Sand Snakes", "High Sparrow",
+    "Slave Owner", "Night's Watchman", "Khal Moro", "Young Rodrik", "Young Ned",
+    "Three-Eyed Raven", "Young Lyanna", "Young Hodor", "Lady Walda", "Lady Crane",
+    "Maester Aemon", "Ser Vardis", "Maester Walkan", "Maester Pycelle",
+    "High Septon", "Black Walder"
+])
+
+# Populate a bunch of <House> <scout/warrior/guards>.
+_houses = [
+    "Lannister", "Stark", "Tyrell", "Baratheon", "Kings", "Nights Watch",
+    "Kings Landing", "Wounded", "Frey"
+]
+_NPC_classes = ["Soldier", "soldier", "Scout", "Warrior", "Guards", "Bannerman", "Bannermen",
+                "Guard", "Boy"]
+RANDOM_NPC_NAMES = frozenset(f"{house} {NPC_class}" for house in _houses for NPC_class in _NPC_classes)
+
+_default_double_names = DEFAULT_ALLOWED_DOUBLE_NAMES | RANDOM_NPC_NAMES
+
+# We also map some names explicitly to others...
+NAME_MAP = MappingProxyType({
+    "Three-eyed": "Three-Eyed Raven",
+    "Three-Eyed": "Three-Eyed Raven",
+    "Three": "Three-Eyed Raven",
+    "Eddard": "Ned",
+    "Samwell": "Sam",
+    "Maester Aemon": "Aemon",
+    "Royce": "Waymar",
+    "Sandor": "The Hound",
+    "Hound": "The Hound",
+    "Luwin": "Maester Luwin",
+    "Drogo": "Khal Drogo",
+    "Grand Maester Pycelle": "Pycelle",
+    "Maester Pycelle": "Pycelle",
+    "King Joffrey": "Joffrey",
+    "Ser Alliser": "Alliser",
+    "Baelish": "Littlefinger",
+    "Petyr": "Littlefinger",
+    "Mountain": "The Mountain",
+    "Gregor": "The Mountain",
+    "Sparrow": "High Sparrow",
+    "Blackfish": "Brynden",
+    "Twyin": "Tywin",  # Spelling lul.
+    "Rodrick": "Rodrik",  # Spelling.
+    "Oberyon": "Oberyn",
+})
+
+
 def normalize_name(character_name: str, allowed_double_names: Optional[List[str]] = None) -> str:
     """
     Ensures consistency for a character's name.  For some scripts, "Jaime Lannister" is listed as "Jaime", "JAIME",
@@ -183,7 +306,8 @@ def normalize_name(character_name: str, allowed_double_names: Optional[List[str]
 
     allowed_double_names : list of strings, optional
         Some characters are allowed to have two names (e.g., "The Hound").  This parameter specifies those names.  If
-        ``None``, then uses the default values (see source code).
+        ``None``, then uses :py:data:`~DEFAULT_ALLOWED_DOUBLE_NAMES`.  Only names resolved with the default values are
+        memoized (see :py:func:`~normalize_name_cache_info`).
 
     Returns
     -------
@@ -191,82 +315,45 @@ def normalize_name(character_name: str, allowed_double_names: Optional[List[str]
         The normalized name of the character.
     """
 
-    import string
+    if allowed_double_names is None:
+        return _normalize_default_name(character_name)
+
+    return _resolve_name(character_name, frozenset(allowed_double_names) | RANDOM_NPC_NAMES)
+
+
+@lru_cache(maxsize=4096)
+def _normalize_default_name(character_name: str) -> str:
+    return _resolve_name(character_name, _default_double_names)
+
+
+def _resolve_name(character_name: str, allowed_double_names: FrozenSet[str]) -> str:
+
     # First be consistent and capitalize the first letter in all names of a character.
     # Use `capwords` rather than `title` because `title` capitalizes letters after
     # apostrophes.
     character_name = string.capwords(character_name)
 
-    # There are only a handful of names we (by default) allow to be multiple words.
-    if allowed_double_names is None:
-        allowed_double_names = [
-            "The Hound", "Khal Drogo", "Maester Luwin", "Septa Mordane",
-            "Waymar", "Grand Maester Pycelle", "Maester Pycelle", "Street Urchin",
-            "King's Landing Baker", "Hot Pie", "Ser Alliser",
-            "Maryn Trant", "King Joffrey", "King's Landing Page",
-            "Wine Merchant", "Stable Boy", "Old Nan", "Little Bird",
-            "The Group", "The Others At The Table", "Gold Cloak", "Crowd",
-            "Black Lorren", "The Mountain", "Pyatt Pree", "Eddison Tollett",
-            "Kraznys Mo Nakloz", "Grey Worm", "Ser Dontos", "Dying Man", "Old Man",
-            "Blone Prostitute", "Black Haired Prostitute", "Sand Snakes", "High Sparrow",
-            "Slave Owner", "Night's Watchman", "Khal Moro", "Young Rodrik", "Young Ned",
-            "Three-Eyed Raven", "Young Lyanna", "Young Hodor", "Lady Walda", "Lady Crane",
-            "Maester Aemon", "Ser Vardis", "Maester Walkan", "Maester Pycelle",
-            "High Septon", "Black Walder"
-        ]
-
-    # Populate a bunch of <House> <scout/warrior/guards>.
-    houses = [
-        "Lannister", "Stark", "Tyrell", "Baratheon", "Kings", "Nights Watch",
-        "Kings Landing", "Wounded", "Frey"
-    ]
-    NPC_classes = ["Soldier", "soldier", "Scout", "Warrior", "Guards", "Bannerman", "Bannermen",
-                   "Guard", "Boy"]
-    random_NPCs = []
-    for house in houses:
-        for NPC_class in NPC_classes:
-            random_NPCs.append(f"{house} {NPC_class}")
-
-    allowed_double_names = allowed_double_names + random_NPCs
-
     # Now if a character's name is not allowed to be double, we will split it into two and
     # take the first name.
     if character_name not in allowed_double_names:
         character_name = character_name.split()[0]
 
-    # We also map some names explicitly to others...
-    name_map = {
-        "Three-eyed": "Three-Eyed Raven",
-        "Three-Eyed": "Three-Eyed Raven",
-        "Three": "Three-Eyed Raven",
-        "Eddard": "Ned",
-        "Samwell": "Sam",
-        "Maester Aemon": "Aemon",
-        "Royce": "Waymar",
-        "Sandor": "The Hound",
-        "Hound": "The Hound",
-        "Luwin": "Maester Luwin",
-        "Drogo": "Khal Drogo",
-        "Grand Maester Pycelle": "Pycelle",
-        "Maester Pycelle": "Pycelle",
-        "King Joffrey": "Joffrey",
-        "Samwell": "Sam",
-        "Ser Alliser": "Alliser",
-        "Baelish": "Littlefinger",
-        "Petyr": "Littlefinger",
-        "Mountain": "The Mountain",
-        "Gregor": "The Mountain",
-        "Sparrow": "High Sparrow",
-        "Blackfish": "Brynden",
-        "Twyin": "Tywin",  # Spelling lul.
-        "Rodrick": "Rodrik",  # Spelling.
-        "Oberyon": "Oberyn",
-    }
+    return NAME_MAP.get(character_name, character_name)
+
 
-    if character_name in name_map:
-        character_name = name_map[character_name]
+def normalize_name_cache_info():
+    """
+    Returns the hits, misses, and size of the memoized :py:func:`~normalize_name` lookups as a
+    ``functools._CacheInfo`` named tuple.
+    """
+    return _normalize_default_name.cache_info()
 
-    return character_name
+
+def clear_normalize_name_cache() -> None:
+    """
+    Empties the memoized :py:func:`~normalize_name` lookups and resets the hit/miss statistics.
+    """
+    _normalize_default_name.cache_clear()
 
 
 def determine_character_death(characters: Dict[str, Character]) -> Dict[str, Character]:
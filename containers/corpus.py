@@ -0,0 +1,512 @@
+"""
+This module contains the ``Corpus`` class.  The ``Corpus`` class holds every line of dialogue across many episodes in a
+compact, columnar form.  Rather than one Python object per line, each line is a row in a handful of NumPy arrays:
+
+- the id of the character speaking the line,
+- the id of the scene (and episode) the line was spoken in,
+- the offset of the spoken line into a single UTF-8 text buffer.
+
+Lightweight views (:py:class:`~CorpusLine`, :py:class:`~CorpusScene`, and :py:class:`~CorpusEpisode`) expose the same
+properties as :py:class:`~containers.line.Line`, :py:class:`~containers.scene.Scene`, and
+:py:class:`~containers.episode.Episode` so they can be passed to the existing functions in ``character_utils.py`` and
+``episode_utils.py``.  Aggregations such as the number of lines spoken by each character in each episode are computed
+directly on the arrays.
+
+Author: Jacob Seiler
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from containers.episode import Episode
+from containers.line import calc_sentiment
+
+
+class Corpus(object):
+    """
+    Handles all of the lines, scenes, and episodes of a series in columnar arrays.
+    """
+
+    def __init__(
+        self,
+        character_names: List[str],
+        episode_keys: List[str],
+        episode_season_nums: np.ndarray,
+        episode_episode_nums: np.ndarray,
+        episode_scene_offsets: np.ndarray,
+        scene_line_offsets: np.ndarray,
+        line_character_ids: np.ndarray,
+        text: bytes,
+        text_offsets: np.ndarray,
+    ) -> None:
+        """
+        Sets the arrays directly.  Generally a corpus should be built using :py:meth:`~Corpus.from_episodes`.
+
+        Parameters
+        ----------
+
+        character_names : list of strings
+            Name of each character. The index of each name is the id of that character.
+
+        episode_keys : list of strings
+            Key of each episode (e.g., ``s01e02``). The index of each key is the id of that episode.
+
+        episode_season_nums, episode_episode_nums : ``numpy.ndarray`` of ints
+            The season and episode number of each episode.
+
+        episode_scene_offsets : ``numpy.ndarray`` of ints
+            The scenes of episode ``i`` are ``episode_scene_offsets[i]`` to ``episode_scene_offsets[i+1]``.
+
+        scene_line_offsets : ``numpy.ndarray`` of ints
+            The lines of scene ``j`` are ``scene_line_offsets[j]`` to ``scene_line_offsets[j+1]``.
+
+        line_character_ids : ``numpy.ndarray`` of ints
+            The id of the character speaking each line.
+
+        text : bytes
+            All of the spoken lines, encoded as UTF-8 and concatenated together.
+
+        text_offsets : ``numpy.ndarray`` of ints
+            Line ``k`` is ``text[text_offsets[k]:text_offsets[k+1]]``.
+        """
+
+        self._character_names = character_names
+        self._character_ids = {name: character_id for character_id, name in enumerate(character_names)}
+        self._episode_keys = episode_keys
+        self._episode_season_nums = episode_season_nums
+        self._episode_episode_nums = episode_episode_nums
+        self._episode_scene_offsets = episode_scene_offsets
+        self._scene_line_offsets = scene_line_offsets
+        self._line_character_ids = line_character_ids
+        self._text = text
+        self._text_offsets = text_offsets
+
+        # Scene and episode ids of each line can be recovered from the offsets.
+        num_lines_per_scene = np.diff(scene_line_offsets)
+        num_scenes_per_episode = np.diff(episode_scene_offsets)
+        self._scene_episode_ids = np.repeat(
+            np.arange(len(episode_keys), dtype=np.int32), num_scenes_per_episode
+        )
+        self._line_scene_ids = np.repeat(np.arange(len(num_lines_per_scene), dtype=np.int32), num_lines_per_scene)
+        self._line_episode_ids = self._scene_episode_ids[self._line_scene_ids]
+
+    @classmethod
+    def from_episodes(cls, episodes: List[Episode]) -> "Corpus":
+        """
+        Builds a corpus from parsed episodes.
+
+        Parameters
+        ----------
+        episodes : list of :py:class:`~containers.episode.Episode` instances
+            The parsed episodes.
+
+        Returns
+        -------
+        corpus
+            The corpus holding every line of ``episodes``.
+        """
+
+        character_ids: Dict[str, int] = {}
+        line_character_ids = []
+        text_chunks = []
+        text_offsets = [0]
+        scene_line_offsets = [0]
+        episode_scene_offsets = [0]
+
+        for episode in episodes:
+            for scene in episode.scenes:
+                for line in scene.lines:
+
+                    character_id = character_ids.setdefault(line.character_name, len(character_ids))
+                    line_character_ids.append(character_id)
+
+                    encoded = line.spoken_line.encode("utf-8")
+                    text_chunks.append(encoded)
+                    text_offsets.append(text_offsets[-1] + len(encoded))
+
+                scene_line_offsets.append(len(line_character_ids))
+            episode_scene_offsets.append(len(scene_line_offsets) - 1)
+
+        corpus = cls(
+            list(character_ids.keys()),
+            [episode.key for episode in episodes],
+            np.array([episode.season_num for episode in episodes], dtype=np.int16),
+            np.array([episode.episode_num for episode in episodes], dtype=np.int16),
+            np.array(episode_scene_offsets, dtype=np.int32),
+            np.array(scene_line_offsets, dtype=np.int32),
+            np.array(line_character_ids, dtype=np.int32),
+            b"".join(text_chunks),
+            np.array(text_offsets, dtype=np.int64),
+        )
+
+        return corpus
+
+    @property
+    def character_names(self):
+        """
+        list of strings : Name of each character. The index of each name is the id of that character.
+        """
+        return self._character_names
+
+    @property
+    def character_ids(self):
+        """
+        dict[string, int] : The id of each character. Key is the name of the character.
+        """
+        return self._character_ids
+
+    @property
+    def episode_keys(self):
+        """
+        list of strings : Key of each episode. The index of each key is the id of that episode.
+        """
+        return self._episode_keys
+
+    @property
+    def episode_season_nums(self):
+        """
+        ``numpy.ndarray`` : The season number of each episode.
+        """
+        return self._episode_season_nums
+
+    @property
+    def episode_episode_nums(self):
+        """
+        ``numpy.ndarray`` : The episode number of each episode.
+        """
+        return self._episode_episode_nums
+
+    @property
+    def num_lines(self):
+        """
+        int : Total number of lines in the corpus.
+        """
+        return len(self._line_character_ids)
+
+    @property
+    def num_scenes(self):
+        """
+        int : Total number of scenes in the corpus.
+        """
+        return len(self._scene_line_offsets) - 1
+
+    @property
+    def num_episodes(self):
+        """
+        int : Total number of episodes in the corpus.
+        """
+        return len(self._episode_keys)
+
+    @property
+    def line_character_ids(self):
+        """
+        ``numpy.ndarray`` : The id of the character speaking each line.
+        """
+        return self._line_character_ids
+
+    @property
+    def line_scene_ids(self):
+        """
+        ``numpy.ndarray`` : The id of the scene each line was spoken in.
+        """
+        return self._line_scene_ids
+
+    @property
+    def line_episode_ids(self):
+        """
+        ``numpy.ndarray`` : The id of the episode each line was spoken in.
+        """
+        return self._line_episode_ids
+
+    @property
+    def scene_episode_ids(self):
+        """
+        ``numpy.ndarray`` : The id of the episode each scene belongs to.
+        """
+        return self._scene_episode_ids
+
+    @property
+    def episodes(self):
+        """
+        list of :py:class:`~CorpusEpisode` instances : A view of each episode in the corpus.
+        """
+        return [CorpusEpisode(self, episode_id) for episode_id in range(self.num_episodes)]
+
+    @property
+    def nbytes(self):
+        """
+        int : Number of bytes used by the arrays and text buffer of the corpus.
+        """
+        arrays = [
+            self._episode_season_nums, self._episode_episode_nums, self._episode_scene_offsets,
+            self._scene_line_offsets, self._line_character_ids, self._text_offsets, self._scene_episode_ids,
+            self._line_scene_ids, self._line_episode_ids,
+        ]
+        return sum(array.nbytes for array in arrays) + len(self._text)
+
+    def spoken_line(self, line_id: int) -> str:
+        """
+        The text of line ``line_id``.
+        """
+        start, end = self._text_offsets[line_id:line_id+2]
+        return self._text[start:end].decode("utf-8")
+
+    def line(self, line_id: int) -> "CorpusLine":
+        """
+        A view of line ``line_id``.
+        """
+        return CorpusLine(self, line_id)
+
+    def scene(self, scene_id: int) -> "CorpusScene":
+        """
+        A view of scene ``scene_id``.
+        """
+        return CorpusScene(self, scene_id)
+
+    def episode(self, episode_id: int) -> "CorpusEpisode":
+        """
+        A view of episode ``episode_id``.
+        """
+        return CorpusEpisode(self, episode_id)
+
+    def lines_per_character(self) -> np.ndarray:
+        """
+        Number of lines spoken by each character across the whole corpus.  Indexed by the id of the character.
+        """
+        return np.bincount(self._line_character_ids, minlength=len(self._character_names))
+
+    def lines_per_episode(self) -> np.ndarray:
+        """
+        Number of lines spoken in each episode.  Indexed by the id of the episode.
+        """
+        return np.bincount(self._line_episode_ids, minlength=self.num_episodes)
+
+    def line_count_matrix(self, character_names: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Number of lines spoken by each character in each episode.
+
+        Parameters
+        ----------
+        character_names : list of strings, optional
+            The characters (i.e., rows) to return. If not specified, returns every character in the order of
+            :py:attr:`~Corpus.character_names`. Characters not in the corpus have zero lines.
+
+        Returns
+        -------
+        counts : ``numpy.ndarray`` of shape ``(num_characters, num_episodes)``
+            The number of lines spoken by each character in each episode.
+        """
+
+        num_characters = len(self._character_names)
+        flat_index = self._line_character_ids.astype(np.int64) * self.num_episodes + self._line_episode_ids
+        counts = np.bincount(flat_index, minlength=num_characters * self.num_episodes)
+        counts = counts.reshape(num_characters, self.num_episodes)
+
+        if character_names is None:
+            return counts
+
+        selected = np.zeros((len(character_names), self.num_episodes), dtype=counts.dtype)
+        for row, character_name in enumerate(character_names):
+            if character_name in self._character_ids:
+                selected[row] = counts[self._character_ids[character_name]]
+
+        return selected
+
+    def scenes_per_character(self) -> np.ndarray:
+        """
+        Number of scenes that each character speaks in.  Indexed by the id of the character.
+        """
+
+        # A character speaking many times in a scene only counts once.
+        pairs = self._line_scene_ids.astype(np.int64) * len(self._character_names) + self._line_character_ids
+        unique_pairs = np.unique(pairs)
+
+        return np.bincount(unique_pairs % len(self._character_names), minlength=len(self._character_names))
+
+    def _line_range(self, scene_id: int) -> Tuple[int, int]:
+        start, end = self._scene_line_offsets[scene_id:scene_id+2]
+        return int(start), int(end)
+
+    def _scene_range(self, episode_id: int) -> Tuple[int, int]:
+        start, end = self._episode_scene_offsets[episode_id:episode_id+2]
+        return int(start), int(end)
+
+
+class CorpusLine(object):
+    """
+    A view of a single line in a :py:class:`~Corpus`.  Has the same properties as :py:class:`~containers.line.Line`.
+    """
+
+    __slots__ = ("_corpus", "_line_id")
+
+    def __init__(self, corpus: Corpus, line_id: int) -> None:
+        self._corpus = corpus
+        self._line_id = line_id
+
+    @property
+    def character_name(self):
+        """
+        str : The name of the character speaking the line.
+        """
+        return self._corpus.character_names[self._corpus.line_character_ids[self._line_id]]
+
+    @property
+    def spoken_line(self):
+        """
+        str : The line spoken by the character.
+        """
+        return self._corpus.spoken_line(self._line_id)
+
+    @property
+    def season_num(self):
+        """
+        int : The season number the line was spoken in.
+        """
+        return int(self._corpus.episode_season_nums[self._corpus.line_episode_ids[self._line_id]])
+
+    @property
+    def episode_num(self):
+        """
+        int : The episode number the line was spoken in.
+        """
+        return int(self._corpus.episode_episode_nums[self._corpus.line_episode_ids[self._line_id]])
+
+    @property
+    def subjectivity(self):
+        """
+        float? : The subjectivity of the line. Experimental. Computed every time it is accessed.
+        """
+        return calc_sentiment(self.spoken_line)[1]
+
+    @property
+    def polarity(self):
+        """
+        float? : The polarity of the line. Experimental. Computed every time it is accessed.
+        """
+        return calc_sentiment(self.spoken_line)[0]
+
+    def __repr__(self):
+        return f"'{self.spoken_line}'"
+
+
+class CorpusScene(object):
+    """
+    A view of a single scene in a :py:class:`~Corpus`.  Has the same properties as :py:class:`~containers.scene.Scene`.
+    """
+
+    __slots__ = ("_corpus", "_scene_id")
+
+    def __init__(self, corpus: Corpus, scene_id: int) -> None:
+        self._corpus = corpus
+        self._scene_id = scene_id
+
+    @property
+    def lines(self):
+        """
+        list of :py:class:`~CorpusLine` instances : The lines spoken by all characters during the scene.
+        """
+        start, end = self._corpus._line_range(self._scene_id)
+        return [CorpusLine(self._corpus, line_id) for line_id in range(start, end)]
+
+    @property
+    def characters(self):
+        """
+        list of strings : Name of each character that talks in the scene.
+        """
+        start, end = self._corpus._line_range(self._scene_id)
+        character_ids = dict.fromkeys(self._corpus.line_character_ids[start:end].tolist())
+        return [self._corpus.character_names[character_id] for character_id in character_ids]
+
+    @property
+    def season_num(self):
+        """
+        int : The season number the scene belongs to.
+        """
+        return int(self._corpus.episode_season_nums[self._corpus.scene_episode_ids[self._scene_id]])
+
+    @property
+    def episode_num(self):
+        """
+        int : The episode number the scene belongs to.
+        """
+        return int(self._corpus.episode_episode_nums[self._corpus.scene_episode_ids[self._scene_id]])
+
+    def __repr__(self):
+        return f"s{self.season_num:02d}e{self.episode_num:02} scene"
+
+
+class CorpusEpisode(object):
+    """
+    A view of a single episode in a :py:class:`~Corpus`.  Has the same properties as
+    :py:class:`~containers.episode.Episode` that are used when analysing episodes.
+    """
+
+    __slots__ = ("_corpus", "_episode_id")
+
+    def __init__(self, corpus: Corpus, episode_id: int) -> None:
+        self._corpus = corpus
+        self._episode_id = episode_id
+
+    @property
+    def season_num(self):
+        """
+        int : The season number.
+        """
+        return int(self._corpus.episode_season_nums[self._episode_id])
+
+    @property
+    def episode_num(self):
+        """
+        int : The episode number.
+        """
+        return int(self._corpus.episode_episode_nums[self._episode_id])
+
+    @property
+    def key(self):
+        """
+        str : A unique key for the episode of the form ``sXXeYY``.
+        """
+        return self._corpus.episode_keys[self._episode_id]
+
+    @property
+    def scenes(self):
+        """
+        list of :py:class:`~CorpusScene` instances : The scenes in this episode.
+        """
+        start, end = self._corpus._scene_range(self._episode_id)
+        return [CorpusScene(self._corpus, scene_id) for scene_id in range(start, end)]
+
+    @property
+    def num_scenes(self):
+        """
+        int : Number of scenes in the episode.
+        """
+        start, end = self._corpus._scene_range(self._episode_id)
+        return end - start
+
+    @property
+    def character_lines(self):
+        """
+        dict[string, list of :py:class:`~CorpusLine` instances] : Lines spoken by each character in this episode. Key
+        is the name of the character.
+        """
+
+        # Episodes without a script have no scenes (and hence no lines).
+        scene_start, scene_end = self._corpus._scene_range(self._episode_id)
+        if scene_end == scene_start:
+            return {}
+
+        start = self._corpus._line_range(scene_start)[0]
+        end = self._corpus._line_range(scene_end - 1)[1]
+
+        character_lines: Dict[str, List[CorpusLine]] = {}
+        character_ids = self._corpus.line_character_ids[start:end].tolist()
+        for line_id, character_id in enumerate(character_ids, start=start):
+            character_name = self._corpus.character_names[character_id]
+            character_lines.setdefault(character_name, []).append(CorpusLine(self._corpus, line_id))
+
+        return character_lines
+
+    def __repr__(self):
+        return f"{self.key} episode"
@@ -8,11 +8,23 @@ found in ``episode_utils.py``.
 Author: Jacob Seiler.
 """
 
+# The formats that can be used to identify character lines and scene changes. See
+# :py:attr:`~Episode.character_format` and :py:attr:`~Episode.scene_format`. "NONE" marks episodes without a script.
+ALLOWED_CHARACTER_FORMATS = ["CHARACTER_NAME:", "**CHARACTER_NAME:**", "NONE"]
+ALLOWED_SCENE_FORMATS = ["SCENE", "DASHES", "STARS", "INT/EXT", "CUT", "INT/EXT/CUT", "ONE_SCENE", "NONE"]
+
+
 class Episode(object):
     """
     Handles all of the data associated with single episode.
     """
 
+    __slots__ = (
+        "_season_num", "_episode_num", "_character_lines", "_key", "_script_path", "_scenes", "_scene_lines",
+        "_scene_characters", "_tmp_scene_lines", "_character_format", "_scene_format", "_num_scenes",
+        "current_scene",
+    )
+
     def __init__(self, season_num, episode_num, key, script_path):
         """
         Sets empty lists, dictionaries and information about the episode.
@@ -48,6 +60,9 @@ class Episode(object):
         # `_scene_lines`.
         self._tmp_scene_lines = []
 
+        # The scene currently being filled while the script is parsed.
+        self.current_scene = None
+
     @property
     def season_num(self):
         """
@@ -101,11 +116,10 @@ class Episode(object):
     @character_format.setter
     def character_format(self, character_format):
 
-        allowed_formats = ["CHARACTER_NAME:", "**CHARACTER_NAME:**", "NONE"]
-        if character_format not in allowed_formats:
+        if character_format not in ALLOWED_CHARACTER_FORMATS:
             print(f"The format for parsing the characters for episode {self.key} was "
                   f"specified as {character_format}. The only allowed formats are "
-                  f"{allowed_formats}")
+                  f"{ALLOWED_CHARACTER_FORMATS}")
             raise ValueError
 
         self._character_format = character_format
@@ -138,7 +152,13 @@ class Episode(object):
 
     @scene_format.setter
     def scene_format(self, scene_format):
-        # TODO: Add a check to ensure the format is only one of the valid ones.
+
+        if scene_format not in ALLOWED_SCENE_FORMATS:
+            print(f"The format for parsing the scenes for episode {self.key} was "
+                  f"specified as {scene_format}. The only allowed formats are "
+                  f"{ALLOWED_SCENE_FORMATS}")
+            raise ValueError
+
         self._scene_format = scene_format
 
     @property
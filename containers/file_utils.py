@@ -0,0 +1,40 @@
+"""
+This module contains the file helpers shared by everything that saves files which are read back later (e.g., the parse
+cache, the saved search index, cached layouts, and scraped scripts).
+
+Author: Jacob Seiler
+"""
+
+import os
+from typing import Union
+
+
+def atomic_write(fname: str, data: Union[str, bytes], mode: str = "w") -> None:
+    """
+    Writes ``data`` to ``fname`` so that ``fname`` is either left untouched or fully written.  The data is written to
+    a temporary file next to ``fname`` which then replaces ``fname``, so an interrupted run never leaves a half-written
+    file behind.
+
+    Parameters
+    ----------
+    fname
+        Path to the file being written.
+
+    data
+        The contents of the file.
+
+    mode : optional
+        Mode the file is opened with. Use ``"wb"`` if ``data`` is ``bytes``.
+    """
+
+    # Include the process id so concurrent processes writing the same file don't clobber each other's temporary file.
+    tmp_fname = f"{fname}.tmp{os.getpid()}"
+
+    try:
+        with open(tmp_fname, mode) as f:
+            f.write(data)
+        os.replace(tmp_fname, fname)
+    except BaseException:
+        if os.path.exists(tmp_fname):
+            os.remove(tmp_fname)
+        raise
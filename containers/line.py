@@ -3,23 +3,61 @@ This module contains the ``Line`` class.  The ``Line`` class contains all the da
 dialogue. This information includes the name of the character that spoke the line, the line itself, the subjectivity,
 and the polarity of the line.  These last two properties are experimental and haven't been explore deeply.
 
+The sentiment of a line is only computed the first time that either the subjectivity or polarity is accessed. To score
+many lines at once (optionally across multiple processes), use :py:func:`~containers.sentiment.score_episodes`.
+
 Author: Jacob Seiler
 """
 
+from typing import Optional, Tuple
+
 from containers.character_utils import normalize_name
-from textblob import TextBlob
+
+
+def calc_sentiment(spoken_line: str) -> Tuple[float, float]:
+    """
+    Computes the sentiment of a spoken line using ``TextBlob``.
+
+    Parameters
+    ----------
+    spoken_line
+        The line whose sentiment is being computed.
+
+    Returns
+    -------
+    polarity, subjectivity
+        The polarity and subjectivity of the line.
+    """
+
+    # Importing TextBlob is slow. Only pay the cost if we actually want the sentiment.
+    from textblob import TextBlob
+
+    sentiment = TextBlob(spoken_line).sentiment
+
+    return sentiment.polarity, sentiment.subjectivity
 
 
 class Line(object):
 
-    def __init__(self, character_name: str, spoken_line: str):
+    # There are tens of thousands of lines in a series. Slots save a ``__dict__`` for each of them.
+    __slots__ = ("_character_name", "_spoken_line", "_subjectivity", "_polarity", "_season_num", "_episode_num")
+
+    def __init__(
+        self,
+        character_name: str,
+        spoken_line: str,
+        season_num: Optional[int] = None,
+        episode_num: Optional[int] = None,
+    ):
 
         self._character_name = character_name
         self._spoken_line = spoken_line
+        self._season_num = season_num
+        self._episode_num = episode_num
 
-        sentiment = TextBlob(spoken_line).sentiment
-        self._subjectivity = sentiment.subjectivity
-        self._polarity = sentiment.polarity
+        # The sentiment is computed lazily the first time it is accessed.
+        self._subjectivity = None
+        self._polarity = None
 
     @property
     def character_name(self):
@@ -49,20 +87,65 @@ class Line(object):
     def spoken_line(self, spoken_line):
         self._spoken_line = spoken_line
 
+        # The old sentiment no longer applies to this line.
+        self._subjectivity = None
+        self._polarity = None
+
+    @property
+    def season_num(self):
+        """
+        int : The season number the line was spoken in.
+        """
+        return self._season_num
+
+    @season_num.setter
+    def season_num(self, season_num: int):
+        self._season_num = season_num
+
+    @property
+    def episode_num(self):
+        """
+        int : The episode number the line was spoken in.
+        """
+        return self._episode_num
+
+    @episode_num.setter
+    def episode_num(self, episode_num: int):
+        self._episode_num = episode_num
+
     @property
     def subjectivity(self):
         """
-        float? : The subjectivity of the line. Experimental.
+        float? : The subjectivity of the line. Experimental. Computed on first access.
         """
+        if self._subjectivity is None:
+            self.set_sentiment(*calc_sentiment(self._spoken_line))
         return self._subjectivity
 
     @property
     def polarity(self):
         """
-        float? : The polarity of the line. Experimental.
+        float? : The polarity of the line. Experimental. Computed on first access.
         """
+        if self._polarity is None:
+            self.set_sentiment(*calc_sentiment(self._spoken_line))
         return self._polarity
 
+    @property
+    def has_sentiment(self):
+        """
+        bool : Whether the sentiment of this line has already been computed.
+        """
+        return self._polarity is not None
+
+    def set_sentiment(self, polarity: float, subjectivity: float) -> None:
+        """
+        Sets the sentiment of the line directly.  Used when lines are scored in bulk (see
+        :py:func:`~containers.sentiment.score_episodes`).
+        """
+        self._polarity = polarity
+        self._subjectivity = subjectivity
+
     def __repr__(self):
         """
         Sets the represenation of a line to simply be the line itself.
@@ -11,6 +11,8 @@ from typing import List
 
 class Scene(object):
 
+    __slots__ = ("_lines", "_characters", "_season_num", "_episode_num")
+
     def __init__(self, season_num: int, episode_num: int):
 
         self._lines: List[str] = []
@@ -0,0 +1,323 @@
+"""
+This module contains the ``SceneInteractionMatrix`` class.  The ``SceneInteractionMatrix`` records which characters
+speak in each scene as a sparse scene x character incidence matrix.  The number of scenes that every pair of characters
+share is then computed with a single sparse matrix product.
+
+The results can be copied onto :py:class:`~containers.character.Character` instances (i.e., their
+:py:attr:`~containers.character.Character.scene_appearance_dict` and
+:py:attr:`~containers.character.Character.num_scenes` attributes) using
+:py:meth:`~SceneInteractionMatrix.apply_to_characters`.
+
+The ``InteractionAccumulator`` class folds in the interactions of one episode at a time, allowing the interactions of
+every prefix of a list of episodes to be computed in a single pass.  It can also consume a stream of scenes in batches
+so that very large corpora never have to be held in memory.
+
+Author: Jacob Seiler
+"""
+
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from scipy import sparse
+
+from containers.character import Character
+from containers.episode import Episode
+from containers.scene import Scene
+
+
+class SceneInteractionMatrix(object):
+    """
+    Handles the number of scenes that characters speak in together.
+    """
+
+    def __init__(self, episodes: List[Episode], character_names: Optional[List[str]] = None):
+        """
+        Builds the incidence matrix and computes the co-occurrence matrix.
+
+        Parameters
+        ----------
+
+        episodes : list of :py:class:`~containers.episode.Episode` instances
+            The episodes whose scenes are being analysed.
+
+        character_names : list of strings, optional
+            The characters that are assigned an id (i.e., a column of the incidence matrix).  If not specified, uses
+            every character that speaks in ``episodes`` in order of their first line.  Characters that aren't in this
+            list are ignored.
+        """
+
+        scenes = (scene for episode in episodes for scene in episode.scenes)
+        self._build(scenes, character_names)
+
+    @classmethod
+    def from_scenes(
+        cls, scenes: Iterable[Scene], character_names: Optional[List[str]] = None
+    ) -> "SceneInteractionMatrix":
+        """
+        Builds the matrices directly from scenes, e.g., those streamed by
+        :py:func:`~script_tools.parse_script.iter_scenes`.  ``scenes`` is consumed once and none of the scenes are kept.
+
+        Parameters
+        ----------
+
+        scenes : iterable of :py:class:`~containers.scene.Scene` instances
+            The scenes being analysed.
+
+        character_names : list of strings, optional
+            See :py:meth:`~__init__`.
+        """
+
+        interactions = cls.__new__(cls)
+        interactions._build(scenes, character_names)
+
+        return interactions
+
+    def _build(self, scenes: Iterable[Scene], character_names: Optional[List[str]]) -> None:
+
+        fixed_names = character_names is not None
+        if character_names is None:
+            character_names = []
+
+        self._character_names = list(character_names)
+        self._character_ids = {name: character_id for character_id, name in enumerate(self._character_names)}
+
+        # Build up the (scene, character) coordinates of every non-zero entry.
+        scene_ids = []
+        character_ids = []
+        num_scenes = 0
+        for scene in scenes:
+            for character_name in scene.characters:
+
+                try:
+                    character_id = self._character_ids[character_name]
+                except KeyError:
+                    if fixed_names:
+                        continue
+                    character_id = len(self._character_names)
+                    self._character_ids[character_name] = character_id
+                    self._character_names.append(character_name)
+
+                scene_ids.append(num_scenes)
+                character_ids.append(character_id)
+
+            num_scenes += 1
+
+        shape = (num_scenes, len(self._character_names))
+        data = np.ones(len(scene_ids), dtype=np.int32)
+        self._incidence = sparse.csr_matrix((data, (scene_ids, character_ids)), shape=shape, dtype=np.int32)
+
+        # The diagonal of the co-occurrence matrix is the number of scenes each character is in.
+        self._cooccurrence = (self._incidence.T @ self._incidence).tocsr()
+        self._num_scenes = np.asarray(self._incidence.sum(axis=0)).ravel()
+
+    @property
+    def character_names(self):
+        """
+        list of strings : Name of each character. The index of each name is the id of that character.
+        """
+        return self._character_names
+
+    @property
+    def character_ids(self):
+        """
+        dict[string, int] : The id of each character. Key is the name of the character.
+        """
+        return self._character_ids
+
+    @property
+    def incidence(self):
+        """
+        ``scipy.sparse.csr_matrix`` : Scene x character matrix. An entry is 1 if the character speaks in the scene.
+        """
+        return self._incidence
+
+    @property
+    def cooccurrence(self):
+        """
+        ``scipy.sparse.csr_matrix`` : Character x character matrix of the number of scenes that both characters speak
+        in.  The diagonal is the number of scenes each character speaks in.
+        """
+        return self._cooccurrence
+
+    @property
+    def num_scenes(self):
+        """
+        ``numpy.ndarray`` : Number of scenes that each character speaks in. Indexed by the id of the character.
+        """
+        return self._num_scenes
+
+    def scene_appearance_dict(self, character_name: str) -> Dict[str, int]:
+        """
+        Number of scenes that ``character_name`` speaks in with each other character.  Key is the name of the other
+        character. Characters that never share a scene are not included.
+        """
+
+        character_id = self._character_ids[character_name]
+
+        start, end = self._cooccurrence.indptr[character_id:character_id+2]
+        other_ids = self._cooccurrence.indices[start:end].tolist()
+        counts = self._cooccurrence.data[start:end].tolist()
+
+        appearance_dict = {
+            self._character_names[other_id]: count
+            for other_id, count in zip(other_ids, counts)
+            if other_id != character_id and count > 0
+        }
+
+        return appearance_dict
+
+    def apply_to_characters(self, characters: Dict[str, Character]) -> None:
+        """
+        Adds the number of scenes and the scene interactions to the given characters.
+
+        Parameters
+        ----------
+        characters : dict["Character_Name", :py:class:`~containers.character.Character` instance]
+            The characters being updated. Every character with at least one scene must be present.
+
+        Returns
+        -------
+        None.  The values of :py:attr:`~containers.character.Character.num_scenes` and
+        :py:attr:`~containers.character.Character.scene_appearance_dict` are updated directly.
+        """
+
+        num_scenes = self._num_scenes.tolist()
+
+        for character_id, character_name in enumerate(self._character_names):
+
+            if num_scenes[character_id] == 0:
+                continue
+
+            character = characters[character_name]
+            character.num_scenes += num_scenes[character_id]
+
+            scene_dict = character.scene_appearance_dict
+            for other_character_name, count in self.scene_appearance_dict(character_name).items():
+                scene_dict[other_character_name] = scene_dict.get(other_character_name, 0) + count
+
+
+class InteractionAccumulator(object):
+    """
+    Accumulates the scene interactions of characters one episode at a time.  Useful for computing the interactions for
+    every prefix of a list of episodes (i.e., episodes {1}, {1, 2}, {1, 2, 3}, ...) in a single pass rather than
+    recomputing each prefix from scratch.
+    """
+
+    def __init__(self) -> None:
+
+        self._num_scenes: Dict[str, int] = {}
+        self._scene_appearance_dicts: Dict[str, Dict[str, int]] = {}
+        self._episode_keys: List[str] = []
+        self._tot_num_scenes = 0
+
+    @property
+    def num_scenes(self):
+        """
+        dict[string, int] : Number of scenes each character has spoken in so far.  Key is the name of the character.
+        Every character that has spoken in the episodes added so far is included.
+        """
+        return self._num_scenes
+
+    @property
+    def episode_keys(self):
+        """
+        list of strings : Keys of the episodes that have been added, in the order they were added.
+        """
+        return self._episode_keys
+
+    @property
+    def tot_num_scenes(self):
+        """
+        int : Total number of scenes across all episodes that have been added.
+        """
+        return self._tot_num_scenes
+
+    def add_episode(self, episode: Episode) -> None:
+        """
+        Folds the scene interactions of a single episode into the running totals.
+        """
+
+        # Characters are tracked as soon as they speak, matching
+        # :py:func:`~containers.character_utils.init_characters_in_episodes`.
+        for character_name in episode.character_lines:
+            if character_name not in self._num_scenes:
+                self._num_scenes[character_name] = 0
+                self._scene_appearance_dicts[character_name] = {}
+
+        self._add_interactions(SceneInteractionMatrix([episode]))
+
+        self._episode_keys.append(episode.key)
+        self._tot_num_scenes += episode.num_scenes
+
+    def add_scenes(self, scenes: Iterable[Scene], batch_size: int = 1000) -> None:
+        """
+        Folds the scene interactions of a stream of scenes into the running totals, e.g., the scenes from
+        :py:func:`~script_tools.parse_script.iter_scenes`.  The scenes are consumed ``batch_size`` at a time, so at most
+        that many scenes are held in memory.
+
+        Every scene is counted towards :py:attr:`~tot_num_scenes`, including scenes without any lines, so streaming the
+        scenes of some episodes gives the same totals as adding those episodes with :py:meth:`~add_episode`.  Unlike
+        :py:meth:`~add_episode`, :py:attr:`~episode_keys` is not updated and only characters that speak in the scenes
+        are tracked.
+        """
+
+        scenes = iter(scenes)
+
+        while True:
+            batch = list(islice(scenes, batch_size))
+            if len(batch) == 0:
+                break
+
+            for scene in batch:
+                for character_name in scene.characters:
+                    if character_name not in self._num_scenes:
+                        self._num_scenes[character_name] = 0
+                        self._scene_appearance_dicts[character_name] = {}
+
+            self._add_interactions(SceneInteractionMatrix.from_scenes(batch))
+            self._tot_num_scenes += len(batch)
+
+    def _add_interactions(self, interactions: SceneInteractionMatrix) -> None:
+
+        num_scenes = interactions.num_scenes.tolist()
+
+        for character_id, character_name in enumerate(interactions.character_names):
+
+            if num_scenes[character_id] == 0:
+                continue
+
+            self._num_scenes[character_name] += num_scenes[character_id]
+
+            scene_dict = self._scene_appearance_dicts[character_name]
+            for other_character_name, count in interactions.scene_appearance_dict(character_name).items():
+                scene_dict[other_character_name] = scene_dict.get(other_character_name, 0) + count
+
+    def characters(self, character_names: Optional[List[str]] = None) -> Dict[str, Character]:
+        """
+        Builds :py:class:`~containers.character.Character` instances holding the interactions accumulated so far.
+
+        Parameters
+        ----------
+        character_names : list of strings, optional
+            The characters to build. If not specified, builds every character that has spoken so far.
+
+        Returns
+        -------
+        characters : dict["Character_Name", :py:class:`~containers.character.Character` instance]
+            Characters with :py:attr:`~containers.character.Character.num_scenes` and
+            :py:attr:`~containers.character.Character.scene_appearance_dict` set.  These are copies, so adding further
+            episodes does not change them.
+        """
+
+        if character_names is None:
+            character_names = list(self._num_scenes.keys())
+
+        characters = {}
+        for character_name in character_names:
+            character = Character(character_name)
+            character.num_scenes = self._num_scenes[character_name]
+            character.scene_appearance_dict = dict(self._scene_appearance_dicts[character_name])
+            characters[character_name] = character
+
+        return characters
@@ -0,0 +1,473 @@
+"""
+This module contains the ``SearchIndex`` class.  The ``SearchIndex`` class is an inverted index over every spoken line
+of a series: for each word, it holds the lines the word was spoken in and the position of the word within each line.
+This allows finding who said a word (or phrase) without scanning every line.
+
+Queries can be single words, quoted phrases, or boolean combinations of these using ``AND``, ``OR``, ``NOT``, and
+parentheses.  Words next to each other without an operator are combined with ``AND``:
+
+.. code::
+
+    index = SearchIndex.from_episodes(episodes)
+
+    index.search_word("dragons")
+    index.search_phrase("winter is coming", characters=["Ned"])
+    index.search('"the north" AND (wolf OR wolves) NOT winter', seasons=[1, 2])
+
+    index.save("search_index.bin")
+    index = SearchIndex.load("search_index.bin")
+
+Words are split using :py:func:`~containers.text_utils.tokenize` and matched case-insensitively.
+
+Author: Jacob Seiler
+"""
+
+import pickle
+import re
+import zlib
+from array import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from containers.episode import Episode
+from containers.file_utils import atomic_write
+from containers.text_utils import tokenize
+
+# Every saved index starts with these bytes.
+INDEX_MAGIC = b"SPIX1"
+
+# Splits a query into parentheses, quoted phrases, and words.  A quote that is never closed takes the rest of the query
+# so that it can be rejected rather than silently dropped.
+QUERY_TOKEN_RE = re.compile(r'\(|\)|"[^"]*"|"[^"]*$|[^\s()"]+')
+
+
+class LineHit(NamedTuple):
+    """
+    A line that matched a query.
+    """
+
+    # Key of the episode the line was spoken in, e.g., ``s01e02``.
+    episode_key: str
+
+    # Index of the scene within the episode.
+    scene_num: int
+
+    # Index of the line within the episode.
+    line_num: int
+
+    character_name: str
+
+    spoken_line: str
+
+
+class SearchIndex(object):
+    """
+    Handles the inverted index of every spoken line.
+    """
+
+    def __init__(
+        self,
+        postings: Dict[str, Dict[int, List[int]]],
+        line_episode_ids: List[int],
+        line_scene_nums: List[int],
+        line_nums: List[int],
+        line_character_ids: List[int],
+        spoken_lines: List[str],
+        episode_keys: List[str],
+        episode_season_nums: List[int],
+        character_names: List[str],
+    ) -> None:
+        """
+        Sets the index directly.  Generally an index should be built using :py:meth:`~SearchIndex.from_episodes` or
+        loaded using :py:meth:`~SearchIndex.load`.
+
+        Parameters
+        ----------
+
+        postings : dict[string, dict[int, list of ints]]
+            For each word, the id of each line the word was spoken in and the positions of the word within that line.
+            The postings of a word may instead be flattened into an ``array`` (as they are when saved).
+
+        line_episode_ids, line_scene_nums, line_nums, line_character_ids : lists of ints
+            For each line id, the id of the episode, the index of the scene within the episode, the index of the line
+            within the episode, and the id of the character speaking the line.
+
+        spoken_lines : list of strings
+            The text of each line.
+
+        episode_keys, episode_season_nums : list of strings, list of ints
+            The key and season number of each episode id.
+
+        character_names : list of strings
+            Name of each character id.
+        """
+
+        self._postings = postings
+        self._line_episode_ids = line_episode_ids
+        self._line_scene_nums = line_scene_nums
+        self._line_nums = line_nums
+        self._line_character_ids = line_character_ids
+        self._spoken_lines = spoken_lines
+        self._episode_keys = episode_keys
+        self._episode_season_nums = episode_season_nums
+        self._character_names = character_names
+
+    @classmethod
+    def from_episodes(cls, episodes: Iterable[Episode]) -> "SearchIndex":
+        """
+        Builds the index from parsed episodes.
+
+        Parameters
+        ----------
+        episodes : list of :py:class:`~containers.episode.Episode` instances
+            The parsed episodes.
+
+        Returns
+        -------
+        index
+            The index of every line in ``episodes``.
+        """
+
+        postings: Dict[str, Dict[int, List[int]]] = {}
+        line_episode_ids = []
+        line_scene_nums = []
+        line_nums = []
+        line_character_ids = []
+        spoken_lines = []
+        episode_keys = []
+        episode_season_nums = []
+        character_ids: Dict[str, int] = {}
+
+        for episode_id, episode in enumerate(episodes):
+            episode_keys.append(episode.key)
+            episode_season_nums.append(int(episode.season_num))
+
+            line_num = 0
+            for scene_num, scene in enumerate(episode.scenes):
+                for line in scene.lines:
+
+                    line_id = len(spoken_lines)
+                    line_episode_ids.append(episode_id)
+                    line_scene_nums.append(scene_num)
+                    line_nums.append(line_num)
+                    line_character_ids.append(character_ids.setdefault(line.character_name, len(character_ids)))
+                    spoken_lines.append(line.spoken_line)
+                    line_num += 1
+
+                    for position, token in enumerate(tokenize(line.spoken_line)):
+                        postings.setdefault(token, {}).setdefault(line_id, []).append(position)
+
+        return cls(
+            postings, line_episode_ids, line_scene_nums, line_nums, line_character_ids, spoken_lines, episode_keys,
+            episode_season_nums, list(character_ids.keys()),
+        )
+
+    @property
+    def num_lines(self):
+        """
+        int : Number of lines in the index.
+        """
+        return len(self._spoken_lines)
+
+    @property
+    def vocabulary(self):
+        """
+        list of strings : Every word in the index, sorted alphabetically.
+        """
+        return sorted(self._postings.keys())
+
+    @property
+    def character_names(self):
+        """
+        list of strings : Name of every character that speaks a line in the index.
+        """
+        return self._character_names
+
+    @property
+    def episode_keys(self):
+        """
+        list of strings : Key of every episode in the index.
+        """
+        return self._episode_keys
+
+    def word_count(self, word: str) -> int:
+        """
+        Number of times ``word`` was spoken across every line in the index.  ``word`` is tokenized the same way as the
+        lines, so case and curly apostrophes don't matter.  If ``word`` holds several words, counts the number of times
+        they were spoken as a phrase.
+        """
+
+        tokens = tokenize(word)
+        if len(tokens) == 1:
+            return sum(len(positions) for positions in self._token_postings(tokens[0]).values())
+
+        return sum(len(starts) for starts in self._phrase_starts(tokens).values())
+
+    def search_word(
+        self,
+        word: str,
+        characters: Optional[List[str]] = None,
+        seasons: Optional[List[int]] = None,
+    ) -> List[LineHit]:
+        """
+        Finds the lines containing a word.
+
+        Parameters
+        ----------
+        word
+            The word being searched for.  Matched case-insensitively.
+
+        characters : optional
+            If specified, only lines spoken by these characters are returned.  Names are matched case-insensitively.
+
+        seasons : optional
+            If specified, only lines spoken in these seasons are returned.
+
+        Returns
+        -------
+        hits
+            The matching lines, in the order they were spoken.
+        """
+        return self._hits(self._word_line_ids(word), characters, seasons)
+
+    def search_phrase(
+        self,
+        phrase: str,
+        characters: Optional[List[str]] = None,
+        seasons: Optional[List[int]] = None,
+    ) -> List[LineHit]:
+        """
+        Finds the lines containing the words of a phrase next to each other and in order.  See
+        :py:meth:`~SearchIndex.search_word` for the parameters.
+        """
+        return self._hits(self._phrase_line_ids(phrase), characters, seasons)
+
+    def search(
+        self,
+        query: str,
+        characters: Optional[List[str]] = None,
+        seasons: Optional[List[int]] = None,
+    ) -> List[LineHit]:
+        """
+        Finds the lines matching a boolean query.
+
+        Parameters
+        ----------
+        query
+            Words and quoted phrases combined with ``AND``, ``OR``, ``NOT``, and parentheses.  ``NOT`` binds tightest,
+            then ``AND``, then ``OR``.  Terms without an operator between them are combined with ``AND``.
+
+        characters, seasons : optional
+            See :py:meth:`~SearchIndex.search_word`.
+
+        Returns
+        -------
+        hits
+            The matching lines, in the order they were spoken.
+
+        Raises
+        ------
+        ValueError
+            If the query is malformed, e.g., has unbalanced parentheses or quotes, or ends with an operator.
+        """
+
+        tokens = QUERY_TOKEN_RE.findall(query)
+        if len(tokens) == 0:
+            return []
+
+        line_ids, pos = self._parse_or(tokens, 0)
+        if pos != len(tokens):
+            print(f"Could not parse the query {query!r}. Unexpected {tokens[pos]!r}.")
+            raise ValueError
+
+        return self._hits(line_ids, characters, seasons)
+
+    def save(self, fname: str) -> None:
+        """
+        Saves the index to ``fname`` so it can be loaded with :py:meth:`~SearchIndex.load`.
+        """
+
+        # Pickling millions of small lists is slow. Flatten the postings of each word into ``[line_id, num_positions,
+        # positions..., line_id, ...]`` so each word is a single array. They are unpacked again when first queried.
+        postings = {token: self._encoded_postings(token) for token in self._postings}
+
+        state = (
+            postings, self._line_episode_ids, self._line_scene_nums, self._line_nums, self._line_character_ids,
+            self._spoken_lines, self._episode_keys, self._episode_season_nums, self._character_names,
+        )
+        data = INDEX_MAGIC + zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL))
+        atomic_write(fname, data, "wb")
+
+    @classmethod
+    def load(cls, fname: str) -> "SearchIndex":
+        """
+        Loads an index saved with :py:meth:`~SearchIndex.save`.
+
+        Raises
+        ------
+        ValueError
+            If ``fname`` is not a saved index.
+        """
+
+        with open(fname, "rb") as f:
+            data = f.read()
+
+        if not data.startswith(INDEX_MAGIC):
+            print(f"{fname} is not a saved search index.")
+            raise ValueError
+
+        return cls(*pickle.loads(zlib.decompress(data[len(INDEX_MAGIC):])))
+
+    def _token_postings(self, token: str) -> Dict[int, List[int]]:
+
+        postings = self._postings.get(token)
+        if postings is None:
+            return {}
+
+        # Loaded indices hold the flattened postings. Unpack them the first time they're needed.
+        if isinstance(postings, array):
+            flat = postings.tolist()
+            postings = {}
+            idx = 0
+            while idx < len(flat):
+                num_positions = flat[idx + 1]
+                postings[flat[idx]] = flat[idx + 2:idx + 2 + num_positions]
+                idx += 2 + num_positions
+            self._postings[token] = postings
+
+        return postings
+
+    def _encoded_postings(self, token: str) -> array:
+
+        postings = self._postings[token]
+        if isinstance(postings, array):
+            return postings
+
+        flat = array("i")
+        for line_id, positions in postings.items():
+            flat.append(line_id)
+            flat.append(len(positions))
+            flat.extend(positions)
+
+        return flat
+
+    def _word_line_ids(self, word: str) -> Set[int]:
+        tokens = tokenize(word)
+        if len(tokens) != 1:
+            return self._phrase_line_ids(word)
+        return set(self._token_postings(tokens[0]))
+
+    def _phrase_line_ids(self, phrase: str) -> Set[int]:
+        return set(self._phrase_starts(tokenize(phrase)))
+
+    def _phrase_starts(self, tokens: List[str]) -> Dict[int, Set[int]]:
+        """
+        The position the phrase starts at within each line containing it.  Key is the id of the line.
+        """
+
+        if len(tokens) == 0:
+            return {}
+
+        token_postings = [self._token_postings(token) for token in tokens]
+
+        # Only lines containing every word can contain the phrase. Start from the rarest word.
+        candidates = set(min(token_postings, key=len))
+        for postings in token_postings:
+            candidates.intersection_update(postings)
+
+        matches = {}
+        for line_id in candidates:
+            # The phrase starts at position ``p`` if word ``i`` of the phrase is at ``p + i`` for every ``i``.
+            starts = set(token_postings[0][line_id])
+            for offset, postings in enumerate(token_postings[1:], start=1):
+                starts.intersection_update(position - offset for position in postings[line_id])
+                if len(starts) == 0:
+                    break
+            if len(starts) > 0:
+                matches[line_id] = starts
+
+        return matches
+
+    def _parse_or(self, tokens: List[str], pos: int) -> Tuple[Set[int], int]:
+
+        line_ids, pos = self._parse_and(tokens, pos)
+        while pos < len(tokens) and tokens[pos] == "OR":
+            other, pos = self._parse_and(tokens, pos + 1)
+            line_ids = line_ids | other
+
+        return line_ids, pos
+
+    def _parse_and(self, tokens: List[str], pos: int) -> Tuple[Set[int], int]:
+
+        line_ids, pos = self._parse_not(tokens, pos)
+        while pos < len(tokens) and tokens[pos] not in ("OR", ")"):
+            if tokens[pos] == "AND":
+                pos += 1
+            other, pos = self._parse_not(tokens, pos)
+            line_ids = line_ids & other
+
+        return line_ids, pos
+
+    def _parse_not(self, tokens: List[str], pos: int) -> Tuple[Set[int], int]:
+
+        if pos >= len(tokens):
+            print("Could not parse the query. It ends with an operator.")
+            raise ValueError
+
+        token = tokens[pos]
+
+        if token == "NOT":
+            line_ids, pos = self._parse_not(tokens, pos + 1)
+            return set(range(self.num_lines)) - line_ids, pos
+
+        if token == "(":
+            line_ids, pos = self._parse_or(tokens, pos + 1)
+            if pos >= len(tokens) or tokens[pos] != ")":
+                print("Could not parse the query. Unbalanced parentheses.")
+                raise ValueError
+            return line_ids, pos + 1
+
+        if token in ("AND", "OR", ")"):
+            print(f"Could not parse the query. Unexpected {token!r}.")
+            raise ValueError
+
+        if token.startswith('"'):
+            if len(token) < 2 or not token.endswith('"'):
+                print(f"Could not parse the query. Unterminated quote {token!r}.")
+                raise ValueError
+            return self._phrase_line_ids(token.strip('"')), pos + 1
+
+        return self._word_line_ids(token), pos + 1
+
+    def _hits(
+        self,
+        line_ids: Iterable[int],
+        characters: Optional[List[str]],
+        seasons: Optional[List[int]],
+    ) -> List[LineHit]:
+
+        line_ids = sorted(line_ids)
+
+        if characters is not None:
+            names = {name.lower() for name in characters}
+            character_ids = {
+                character_id for character_id, name in enumerate(self._character_names) if name.lower() in names
+            }
+            line_ids = [line_id for line_id in line_ids if self._line_character_ids[line_id] in character_ids]
+
+        if seasons is not None:
+            seasons = {int(season_num) for season_num in seasons}
+            line_ids = [
+                line_id for line_id in line_ids
+                if self._episode_season_nums[self._line_episode_ids[line_id]] in seasons
+            ]
+
+        return [
+            LineHit(
+                self._episode_keys[self._line_episode_ids[line_id]],
+                self._line_scene_nums[line_id],
+                self._line_nums[line_id],
+                self._character_names[self._line_character_ids[line_id]],
+                self._spoken_lines[line_id],
+            )
+            for line_id in line_ids
+        ]
@@ -0,0 +1,90 @@
+"""
+Functions to compute the sentiment of many lines at once.  The sentiment of a single
+:py:class:`~containers.line.Line` is computed lazily when it is first accessed; these functions instead score every line
+of a list of episodes in a single pass, optionally spreading the work across a pool of processes.
+
+Author: Jacob Seiler
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from containers.episode import Episode
+from containers.line import Line, calc_sentiment
+
+
+def _score_spoken_lines(spoken_lines: List[str]) -> List[Tuple[float, float]]:
+    """
+    Computes the ``(polarity, subjectivity)`` of each spoken line.  Lives at the module level so that it can be sent to
+    worker processes.
+    """
+    return [calc_sentiment(spoken_line) for spoken_line in spoken_lines]
+
+
+def score_lines(lines: List[Line], workers: Optional[int] = None, chunk_size: int = 2000) -> None:
+    """
+    Computes the sentiment for all the given lines that have not yet been scored.
+
+    Parameters
+    ----------
+    lines
+        The lines to score.
+
+    workers : optional
+        Number of processes used to compute the sentiment.  If ``None`` or ``1``, the lines are scored in this process.
+
+    chunk_size : optional
+        Number of lines that are sent to a worker process at a time.
+
+    Returns
+    -------
+    None.  The sentiment of each line is updated directly.
+    """
+
+    # Only bother with those lines we haven't done yet.
+    lines_to_score = [line for line in lines if not line.has_sentiment]
+    if len(lines_to_score) == 0:
+        return
+
+    spoken_lines = [line.spoken_line for line in lines_to_score]
+
+    if workers is None or workers == 1:
+        sentiments = _score_spoken_lines(spoken_lines)
+    else:
+        chunks = [spoken_lines[start:start+chunk_size] for start in range(0, len(spoken_lines), chunk_size)]
+
+        sentiments = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk_sentiments in executor.map(_score_spoken_lines, chunks):
+                sentiments.extend(chunk_sentiments)
+
+    for line, (polarity, subjectivity) in zip(lines_to_score, sentiments):
+        line.set_sentiment(polarity, subjectivity)
+
+
+def score_episodes(episodes: List[Episode], workers: Optional[int] = None, chunk_size: int = 2000) -> None:
+    """
+    Computes the sentiment for every line spoken in the given episodes.
+
+    Parameters
+    ----------
+    episodes
+        The episodes whose lines will be scored.
+
+    workers : optional
+        Number of processes used to compute the sentiment.  If ``None`` or ``1``, the lines are scored in this process.
+
+    chunk_size : optional
+        Number of lines that are sent to a worker process at a time.
+
+    Returns
+    -------
+    None.  The sentiment of each line is updated directly.
+    """
+
+    lines = []
+    for episode in episodes:
+        for scene in episode.scenes:
+            lines.extend(scene.lines)
+
+    score_lines(lines, workers=workers, chunk_size=chunk_size)
@@ -0,0 +1,31 @@
+"""
+This module contains the tokenizer shared by everything that works with the words of the spoken lines (e.g., searching
+the lines and counting the words spoken by each character).  Using a single tokenizer means a word found by one is
+counted the same way by the other.
+
+Author: Jacob Seiler
+"""
+
+import re
+from typing import List
+
+# A word is a run of letters or digits, optionally with an apostrophe in the middle (e.g., "don't", "king's").
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into lowercase words.  Punctuation is dropped and curly apostrophes are treated as straight ones.
+
+    Parameters
+    ----------
+    text
+        The text being tokenized, e.g., a spoken line.
+
+    Returns
+    -------
+    tokens
+        The words of ``text`` in the order they appear.
+    """
+
+    return TOKEN_RE.findall(text.lower().replace("’", "'"))
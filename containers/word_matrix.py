@@ -0,0 +1,265 @@
+"""
+This module contains the ``WordCountMatrix`` class.  The ``WordCountMatrix`` records how many times each character
+says each word as a sparse character x vocabulary matrix.  Every line is tokenized once (using
+:py:func:`~containers.text_utils.tokenize`) and the most common words, unique word counts, and word frequencies (e.g.,
+for word clouds) of each character are then read straight from the matrix.
+
+The unique words of each character can be copied onto :py:class:`~containers.character.Character` instances (i.e.,
+their :py:attr:`~containers.character.Character.unique_words` attribute) using
+:py:meth:`~WordCountMatrix.apply_to_characters`.
+
+Author: Jacob Seiler
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from containers.character import Character
+from containers.episode import Episode
+from containers.line import Line
+from containers.text_utils import tokenize
+
+
+class WordCountMatrix(object):
+    """
+    Handles the number of times each character says each word.
+    """
+
+    def __init__(
+        self,
+        episodes: List[Episode],
+        character_names: Optional[List[str]] = None,
+        stopwords: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Tokenizes every line and builds the count matrix.
+
+        Parameters
+        ----------
+
+        episodes : list of :py:class:`~containers.episode.Episode` instances
+            The episodes whose lines are being counted.
+
+        character_names : list of strings, optional
+            The characters that are assigned an id (i.e., a row of the matrix).  If not specified, uses every character
+            that speaks in ``episodes`` in order of their first line.  Lines of characters that aren't in this list are
+            ignored.
+
+        stopwords : iterable of strings, optional
+            Words that are not counted (e.g., ``wordcloud.STOPWORDS``).  Matched case-insensitively.
+        """
+
+        lines = (line for episode in episodes for scene in episode.scenes for line in scene.lines)
+        self._build(lines, character_names, stopwords)
+
+    @classmethod
+    def from_lines(
+        cls,
+        lines: Iterable[Line],
+        character_names: Optional[List[str]] = None,
+        stopwords: Optional[Iterable[str]] = None,
+    ) -> "WordCountMatrix":
+        """
+        Builds the matrix directly from lines, e.g., those streamed by :py:func:`~script_tools.parse_script.iter_lines`.
+        ``lines`` is consumed once and none of the lines are kept.
+
+        Parameters
+        ----------
+
+        lines : iterable of :py:class:`~containers.line.Line` instances
+            The lines being counted.
+
+        character_names, stopwords : optional
+            See :py:meth:`~__init__`.
+        """
+
+        word_counts = cls.__new__(cls)
+        word_counts._build(lines, character_names, stopwords)
+
+        return word_counts
+
+    def _build(
+        self,
+        lines: Iterable[Line],
+        character_names: Optional[List[str]],
+        stopwords: Optional[Iterable[str]],
+    ) -> None:
+
+        fixed_names = character_names is not None
+        if character_names is None:
+            character_names = []
+
+        self._character_names = list(character_names)
+        self._character_ids = {name: character_id for character_id, name in enumerate(self._character_names)}
+
+        self._stopwords = frozenset(word.lower() for word in stopwords) if stopwords is not None else frozenset()
+
+        self._vocabulary: List[str] = []
+        self._word_ids: Dict[str, int] = {}
+
+        # Build up the (character, word) coordinates of every word spoken. Duplicates are summed when the matrix is
+        # built.
+        character_ids = []
+        word_ids = []
+        for line in lines:
+
+            try:
+                character_id = self._character_ids[line.character_name]
+            except KeyError:
+                if fixed_names:
+                    continue
+                character_id = len(self._character_names)
+                self._character_ids[line.character_name] = character_id
+                self._character_names.append(line.character_name)
+
+            for word in tokenize(line.spoken_line):
+
+                if word in self._stopwords:
+                    continue
+
+                word_id = self._word_ids.get(word)
+                if word_id is None:
+                    word_id = len(self._vocabulary)
+                    self._word_ids[word] = word_id
+                    self._vocabulary.append(word)
+
+                character_ids.append(character_id)
+                word_ids.append(word_id)
+
+        shape = (len(self._character_names), len(self._vocabulary))
+        data = np.ones(len(word_ids), dtype=np.int32)
+        self._counts = sparse.csr_matrix((data, (character_ids, word_ids)), shape=shape, dtype=np.int32)
+        self._counts.sum_duplicates()
+
+    @property
+    def character_names(self):
+        """
+        list of strings : Name of each character. The index of each name is the id of that character.
+        """
+        return self._character_names
+
+    @property
+    def character_ids(self):
+        """
+        dict[string, int] : The id of each character. Key is the name of the character.
+        """
+        return self._character_ids
+
+    @property
+    def vocabulary(self):
+        """
+        list of strings : Every word that was counted. The index of each word is the id of that word.
+        """
+        return self._vocabulary
+
+    @property
+    def word_ids(self):
+        """
+        dict[string, int] : The id of each word. Key is the word.
+        """
+        return self._word_ids
+
+    @property
+    def stopwords(self):
+        """
+        frozenset of strings : The words that were not counted.
+        """
+        return self._stopwords
+
+    @property
+    def counts(self):
+        """
+        ``scipy.sparse.csr_matrix`` : Character x vocabulary matrix of the number of times each character says each
+        word.
+        """
+        return self._counts
+
+    @property
+    def num_words(self):
+        """
+        ``numpy.ndarray`` : Total number of words said by each character. Indexed by the id of the character.
+        """
+        return np.asarray(self._counts.sum(axis=1)).ravel()
+
+    @property
+    def num_unique_words(self):
+        """
+        ``numpy.ndarray`` : Number of different words said by each character. Indexed by the id of the character.
+        """
+        return np.diff(self._counts.indptr)
+
+    def word_frequencies(self, character_name: str) -> Dict[str, int]:
+        """
+        Number of times ``character_name`` says each word.  Key is the word.  Can be passed straight to
+        ``WordCloud.generate_from_frequencies``.
+        """
+
+        word_ids, counts = self._row(character_name)
+
+        return {self._vocabulary[word_id]: count for word_id, count in zip(word_ids.tolist(), counts.tolist())}
+
+    def unique_words(self, character_name: str) -> List[str]:
+        """
+        Every word said by ``character_name``, sorted alphabetically.
+        """
+
+        word_ids, _ = self._row(character_name)
+
+        return sorted(self._vocabulary[word_id] for word_id in word_ids.tolist())
+
+    def top_words(self, character_name: str, num_words: int = 10) -> List[Tuple[str, int]]:
+        """
+        The words said most often by ``character_name``.
+
+        Parameters
+        ----------
+        character_name
+            The character.
+
+        num_words : optional
+            Number of words returned.
+
+        Returns
+        -------
+        top_words
+            ``(word, count)`` pairs, most common first.  Ties are broken alphabetically.
+        """
+
+        word_ids, counts = self._row(character_name)
+        if len(word_ids) == 0:
+            return []
+
+        words = np.array([self._vocabulary[word_id] for word_id in word_ids.tolist()])
+
+        # Sort by descending count then by word. ``np.lexsort`` sorts by the last key first.
+        order = np.lexsort((words, -counts))[:num_words]
+
+        return [(str(words[idx]), int(counts[idx])) for idx in order]
+
+    def apply_to_characters(self, characters: Dict[str, Character]) -> None:
+        """
+        Sets the unique words of the given characters.
+
+        Parameters
+        ----------
+        characters : dict["Character_Name", :py:class:`~containers.character.Character` instance]
+            The characters being updated.  Characters that aren't in the matrix are skipped.
+
+        Returns
+        -------
+        None.  The value of :py:attr:`~containers.character.Character.unique_words` is updated directly.
+        """
+
+        for character_name, character in characters.items():
+            if character_name in self._character_ids:
+                character.unique_words = self.unique_words(character_name)
+
+    def _row(self, character_name: str) -> Tuple[np.ndarray, np.ndarray]:
+
+        character_id = self._character_ids[character_name]
+
+        start, end = self._counts.indptr[character_id:character_id+2]
+
+        return self._counts.indices[start:end], self._counts.data[start:end]
@@ -0,0 +1,239 @@
+"""
+This module contains the ``Instrumentation`` class.  The ``Instrumentation`` class times each stage of a run (e.g.,
+parsing, building interactions, plotting), keeps counters (e.g., the number of lines parsed), and writes a report of
+both at the end of the run.  Each stage can optionally be profiled with ``cProfile``.
+
+Stages are timed with either a context manager or a decorator:
+
+.. code::
+
+    instrumentation = Instrumentation()
+
+    with instrumentation.stage("parse"):
+        episodes = parse_all_eps(season_nums, episode_nums)
+
+    @instrumentation.timed("plot")
+    def plot():
+        ...
+
+    instrumentation.write_report("report.json")
+
+Author: Jacob Seiler
+"""
+
+import cProfile
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from containers.episode import Episode
+
+
+class Instrumentation(object):
+    """
+    Handles the timers and counters of a run.
+    """
+
+    def __init__(self, profile_dir: Optional[str] = None) -> None:
+        """
+        Parameters
+        ----------
+
+        profile_dir : string, optional
+            If specified, every stage is profiled with ``cProfile`` and the stats are saved to
+            ``{profile_dir}/{stage_name}.prof``.  View them with ``python -m pstats`` or ``snakeviz``.
+        """
+
+        self._profile_dir = profile_dir
+        self._stage_times: Dict[str, float] = {}
+        self._stage_calls: Dict[str, int] = {}
+        self._counters: Dict[str, int] = {}
+        self._start_time = time.perf_counter()
+
+    @property
+    def profile_dir(self):
+        """
+        string : Directory where the ``cProfile`` stats of each stage are saved.  ``None`` if stages aren't profiled.
+        """
+        return self._profile_dir
+
+    @property
+    def stage_times(self):
+        """
+        dict[string, float] : Total number of seconds spent in each stage. Key is the name of the stage.
+        """
+        return self._stage_times
+
+    @property
+    def stage_calls(self):
+        """
+        dict[string, int] : Number of times each stage was run. Key is the name of the stage.
+        """
+        return self._stage_calls
+
+    @property
+    def counters(self):
+        """
+        dict[string, int] : Value of each counter. Key is the name of the counter.
+        """
+        return self._counters
+
+    @contextmanager
+    def stage(self, stage_name: str) -> Iterator[None]:
+        """
+        Context manager that times (and optionally profiles) the code inside it as ``stage_name``.  Running the same
+        stage multiple times accumulates the time.
+        """
+
+        profiler = None
+        if self._profile_dir is not None:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start_time
+
+            if profiler is not None:
+                profiler.disable()
+                self._dump_profile(stage_name, profiler)
+
+            self._stage_times[stage_name] = self._stage_times.get(stage_name, 0.0) + elapsed
+            self._stage_calls[stage_name] = self._stage_calls.get(stage_name, 0) + 1
+
+    def timed(self, stage_name: Optional[str] = None) -> Callable:
+        """
+        Decorator that times every call of the decorated function as a stage.  If ``stage_name`` is not specified, uses
+        the name of the function.
+        """
+
+        def decorator(func: Callable) -> Callable:
+
+            name = stage_name if stage_name is not None else func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def count(self, counter_name: str, value: int = 1) -> None:
+        """
+        Increments the counter ``counter_name`` by ``value``.
+        """
+        self._counters[counter_name] = self._counters.get(counter_name, 0) + value
+
+    def count_episodes(self, episodes: List[Episode]) -> None:
+        """
+        Adds the number of episodes, lines, and scenes in ``episodes`` to the ``episodes_parsed``, ``lines_parsed``, and
+        ``scenes_detected`` counters.  Also adds the number of different character names the parser found (e.g., a
+        change to how names are split out of the scripts shows up here) to the ``characters_parsed`` counter.
+        """
+
+        num_lines = 0
+        num_scenes = 0
+        character_names = set()
+        for episode in episodes:
+            num_lines += sum(len(lines) for lines in episode.character_lines.values())
+            num_scenes += len(episode.scenes)
+            character_names.update(episode.character_lines.keys())
+
+        self.count("episodes_parsed", len(episodes))
+        self.count("lines_parsed", num_lines)
+        self.count("scenes_detected", num_scenes)
+        self.count("characters_parsed", len(character_names))
+
+    def report(self) -> Dict[str, object]:
+        """
+        The time spent in each stage and the value of each counter.
+
+        Returns
+        -------
+        report : dict
+            Has keys ``"total_s"`` (seconds since this instance was created), ``"stages"`` (dict of stage name to
+            ``{"time_s", "calls"}``), and ``"counters"``.
+        """
+
+        stages = {
+            stage_name: {"time_s": stage_time, "calls": self._stage_calls[stage_name]}
+            for stage_name, stage_time in self._stage_times.items()
+        }
+
+        return {
+            "total_s": time.perf_counter() - self._start_time,
+            "stages": stages,
+            "counters": dict(self._counters),
+        }
+
+    def format_report(self) -> str:
+        """
+        The report as human readable text.
+        """
+
+        report = self.report()
+
+        lines = [f"{'Stage':<32}{'Calls':>8}{'Time (s)':>12}"]
+        for stage_name, stage in report["stages"].items():
+            lines.append(f"{stage_name:<32}{stage['calls']:>8}{stage['time_s']:>12.3f}")
+        lines.append(f"{'Total':<32}{'':>8}{report['total_s']:>12.3f}")
+
+        if len(report["counters"]) > 0:
+            lines.append("")
+            lines.append(f"{'Counter':<32}{'Value':>20}")
+            for counter_name, value in report["counters"].items():
+                lines.append(f"{counter_name:<32}{value:>20}")
+
+        return "\n".join(lines)
+
+    def write_report(self, fname: Optional[str] = None, report_format: str = "json") -> None:
+        """
+        Writes the report.
+
+        Parameters
+        ----------
+
+        fname : string, optional
+            File the report is written to.  If not specified, the report is printed.
+
+        report_format : {"json", "text"}
+            Format of the report.
+        """
+
+        allowed_formats = ["json", "text"]
+        if report_format not in allowed_formats:
+            print(f"Selected report_format is {report_format}. The only allowed formats are {allowed_formats}")
+            raise ValueError
+
+        if report_format == "json":
+            text = json.dumps(self.report(), indent=2)
+        else:
+            text = self.format_report()
+
+        if fname is None:
+            print(text)
+            return
+
+        with open(fname, "w") as f:
+            f.write(text)
+            f.write("\n")
+        print(f"Saved report to {fname}")
+
+    def _dump_profile(self, stage_name: str, profiler: cProfile.Profile) -> None:
+
+        if not os.path.exists(self._profile_dir):
+            os.makedirs(self._profile_dir)
+
+        # Stages that run multiple times get a file per run.
+        calls = self._stage_calls.get(stage_name, 0)
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in stage_name)
+        suffix = f"_{calls}" if calls > 0 else ""
+
+        profiler.dump_stats(f"{self._profile_dir}/{safe_name}{suffix}.prof")
@@ -1,23 +1,36 @@
+import argparse
 import math
 import os
-from typing import Dict, List, Optional
-
-import matplotlib
-import matplotlib.patheffects as PathEffects
-import networkx as nx
-import numpy as np
-from matplotlib import pyplot as plt
-from tqdm import tqdm
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple
 
 import containers.character_utils as c_utils
 import containers.episode_utils as e_utils
+from instrumentation import Instrumentation
 from containers.character import Character
 from containers.episode import Episode
 from script_tools.parse_script import parse_all_eps
-from wordcloud import STOPWORDS, WordCloud
+
+# The plotting backends (matplotlib, networkx, wordcloud) and NumPy take far longer to import than it takes to parse
+# the scripts. They are imported by the functions that use them so that importing this module stays cheap.
+if TYPE_CHECKING:
+    import networkx as nx
+    import numpy as np
 
 colors = ["r", "b", "g", "c", "m"]
 
+# Characters that aren't safe in a file name. Character names can contain these, e.g., ``JON/ROBB``.
+UNSAFE_FNAME_CHARS_RE = re.compile(r"[^\w .'-]")
+
+
+def safe_fname(name: str) -> str:
+    """
+    Replaces every character of ``name`` that isn't safe in a file name (path separators, wildcards, etc) with ``_``.
+    """
+    return UNSAFE_FNAME_CHARS_RE.sub("_", name)
+
 
 def adjust_legend(ax, location="upper right", scatter_plot=False):
     """
@@ -40,6 +53,8 @@ def adjust_legend(ax, location="upper right", scatter_plot=False):
     None. The legend is placed directly onto the axis.
     """
 
+    from matplotlib.collections import PathCollection
+
     legend = ax.legend(loc=location)
     handles = legend.legendHandles
 
@@ -53,7 +68,7 @@ def adjust_legend(ax, location="upper right", scatter_plot=False):
     if scatter_plot:
         for handle in handles:
             # We may have lines in the legend which we don't want to touch here.
-            if isinstance(handle, matplotlib.collections.PathCollection):
+            if isinstance(handle, PathCollection):
                 handle.set_alpha(1.0)
                 handle.set_sizes([10.0])
 
@@ -97,6 +112,9 @@ def plot_line_count_hist(
     require is to be a cumulative plot.
     """
 
+    import numpy as np
+    from matplotlib import pyplot as plt
+
     if characters_to_plot is None:
         characters_to_plot = characters.keys()
 
@@ -112,49 +130,30 @@ def plot_line_count_hist(
     ax = fig.add_subplot(111)
 
     bar_width = 1.0/len(characters_to_plot)
-    max_lines = 0
-    xticklabels = ["DUMMY"]  # For some reason, the 0th label doesn't appear...
 
-    for character_num, character_name in enumerate(characters_to_plot):
+    # Count every line up front so each character is a single bar call rather than one per episode.
+    line_counts = c_utils.determine_line_count_matrix(episodes, list(characters_to_plot))
+    max_lines = int(line_counts.max()) if line_counts.size > 0 else 0
 
-        # Allows for easier indexing later.
-        character_lines = characters[character_name].episode_lines
+    ep_counts = np.arange(1, len(episodes) + 1)
 
-        for ep_count, episode in enumerate(episodes, start=1):
+    for character_num, character_name in enumerate(characters_to_plot):
 
-            key = episode.key
+        # Position on the x-axis is shifted depending on how many characters we
+        # have.
+        x_pos = ep_counts + bar_width*character_num
 
-            # Don't spam the legend; only add a label if it's the first iteration.
-            if ep_count == 1:
-                label = character_name
-            else:
-                label = ""
-
-            # Maybe the character didn't appear in this episode.
-            try:
-                lines_in_ep = len(character_lines[key])
-            except KeyError:
-                lines_in_ep = 0
-
-            # Remember the maximum number of lines.
-            if lines_in_ep > max_lines:
-                max_lines = lines_in_ep
-
-            # Position on the x-axis is shifted depending on how many characters we
-            # have.
-            x_pos = ep_count + bar_width*character_num
-
-            ax.bar(
-                x_pos,
-                lines_in_ep,
-                width=bar_width,
-                label=label,
-                color=colors[character_num]
-            )
+        ax.bar(
+            x_pos,
+            line_counts[character_num],
+            width=bar_width,
+            label=character_name,
+            color=colors[character_num]
+        )
 
-            # Remember the episode numbers so we can add to the x-axis later.
-            if character_num == 0:
-                xticklabels.append(episode.episode_num)
+    # Remember the episode numbers so we can add to the x-axis later.
+    xticklabels = ["DUMMY"]  # For some reason, the 0th label doesn't appear...
+    xticklabels.extend(episode.episode_num for episode in episodes)
 
     # The histogram has been made. Now let's go through and add some text to prettify.
     season_labels, num_eps_season = e_utils.determine_num_episodes_season(episodes)
@@ -206,45 +205,98 @@ def plot_line_count_hist(
     plt.close()
 
 
-def plot_wordcloud_character(episodes, plot_output_path, plot_output_format="png"):
+def plot_wordcloud_character(
+    episodes: List[Episode],
+    plot_output_path: str,
+    plot_output_format: str = "png",
+    characters_to_plot: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+) -> None:
+    """
+    Plots a wordcloud of the words said by each character.
+
+    Parameters
+    ----------
+
+    episodes : list of :py:class:`~containers.episode.Episode` instances
+        The episodes whose lines are used.
+
+    plot_output_path : string
+        Directory where the plots are saved.  Each plot is saved as ``wordcloud_{character_name}.{plot_output_format}``
+        where any character of the name that isn't safe in a file name (e.g., the ``/`` in ``JON/ROBB``) is replaced
+        with ``_``.
+
+    plot_output_format : string, optional
+        The format of the saved plots.
+
+    characters_to_plot : list of strings, optional
+        The characters that will be plotted.  If not specified, plots every character that speaks.
+
+    workers : int, optional
+        Number of processes used to render the wordclouds.  If not specified, uses one process per CPU.  If ``1``, the
+        wordclouds are rendered in this process.
+
+    Returns
+    -------
+
+    None. The figures are saved to ``plot_output_path``.
+    """
+
+    from wordcloud import STOPWORDS
+
+    from containers.word_matrix import WordCountMatrix
 
     stopwords = set(STOPWORDS)
     additional_stopwords = ["will"]
     for word in additional_stopwords:
         stopwords.add(word)
 
-    characters = ["Tyrion", "Jon", "Robert"]
-    for character_num, character in enumerate(characters):
+    # Count the words of every character in one pass. The wordclouds are drawn straight from these counts rather than
+    # having WordCloud split and count the text of each character again.
+    word_counts = WordCountMatrix(episodes, character_names=characters_to_plot, stopwords=stopwords)
 
-        all_words = []
-        fig = plt.figure()
-        ax = fig.add_subplot(111)
+    jobs = []
+    for character_name in word_counts.character_names:
 
-        for episode in episodes:
+        frequencies = word_counts.word_frequencies(character_name)
 
-            # Maybe the character didn't appear in this episode.
-            try:
-                character_lines = episode.character_lines[character]
-            except KeyError:
-                continue
+        # Maybe the character never spoke in these episodes.
+        if len(frequencies) == 0:
+            print(f"{character_name} does not say any words. Skipping their wordcloud.")
+            continue
 
-            # Because `character_lines` is a list, we don't want to keep any nested
-            # structure.
-            all_words.extend(character_lines)
+        output_file = f"{plot_output_path}/wordcloud_{safe_fname(character_name)}.{plot_output_format}"
+        jobs.append((frequencies, output_file))
 
-        # Join all the words into a single string.
-        all_words = " ".join(all_words)
+    if workers == 1 or len(jobs) <= 1:
+        for frequencies, output_file in jobs:
+            _render_wordcloud(frequencies, output_file)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_render_wordcloud, *zip(*jobs)))
 
+    for _, output_file in jobs:
+        print(f"Saved file to {output_file}")
 
-        wordcloud = WordCloud(stopwords=stopwords).generate(all_words)
 
-        ax.imshow(wordcloud, interpolation='bilinear')
-        ax.axis("off")
+def _render_wordcloud(frequencies: Dict[str, int], output_file: str) -> None:
+    """
+    Draws and saves a single wordcloud.  Used by :py:func:`~plot_wordcloud_character`, possibly in a worker process.
+    """
 
-        output_file = f"{plot_output_path}/wordcloud_{character}.{plot_output_format}"
-        fig.savefig(output_file)
-        print(f"Saved file to {output_file}")
-        plt.close()
+    from matplotlib import pyplot as plt
+    from wordcloud import WordCloud
+
+    wordcloud = WordCloud().generate_from_frequencies(frequencies)
+
+    fig = plt.figure()
+    ax = fig.add_subplot(111)
+
+    ax.imshow(wordcloud, interpolation='bilinear')
+    ax.axis("off")
+
+    fig.savefig(output_file)
+    plt.close(fig)
 
 
 def plot_scene_network_graph(
@@ -253,8 +305,8 @@ def plot_scene_network_graph(
     output_fname: str,
     characters_to_plot: List[str] = None,
     plot_method: str = "networkx",
-    pos: Optional[Dict[str, np.array]] = None,
-) -> Dict[str, np.array]:
+    pos: Optional[Dict[str, "np.array"]] = None,
+) -> Dict[str, "np.array"]:
     """
     Plots a graph showing how characters interact with each other.
 
@@ -279,8 +331,8 @@ def plot_scene_network_graph(
         ("bokeh").  The "bokeh" option has not been developed in a long time.
 
     pos : dict with keys of character name and values of an array of ``[x,y]`` coordinate pairs
-        The coordinates of each character node.  If not specified, then the positions will be generated using
-        ``networkx.spring_layout``.
+        The coordinates of each character node.  If not specified, then the positions will be generated (or fetched
+        from the cache) using :py:func:`~network_layout.spring_layout`.
 
     Returns
     -------
@@ -289,6 +341,10 @@ def plot_scene_network_graph(
         The coordinates of each character node.
     """
 
+    import numpy as np
+
+    import network_layout
+
     allowed_plot_methods = ["networkx", "bokeh"]
     if plot_method not in allowed_plot_methods:
         print(f"Selected plot_method for the scene network graph is {plot_method}. "
@@ -308,14 +364,115 @@ def plot_scene_network_graph(
     if characters_to_plot is None:
         characters_to_plot = characters.keys()
 
-    G = nx.Graph()
-
     # When we calculate weights or sizes, we want to normalize by the total number of
     # scenes across all episodes.
     tot_num_scenes = 0
     for episode in episodes:
         tot_num_scenes += episode.num_scenes
 
+    G, node_size = build_scene_network_graph(characters, characters_to_plot, len(episodes), tot_num_scenes)
+
+    # If we're plotting using solely networkx, it uses an MPL axis.
+    if plot_method == "networkx":
+
+        # We first now draw all the nodes (i.e., characters) and their labels.
+        if not pos:
+            pos = network_layout.spring_layout(G)
+
+        # If character has died by the last episode we're plotting, then display their node in different color.
+        node_colors = [
+            "#fdae6b" if characters[character_name].episode_death in episode_keys else "#3182bd"
+            for character_name in G.nodes()
+        ]
+
+        plot_scene_network_frame(G, pos, node_size, node_colors, episode_keys[-1], output_fname)
+
+    # Otherwise, need to get fancy.
+    elif plot_method == "bokeh":
+
+        plot = Plot(plot_width=400, plot_height=400, x_range=Range1d(-2.1,2.1),
+                    y_range=Range1d(-2.1,2.1))
+
+        # For the Bokeh plot, we want to add extra attributes to each node that we will show on Hover/etc.
+        for (node1, node2) in G.edges():
+            G.nodes[node1]["name"] = node1
+            G.nodes[node2]["name"] = node2
+
+        # Convert the networkx Graph to a bokeh renderer. Reuse the (cached) layout rather than computing another.
+        if not pos:
+            pos = network_layout.spring_layout(G)
+        bokeh_pos = {character_name: 2 * np.asarray(xy) for character_name, xy in pos.items()}
+        graph_renderer = from_networkx(G, bokeh_pos)
+
+        # Add a hover tool to show the character name.
+        node_hover_tool = HoverTool(tooltips=[("Character", "@name")])
+        plot.add_tools(node_hover_tool, PanTool(), TapTool(), BoxZoomTool(), ResetTool())
+
+        # Draw the nodes as circles.
+        graph_renderer.node_renderer.glyph = Circle(size=15, fill_color=Spectral4[0])
+        graph_renderer.node_renderer.selection_glyph = Circle(size=15, fill_color=Spectral4[2])
+
+        # First draw the edges in grey.
+        graph_renderer.edge_renderer.glyph = MultiLine(line_color="#CCCCCC",
+                                                       line_alpha=0.8, line_width="weight")
+
+        # Then on selected, show the edges weighted by the previously defined values based on
+        # the relative scene appearances.
+        graph_renderer.edge_renderer.selection_glyph = MultiLine(line_color=Spectral4[2],
+                                                       line_alpha=0.8, line_width="weight")
+
+        graph_renderer.selection_policy = EdgesAndLinkedNodes()
+
+        plot.renderers.append(graph_renderer)
+
+        output_file(output_fname)
+        save(plot)
+
+        print(f"Saved file to {output_fname}")
+
+    return pos
+
+
+def build_scene_network_graph(
+    characters: Dict[str, Character],
+    characters_to_plot: List[str],
+    num_episodes: int,
+    tot_num_scenes: int,
+) -> Tuple["nx.Graph", Dict[str, float]]:
+    """
+    Builds the graph of how characters interact with each other.  Each node is a character and each edge is weighted by
+    the fraction of scenes the two characters share.
+
+    Parameters
+    ----------
+
+    characters : dict with keys of character name and values of :py:class:`~containers.Character:` instances
+        Characters where the :py:attr:`~Character.scene_appearance_dict` attribute has been updated.
+
+    characters_to_plot : list of strings
+        The names of characters to include in the graph.
+
+    num_episodes : int
+        The number of episodes the interactions were computed over.
+
+    tot_num_scenes : int
+        The total number of scenes across those episodes.  Weights and sizes are normalized by this.
+
+    Returns
+    -------
+
+    G : ``networkx.Graph``
+        The graph. Each edge has a ``"weight"`` attribute.
+
+    node_size : dict with keys of character name and values of float
+        The size of each node.
+    """
+
+    import networkx as nx
+    import numpy as np
+
+    G = nx.Graph()
+
     # Now for each character, the weight of the edges will be scaled by the number of
     # times they appear with the other character.
     node_size = {}
@@ -323,7 +480,7 @@ def plot_scene_network_graph(
 
         G.add_node(character_name)
         node_size[character_name] = (characters[character_name].num_scenes / \
-                                        tot_num_scenes*10000 * np.sqrt(len(episodes)))
+                                        tot_num_scenes*10000 * np.sqrt(num_episodes))
 
         if characters[character_name].num_scenes > 0:
             node_size[character_name] += 1000
@@ -342,145 +499,384 @@ def plot_scene_network_graph(
             num_scenes_A = characters[character_name].num_scenes
             num_scenes_B = characters[other_character_name].num_scenes
 
-            frac_scenes_A = characters[character_name].num_scenes / tot_num_scenes
-            frac_scenes_B = characters[other_character_name].num_scenes / tot_num_scenes
-
             if num_scenes_A == 0 or num_scenes_B == 0:
                 continue
 
             weight = A_in_B / (num_scenes_A * num_scenes_B) / tot_num_scenes
 
-            weight *= 250 * math.pow(len(episodes), 1.9)
+            weight *= 250 * math.pow(num_episodes, 1.9)
 
             if weight > 10:
                 weight = 10
 
-            # print(f"{character_name} -> {other_character_name}: {weight}")
-            # print(f"{character_name} -> {other_character_name}: {weight/tot_num_scenes}")
-
             G.add_edge(character_name, other_character_name,
                        weight=weight)
 
-    # If we're plotting using solely networkx, it uses an MPL axis.
-    if plot_method == "networkx":
-        fig = plt.figure(figsize=(20,20))
-        ax = fig.add_subplot(111)
+    return G, node_size
 
-        # We first now draw all the nodes (i.e., characters) and their labels.
-        if not pos:
-            pos = nx.spring_layout(G)
 
-        # We need to ensure that all the nodes have the correct sizes. Use the ordering of
-        # the nodes that's used to plot.
-        node_size_list = []
-        for character_name in G.nodes():
-            node_size_list.append(node_size[character_name])
+def plot_scene_network_frame(
+    G: "nx.Graph",
+    pos: Dict[str, "np.array"],
+    node_size: Dict[str, float],
+    node_colors: List[str],
+    episode_key: str,
+    output_fname: str,
+) -> None:
+    """
+    Renders a graph built by :py:func:`~build_scene_network_graph` using networkx and saves it.
 
-        # If character has died by the last episode we're plotting, then display their node in different color.
-        node_colors = [
-            "#fdae6b" if characters[character_name].episode_death in episode_keys else "#3182bd"
-            for character_name in G.nodes()
-        ]
+    Parameters
+    ----------
 
-        nx.draw_networkx_nodes(G, pos, node_color=node_colors, node_size=node_size_list, ax=ax)
+    G : ``networkx.Graph``
+        The graph being plotted.
 
-        # For each character, we want the size of their label to be relative to the size of
-        # their node.
-        label_size_list = []
+    pos : dict with keys of character name and values of an array of ``[x,y]`` coordinate pairs
+        The coordinates of each character node.
 
-        print(node_size_list)
-        valid_nodes = np.where(np.array(node_size_list) > 0)[0]
-        print(valid_nodes)
-        min_node_size = min(np.array(node_size_list)[valid_nodes]) + 100
-        max_node_size = max(node_size_list) + 100
+    node_size : dict with keys of character name and values of float
+        The size of each node.
 
-        label_size_bins = np.logspace(np.log10(min_node_size), np.log10(max_node_size), num=7)
-        label_size_binned = np.digitize(node_size_list, label_size_bins)
+    node_colors : list of strings
+        The color of each node, in the order of ``G.nodes()``.
 
-        for char_num, character_name in enumerate(G.nodes()):
-            labels = {}
-            labels[character_name] = character_name
+    episode_key : string
+        The key of the final episode plotted.  Printed in the corner of the plot.
 
-            # Only print labels for non-zero sized nodes.
-            if node_size_list[char_num] > 0:
-                bbox_dict = dict(fc="grey", alpha=0.75)
-                nx.draw_networkx_labels(G, pos, labels, font_size=12 + label_size_binned[char_num],
-                                        font_color="white", ax=ax, bbox=bbox_dict)
+    output_fname : string
+        The name of the file being saved.
+    """
 
-    # Otherwise, need a specific Bokeh axis.
-    elif plot_method == "bokeh":
-        plot = Plot(plot_width=400, plot_height=400, x_range=Range1d(-2.1,2.1),
-                    y_range=Range1d(-2.1,2.1))
+    import networkx as nx
+    import numpy as np
+    from matplotlib import pyplot as plt
 
-    # We now want to go through each edge, and build an edge attributes dictionary and a
-    # list of unique weights.  Furthermore, for the Bokeh plot, we want to add extra
-    # attributes to each node that we will show on Hover/etc
-    edge_attrs = {}
-    all_weights = []
-    for (node1, node2, data) in G.edges(data=True):
-        edge_attrs[(node1, node2)] = data["weight"]
-        all_weights.append(data["weight"])
+    fig = plt.figure(figsize=(20,20))
+    ax = fig.add_subplot(111)
 
-        if plot_method == "bokeh":
-            G.nodes[node1]["name"] = node1
-            G.nodes[node2]["name"] = node2
+    # We need to ensure that all the nodes have the correct sizes. Use the ordering of
+    # the nodes that's used to plot.
+    node_size_list = []
+    for character_name in G.nodes():
+        node_size_list.append(node_size[character_name])
 
-    # Explicitly set these weights (needed for Bokeh referencing later).
-    nx.set_edge_attributes(G, edge_attrs, "weight")
-    unique_weights = list(set(all_weights))
+    nx.draw_networkx_nodes(G, pos, node_color=node_colors, node_size=node_size_list, ax=ax)
 
-    # If we're only plotting with networkx, go through and manually plot.
-    if plot_method == "networkx":
-        for weight in unique_weights:
+    # For each character, we want the size of their label to be relative to the size of
+    # their node.
+    label_font_sizes = _label_font_sizes(node_size_list)
+
+    for char_num, character_name in enumerate(G.nodes()):
+        labels = {}
+        labels[character_name] = character_name
+
+        # Only print labels for non-zero sized nodes.
+        if label_font_sizes[char_num] is not None:
+            bbox_dict = dict(fc="grey", alpha=0.75)
+            nx.draw_networkx_labels(G, pos, labels, font_size=label_font_sizes[char_num],
+                                    font_color="white", ax=ax, bbox=bbox_dict)
+
+    # Draw every edge in a single collection, with the width of each edge given by its weight.
+    edgelist = []
+    widths = []
+    for (node1, node2, weight) in G.edges(data="weight"):
+        edgelist.append((node1, node2))
+        widths.append(weight)
 
-            weighted_edges = [(node1,node2) for (node1,node2,edge_attr) in G.edges(data=True) \
-                                if edge_attr['weight']==weight]
+    if len(edgelist) > 0:
+        nx.draw_networkx_edges(G, pos, edgelist=edgelist, width=widths, edge_color="#D3D3D3", ax=ax)
+
+    fig.tight_layout()
+
+    ax.set_facecolor('k')
+    ax.text(0.7, 0.9, f"{episode_key}", color="w", size=75, transform=ax.transAxes)
+    fig.savefig(output_fname)
+    print(f"Saved to {output_fname}")
+    plt.close(fig)
 
-            width = weight
-            nx.draw_networkx_edges(G, pos, edgelist=weighted_edges, width=width,
-                                   edge_color="#D3D3D3", ax=ax)
 
-        fig.tight_layout()
+def _label_font_sizes(node_size_list: List[float]) -> List[Optional[int]]:
+    """
+    Font size of the label of each node, binned logarithmically by the size of the node.  Nodes with zero size don't
+    get a label (``None``).
+    """
 
-        ax.set_facecolor('k')
-        ax.text(0.7, 0.9, f"{episode_keys[-1]}", color="w", size=75, transform=ax.transAxes)
-        fig.savefig(output_fname)
+    import numpy as np
+
+    # In the earliest episodes, none of the plotted characters may have spoken yet.
+    valid_nodes = np.where(np.array(node_size_list) > 0)[0]
+    if len(valid_nodes) == 0:
+        return [None] * len(node_size_list)
+
+    min_node_size = min(np.array(node_size_list)[valid_nodes]) + 100
+    max_node_size = max(node_size_list) + 100
+
+    label_size_bins = np.logspace(np.log10(min_node_size), np.log10(max_node_size), num=7)
+    label_size_binned = np.digitize(node_size_list, label_size_bins)
+
+    return [
+        12 + int(label_size_binned[char_num]) if node_size_list[char_num] > 0 else None
+        for char_num in range(len(node_size_list))
+    ]
+
+
+class NetworkFrameTemplate(object):
+    """
+    A reusable matplotlib figure for rendering many frames of the same network graph.  The node positions never change
+    between frames, so the figure, the node collection, the edge collection, the label artists, and the episode text
+    are built once.  Each frame then only updates the node sizes and colors, the edges and their widths, the labels,
+    and the episode text before saving.
+    """
+
+    def __init__(self, character_names: List[str], pos: Dict[str, "np.array"]) -> None:
+        """
+        Builds the figure and all of the artists.
+
+        Parameters
+        ----------
+
+        character_names : list of strings
+            Every character that will be plotted in any frame.
+
+        pos : dict with keys of character name and values of an array of ``[x,y]`` coordinate pairs
+            The coordinates of each character node.
+        """
+
+        import numpy as np
+        from matplotlib import pyplot as plt
+        from matplotlib.collections import LineCollection
+
+        self._character_names = list(character_names)
+        self._character_ids = {name: character_id for character_id, name in enumerate(self._character_names)}
+        self._pos = pos
+
+        self._fig = plt.figure(figsize=(20,20))
+        self._ax = self._fig.add_subplot(111)
+
+        xy = np.array([pos[character_name] for character_name in self._character_names]).reshape(-1, 2)
+
+        # Match the look (and stacking order) of the ``networkx.draw_networkx_*`` functions.
+        self._edges = LineCollection([], colors="#D3D3D3", zorder=1)
+        self._ax.add_collection(self._edges, autolim=False)
+
+        self._nodes = self._ax.scatter(
+            xy[:, 0], xy[:, 1], s=np.zeros(len(xy)), c="#3182bd", edgecolors="face", zorder=2
+        )
+
+        bbox_dict = dict(fc="grey", alpha=0.75)
+        self._labels = [
+            self._ax.text(
+                x, y, character_name, color="white", fontsize=12, horizontalalignment="center",
+                verticalalignment="center", bbox=bbox_dict, clip_on=True, visible=False, zorder=3
+            )
+            for character_name, (x, y) in zip(self._character_names, xy)
+        ]
+
+        self._ax.tick_params(axis="both", which="both", bottom=False, left=False, labelbottom=False, labelleft=False)
+
+        self._fig.tight_layout()
+
+        self._ax.set_facecolor('k')
+        self._episode_text = self._ax.text(0.7, 0.9, "", color="w", size=75, transform=self._ax.transAxes)
+
+    @property
+    def character_names(self):
+        """
+        list of strings : Name of each character that can be plotted.
+        """
+        return self._character_names
+
+    def render(
+        self,
+        G: "nx.Graph",
+        node_size: Dict[str, float],
+        node_colors: List[str],
+        episode_key: str,
+        output_fname: str,
+    ) -> None:
+        """
+        Renders a graph built by :py:func:`~build_scene_network_graph` and saves it.  Takes the same arguments as
+        :py:func:`~plot_scene_network_frame` except for the node positions, which are fixed by the template.  Every node
+        of ``G`` must be in :py:attr:`~character_names`.  Characters that aren't in ``G`` are hidden.
+        """
+
+        import networkx as nx
+        import numpy as np
+
+        sizes = np.zeros(len(self._character_names))
+        colors = ["#3182bd"] * len(self._character_names)
+        for character_name, color in zip(G.nodes(), node_colors):
+            character_id = self._character_ids[character_name]
+            sizes[character_id] = node_size[character_name]
+            colors[character_id] = color
+
+        self._nodes.set_sizes(sizes)
+        self._nodes.set_facecolor(colors)
+
+        for label, font_size in zip(self._labels, _label_font_sizes(sizes.tolist())):
+            if font_size is None:
+                label.set_visible(False)
+            else:
+                label.set_fontsize(font_size)
+                label.set_visible(True)
+
+        segments = []
+        widths = []
+        for (node1, node2, weight) in G.edges(data="weight"):
+            segments.append((self._pos[node1], self._pos[node2]))
+            widths.append(weight)
+
+        self._edges.set_segments(segments)
+        self._edges.set_linewidths(widths)
+
+        self._episode_text.set_text(f"{episode_key}")
+
+        self._fig.savefig(output_fname)
         print(f"Saved to {output_fname}")
-        plt.close()
 
-    # Otherwise, need to get fancy.
-    elif plot_method == "bokeh":
+    def close(self) -> None:
+        """
+        Closes the figure.
+        """
 
-        # Convert the networkx Graph to a bokeh renderer.
-        graph_renderer = from_networkx(G, nx.spring_layout, scale=2, center=(0,0))
+        from matplotlib import pyplot as plt
 
-        # Add a hover tool to show the character name.
-        node_hover_tool = HoverTool(tooltips=[("Character", "@name")])
-        plot.add_tools(node_hover_tool, PanTool(), TapTool(), BoxZoomTool(), ResetTool())
+        plt.close(self._fig)
 
-        # Draw the nodes as circles.
-        graph_renderer.node_renderer.glyph = Circle(size=15, fill_color=Spectral4[0])
-        graph_renderer.node_renderer.selection_glyph = Circle(size=15, fill_color=Spectral4[2])
 
-        # First draw the edges in grey.
-        graph_renderer.edge_renderer.glyph = MultiLine(line_color="#CCCCCC",
-                                                       line_alpha=0.8, line_width="weight")
+class NetworkFrame(NamedTuple):
+    """
+    Everything needed to render a single frame of the cumulative network graph animation.  Only holds the
+    (lightweight) characters rather than the episodes so that frames are cheap to send to other processes.
+    """
 
-        # Then on selected, show the edges weighted by the previously defined values based on
-        # the relative scene appearances.
-        graph_renderer.edge_renderer.selection_glyph = MultiLine(line_color=Spectral4[2],
-                                                       line_alpha=0.8, line_width="weight")
+    characters: Dict[str, Character]
+    episode_keys: List[str]
+    tot_num_scenes: int
+    num_episodes: int
+    output_fname: str
 
-        graph_renderer.selection_policy = EdgesAndLinkedNodes()
 
-        plot.renderers.append(graph_renderer)
+def render_scene_network_frame(
+    frame: NetworkFrame,
+    pos: Dict[str, "np.array"],
+    template: Optional[NetworkFrameTemplate] = None,
+) -> float:
+    """
+    Builds and renders the graph for a single frame using the fixed node positions ``pos``.  If ``template`` is
+    specified, the frame is drawn by updating its artists rather than building a new figure.
 
-        output_file(output_fname)
-        save(plot)
+    Returns
+    -------
 
-        print(f"Saved file to {output_fname}")
+    elapsed : float
+        Number of seconds taken to render the frame.
+    """
 
-    return pos
+    start_time = time.perf_counter()
+
+    characters = c_utils.determine_character_death(frame.characters)
+
+    G, node_size = build_scene_network_graph(
+        characters, list(characters.keys()), frame.num_episodes, frame.tot_num_scenes
+    )
+
+    # If character has died by the last episode we're plotting, then display their node in different color.
+    node_colors = [
+        "#fdae6b" if characters[character_name].episode_death in frame.episode_keys else "#3182bd"
+        for character_name in G.nodes()
+    ]
+
+    if template is None:
+        plot_scene_network_frame(G, pos, node_size, node_colors, frame.episode_keys[-1], frame.output_fname)
+    else:
+        template.render(G, node_size, node_colors, frame.episode_keys[-1], frame.output_fname)
+
+    return time.perf_counter() - start_time
+
+
+# Each worker process builds its own template once and reuses it for every frame it renders.
+_worker_template: Optional[NetworkFrameTemplate] = None
+
+
+def _init_frame_worker(character_names: List[str], pos: Dict[str, "np.array"]) -> None:
+    global _worker_template
+    _worker_template = NetworkFrameTemplate(character_names, pos)
+
+
+def _render_frame_worker(frame: NetworkFrame, pos: Dict[str, "np.array"]) -> float:
+    return render_scene_network_frame(frame, pos, template=_worker_template)
+
+
+def render_scene_network_frames(
+    frames: List[NetworkFrame],
+    pos: Dict[str, "np.array"],
+    workers: Optional[int] = None,
+    reuse_figure: bool = True,
+) -> List[float]:
+    """
+    Renders many frames of the cumulative network graph animation.  The frames are independent so they're farmed out
+    to a pool of processes.
+
+    Parameters
+    ----------
+
+    frames : list of :py:class:`~NetworkFrame` instances
+        The frames being rendered.
+
+    pos : dict with keys of character name and values of an array of ``[x,y]`` coordinate pairs
+        The coordinates of each character node.  Shared by every frame so that the nodes don't jump around.
+
+    workers : optional, int
+        Number of processes used to render the frames. If not specified, uses every core.  If ``1``, the frames are
+        rendered serially in this process.
+
+    reuse_figure : optional, bool
+        If specified, each process builds a single :py:class:`~NetworkFrameTemplate` and only updates its artists for
+        each frame.  Otherwise, every frame is drawn from scratch using :py:func:`~plot_scene_network_frame`.
+
+    Returns
+    -------
+
+    frame_times : list of floats
+        Number of seconds taken to render each frame, in the same order as ``frames``.
+    """
+
+    if workers is None:
+        workers = os.cpu_count()
+
+    # Every character that appears in any frame, in order of first appearance.
+    character_names = list(dict.fromkeys(
+        character_name for frame in frames for character_name in frame.characters
+    ))
+
+    start_time = time.perf_counter()
+
+    if workers == 1 or len(frames) <= 1:
+        template = NetworkFrameTemplate(character_names, pos) if reuse_figure else None
+        frame_times = [render_scene_network_frame(frame, pos, template=template) for frame in frames]
+        if template is not None:
+            template.close()
+    elif reuse_figure:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_frame_worker, initargs=(character_names, pos)
+        ) as executor:
+            frame_times = list(executor.map(_render_frame_worker, frames, [pos] * len(frames)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            frame_times = list(executor.map(render_scene_network_frame, frames, [pos] * len(frames)))
+
+    elapsed = time.perf_counter() - start_time
+
+    for frame, frame_time in zip(frames, frame_times):
+        print(f"Rendered {frame.output_fname} in {frame_time:.2f} seconds.")
+
+    if len(frames) > 0:
+        print(f"Rendered {len(frames)} frames using {workers} processes in {elapsed:.2f} seconds "
+              f"({sum(frame_times) / len(frames):.2f} seconds per frame).")
+
+    return frame_times
 
 
 def plot_cumulative_scene_network_graphs(
@@ -491,7 +887,9 @@ def plot_cumulative_scene_network_graphs(
     chars_to_remove: Optional[List[str]] = None,
     name_for_ffmpeg: bool = False,
     plot_method: str = "bokeh",
-) -> None:
+    workers: Optional[int] = None,
+    reuse_figure: bool = True,
+) -> List[float]:
     """
     Given N episodes, plots N graphs depicting the number of interactions between characters.  That is, if passed 3
     episodes, plots a graph of interactions for episodes {1, 2, 3}, {1, 2}, and {1].
@@ -523,6 +921,24 @@ def plot_cumulative_scene_network_graphs(
         If specified, then the names of the images will be adjusted to be in sequential numerical order rather than
         ``sXXeXX.png``.
 
+    plot_method : {"networkx", "bokeh"}
+        Specifies how the graph of ALL episodes is plotted.  See :py:func:`~plot_scene_network_graph`.  The graphs of
+        the other episodes are always plotted using networkx.
+
+    workers : optional, int
+        Number of processes used to render the frames.  If not specified, uses every core.  See
+        :py:func:`~render_scene_network_frames`.
+
+    reuse_figure : optional, bool
+        If specified, the figure and its artists are built once per process and updated for each frame.  See
+        :py:class:`~NetworkFrameTemplate`.
+
+    Returns
+    -------
+
+    frame_times : list of floats
+        Number of seconds taken to render each networkx frame.
+
     Saves
     -----
 
@@ -530,44 +946,49 @@ def plot_cumulative_scene_network_graphs(
     the key of the episode (e.g., ``s01e02``, ``s04e05``, etc).
     """
 
+    import network_layout
+
+    # Build up the interactions for every cumulative set of episodes in a single pass.
+    cumulative_characters = generate_cumulative_scene_interactions(
+        episodes, plot_main_char, plot_minor_char, chars_to_remove
+    )
+
     # First, let's create a network graph using ALL episodes. From this, we will fix the
     # position of the nodes (characters) and use those same positions for all future
     # plots.
-    characters = generate_scene_interactions_for_graph(
-            episodes, plot_main_char, plot_minor_char, chars_to_remove
-    )
+    all_characters = cumulative_characters[-1]
 
-    # Now plot the network graph and remember the positions.
-    final_episode_key = episodes[-1].key
+    tot_num_scenes = sum(episode.num_scenes for episode in episodes)
+    G, _ = build_scene_network_graph(all_characters, list(all_characters.keys()), len(episodes), tot_num_scenes)
+    node_pos = network_layout.spring_layout(G)
 
     file_extensions: Dict[str, str] = {"networkx": "png", "bokeh": "html"}
     file_extension: str = file_extensions[plot_method]
 
-    if name_for_ffmpeg:
-        output_fname = f"{plot_output_dir}/scene_graph_{len(episodes)}.{file_extension}"
-    else:
-        output_fname = f"{plot_output_dir}/scene_graph_{final_episode_key}.{file_extension}"
-    node_pos = plot_scene_network_graph(
-        characters, episodes, output_fname, plot_method=plot_method, pos=None
-    )
-    exit()
-
-    # When plotting the other episodes, we will want to plot ALL characters, regardless of
-    # if they appear in the episodes. For characters we don't appear, their node/edge size
-    # will be 0, but still included to keep the sizing of the graph correct.
-    all_characters = characters
-
-    # Ok we have all the positions. Now iterate cumulatively through all the episodes and
-    # do a plot.
-    for episode_idx in range(len(episodes) - 1):
-        these_episodes = episodes[0:episode_idx+1]
-
-        characters = generate_scene_interactions_for_graph(
-            these_episodes,
-            plot_main_char,
-            plot_minor_char,
-            chars_to_remove
-        )
+    # The Bokeh plot of all episodes is a single interactive file so just make it here.
+    if plot_method == "bokeh":
+        if name_for_ffmpeg:
+            output_fname = f"{plot_output_dir}/scene_graph_{len(episodes)}.{file_extension}"
+        else:
+            output_fname = f"{plot_output_dir}/scene_graph_{episodes[-1].key}.{file_extension}"
+        plot_scene_network_graph(all_characters, episodes, output_fname, plot_method=plot_method, pos=node_pos)
+
+    # Now set up a frame for each cumulative set of episodes. When plotting the other episodes, we will want to plot
+    # ALL characters, regardless of if they appear in the episodes. For characters we don't appear, their node/edge
+    # size will be 0, but still included to keep the sizing of the graph correct.
+    frames = []
+    episode_keys = []
+    tot_num_scenes = 0
+    for episode_idx, episode in enumerate(episodes):
+
+        episode_keys.append(episode.key)
+        tot_num_scenes += episode.num_scenes
+
+        # The final frame has already been handled by Bokeh.
+        if plot_method == "bokeh" and episode_idx == len(episodes) - 1:
+            break
+
+        characters = cumulative_characters[episode_idx]
 
         # For those characters that don't appear in the episode (but appear by final
         # episode plotted), add them to the ``characters`` dict with zeroed values.
@@ -575,15 +996,14 @@ def plot_cumulative_scene_network_graphs(
             if character_name not in characters.keys():
                 characters[character_name] = Character(character_name)
 
-        # Now plot the network graph.
-        final_episode_key = these_episodes[-1].key
         if name_for_ffmpeg:
-            output_fname = f"{plot_output_dir}/scene_graph_{len(these_episodes)}.png"
+            output_fname = f"{plot_output_dir}/scene_graph_{episode_idx + 1}.png"
         else:
-            output_fname = f"{plot_output_dir}/scene_graph_{final_episode_key}.png"
-        _ = plot_scene_network_graph(
-            characters, these_episodes, output_fname, plot_method="networkx", pos=node_pos
-        )
+            output_fname = f"{plot_output_dir}/scene_graph_{episode.key}.png"
+
+        frames.append(NetworkFrame(characters, list(episode_keys), tot_num_scenes, episode_idx + 1, output_fname))
+
+    return render_scene_network_frames(frames, node_pos, workers=workers, reuse_figure=reuse_figure)
 
 
 def generate_scene_interactions_for_graph(
@@ -640,8 +1060,75 @@ def generate_scene_interactions_for_graph(
     return characters_to_return
 
 
+def generate_cumulative_scene_interactions(
+    episodes: List[Episode],
+    use_main_char: bool = True,
+    use_minor_char: bool = False,
+    chars_to_remove: Optional[List[str]] = None
+) -> List[Dict[str, Character]]:
+    """
+    Generates the number of scene interactions between characters for every cumulative set of episodes.  That is, the
+    interactions for episodes {1}, {1, 2}, {1, 2, 3}, etc.  Each episode is only processed once.
+
+    Parameters
+    ----------
+
+    episodes : list of :py:class:`~containers.Episode:` class instances
+        The episodes that we're plotting interactions for.
+
+    use_main_char, use_minor_char : optional, bool
+        If specified, will generate interactions for main and minor characters characters.  Characters "classes" are
+        defined in :py:func:`~character_utils.determine_character_classes`.
+
+    chars_to_remove : optional, list of strings
+        Removes the specified characters from analysis.
+
+    Returns
+    -------
+
+    cumulative_characters : list of dicts with keys of character name and values of :py:class:`~containers.Character:`
+    instances
+        Element ``i`` contains the characters (of the specified classes) for ``episodes[0:i+1]``.  It is identical to
+        calling :py:func:`~generate_scene_interactions_for_graph` with ``episodes[0:i+1]``.
+    """
+
+    from containers.scene_matrix import InteractionAccumulator
+
+    if not chars_to_remove:
+        chars_to_remove = []
+
+    accumulator = InteractionAccumulator()
+
+    cumulative_characters = []
+    for episode in episodes:
+        accumulator.add_episode(episode)
+
+        # Only those characters that have spoken so far can be selected.
+        characters_to_plot = c_utils.determine_character_classes(
+            accumulator.num_scenes, use_main_char, use_minor_char
+        )
+        character_names = [
+            character_name for character_name in characters_to_plot if character_name not in chars_to_remove
+        ]
+
+        cumulative_characters.append(accumulator.characters(character_names))
+
+    return cumulative_characters
+
+
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(description="Parse the scripts and plot the characters.")
+    parser.add_argument("--report", metavar="PATH",
+                        help="File the timing report is written to. If not specified, the report is printed.")
+    parser.add_argument("--report-format", choices=["json", "text"], default="text",
+                        help="Format of the timing report.")
+    parser.add_argument("--profile-dir", metavar="DIR",
+                        help="If specified, each stage is profiled and the stats saved to DIR/<stage>.prof.")
+    args = parser.parse_args()
+
+    instrumentation = Instrumentation(profile_dir=args.profile_dir)
+
     output_dir = "./cumu_plots"
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
@@ -651,42 +1138,55 @@ if __name__ == "__main__":
         os.makedirs(output_dir)
 
     # Parse all the episodes we desire.
-    season_nums = np.arange(1, 9)
-    episode_nums = np.arange(1, 11)
+    season_nums = list(range(1, 9))
+    episode_nums = list(range(1, 11))
     debug = False
 
-    episodes = parse_all_eps(season_nums, episode_nums, debug)
+    # Write the report even if one of the stages fails so we can see how far we got.
+    try:
+
+        # Parsed episodes are cached so that only scripts that have changed are parsed again.
+        with instrumentation.stage("parse"):
+            episodes = parse_all_eps(season_nums, episode_nums, debug, cache_dir="./.parse_cache")
+        instrumentation.count_episodes(episodes)
+
+        # Build a network graph of the scene interactions for each cumulative episode. That
+        # is, create a graph that is s01e01, s01e01 + s01e02, s01e01 + s01e02 + s01e03, etc.
+        with instrumentation.stage("plot_cumulative_scene_network_graphs"):
+            plot_cumulative_scene_network_graphs(
+                episodes,
+                "./cumu_plots",
+                plot_main_char=True,
+                plot_minor_char=True,
+                name_for_ffmpeg=True
+            )
 
-    # Build a network graph of the scene interactions for each cumulative episode. That
-    # is, create a graph that is s01e01, s01e01 + s01e02, s01e01 + s01e02 + s01e03, etc.
-    plot_cumulative_scene_network_graphs(
-        episodes,
-        "./cumu_plots",
-        plot_main_char=True,
-        plot_minor_char=True,
-        name_for_ffmpeg=True
-    )
+        # Instead of breaking into episodes, can also distribute as characters.
+        with instrumentation.stage("lines_per_episode"):
+            characters = c_utils.init_characters_in_episodes(episodes)
+            c_utils.determine_lines_per_episode(episodes, characters)
 
-    # Instead of breaking into episodes, can also distribute as characters.
-    characters = c_utils.init_characters_in_episodes(episodes)
-    c_utils.determine_lines_per_episode(episodes, characters)
+        # Determine the characters each character is in a scene with.
+        with instrumentation.stage("scene_interaction"):
+            c_utils.determine_scene_interaction(episodes, characters)
+            characters_to_plot = c_utils.determine_character_classes(characters, main_char=True,
+                                                                     minor_char=False)
 
-    # Determine the characters each character is in a scene with.
-    c_utils.determine_scene_interaction(episodes, characters)
-    characters_to_plot = c_utils.determine_character_classes(characters, main_char=True,
-                                                             minor_char=False)
+        # Let's remove some characters to make the plots look nicer.
+        #to_remove = ["The Mountain"]
+        to_remove = []
+        for character_name in to_remove:
+            if character_name in characters_to_plot:
+                characters_to_plot.remove(character_name)
 
-    # Let's remove some characters to make the plots look nicer.
-    #to_remove = ["The Mountain"]
-    to_remove = []
-    for character_name in to_remove:
-        if character_name in characters_to_plot:
-            characters_to_plot.remove(character_name)
+        # Then let's do some plotting!
 
-    # Then let's do some plotting!
+        # This is a histogram of the number of lines said by the character across the Season.
+        with instrumentation.stage("plot_line_count_hist"):
+            plot_line_count_hist(characters, episodes, characters_to_plot=None)
 
-    # This is a histogram of the number of lines said by the character across the Season.
-    plot_line_count_hist(characters, episodes, characters_to_plot=None)
+        # Wordcloud of the words said by characters.
+        # plot_wordcloud_character(episodes, "./plots", characters_to_plot=characters_to_plot)
 
-    # Wordcloud of the words said by characters.
-    # plot_wordcloud_character(episodes, "./plots")
+    finally:
+        instrumentation.write_report(args.report, args.report_format)
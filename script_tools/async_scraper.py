@@ -0,0 +1,425 @@
+"""
+This module scrapes many scripts at once.  :py:mod:`~script_tools.generate_script` fetches one page at a time, so
+scraping a season takes as long as every request added together.  Here, the pages are fetched concurrently:
+
+- Requests share a pooled ``requests.Session`` so connections are reused rather than opened for every page.  The
+  blocking requests are run in a thread pool and awaited with ``asyncio``.
+- At most ``concurrency`` requests are in flight at once and, optionally, at most ``rate_limit`` requests are started
+  per second so we are polite to the server.
+- Failed requests (connection errors, timeouts, ``429`` and ``5xx`` responses) are retried with exponential backoff.
+- The ``ETag`` and ``Last-Modified`` headers of each page are saved to a sidecar JSON file.  Later runs send them back
+  as ``If-None-Match`` and ``If-Modified-Since`` so pages that haven't changed aren't downloaded (or written) again.
+- Brackets are removed from the scripts in memory so each script is written once.
+
+The server is set by ``base_url`` so the scraper can be pointed at a local stand-in server for testing.
+
+Run from the root of the repo:
+
+.. code::
+
+    $ python -m script_tools.async_scraper --seasons 1 2 3 --output-dir ./script_tools/scripts
+
+Author: Jacob Seiler
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from containers.file_utils import atomic_write
+from script_tools.generate_script import (
+    episode_url, extract_episode_names, html_to_text, season_url, strip_brackets,
+)
+
+# Responses with these status codes are retried. Anything else that isn't a success is an error.
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Name of the sidecar file (in the output directory) holding the ``ETag`` and ``Last-Modified`` of each page.
+VALIDATORS_FNAME = ".scrape_validators.json"
+
+
+class AsyncScraper(object):
+    """
+    Handles fetching many pages concurrently over a shared session.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "https://genius.com",
+        concurrency: int = 8,
+        rate_limit: Optional[float] = None,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 30.0,
+        validators_path: Optional[str] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+
+        base_url : string, optional
+            The server the pages are fetched from.
+
+        concurrency : int, optional
+            Maximum number of requests in flight at once.  Also the size of the connection pool.
+
+        rate_limit : float, optional
+            Maximum number of requests started per second.  If not specified, requests are only limited by
+            ``concurrency``.
+
+        max_retries : int, optional
+            Number of times a failed request is retried before giving up.
+
+        backoff : float, optional
+            Seconds waited before the first retry.  Doubles for each subsequent retry.  If the server sends a
+            longer ``Retry-After`` (in seconds), that is waited instead.
+
+        timeout : float, optional
+            Seconds before a request times out.
+
+        validators_path : string, optional
+            Path to the sidecar JSON file holding the ``ETag`` and ``Last-Modified`` of each page.  If not specified,
+            conditional requests are not used.
+        """
+
+        if concurrency < 1:
+            print(f"The concurrency must be at least 1. Specified {concurrency}.")
+            raise ValueError
+
+        self._base_url = base_url.rstrip("/")
+        self._concurrency = concurrency
+        self._rate_limit = rate_limit
+        self._max_retries = max_retries
+        self._backoff = backoff
+        self._timeout = timeout
+        self._validators_path = validators_path
+        self._validators = self._load_validators()
+
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+
+        # Created on first use so they belong to the running event loop.
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._rate_lock: Optional[asyncio.Lock] = None
+        self._next_request_time = 0.0
+
+        self._num_requests = 0
+        self._num_not_modified = 0
+
+    @property
+    def base_url(self):
+        """
+        string : The server the pages are fetched from.
+        """
+        return self._base_url
+
+    @property
+    def validators(self):
+        """
+        dict[string, dict[string, string]] : The ``ETag`` and ``Last-Modified`` of each page. Key is the URL.
+        """
+        return self._validators
+
+    @property
+    def num_requests(self):
+        """
+        int : Number of requests sent, including retries.
+        """
+        return self._num_requests
+
+    @property
+    def num_not_modified(self):
+        """
+        int : Number of pages that weren't downloaded because they haven't changed.
+        """
+        return self._num_not_modified
+
+    def close(self) -> None:
+        """
+        Saves the validators and closes the session and thread pool.
+        """
+
+        self.save_validators()
+        self._executor.shutdown(wait=True)
+        self._session.close()
+
+    async def fetch(self, url: str, conditional: bool = True) -> Tuple[int, Optional[str]]:
+        """
+        Fetches a page, retrying if the request fails.
+
+        Parameters
+        ----------
+        url
+            The URL being fetched.
+
+        conditional : optional
+            If specified, sends the saved ``ETag`` and ``Last-Modified`` of the page (if any) so the page is only sent
+            if it has changed.
+
+        Returns
+        -------
+        status_code, text
+            The status code and the body of the page.  ``text`` is ``None`` if the page hasn't changed (i.e.,
+            ``status_code`` is ``304``).
+
+        Raises
+        ------
+        RuntimeError
+            If the page couldn't be fetched after all of the retries.
+        """
+
+        headers = {}
+        if conditional and url in self._validators:
+            validators = self._validators[url]
+            if "etag" in validators:
+                headers["If-None-Match"] = validators["etag"]
+            if "last_modified" in validators:
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore()
+
+        for attempt in range(self._max_retries + 1):
+
+            retry_after = None
+            async with semaphore:
+                await self._wait_for_rate_limit()
+                self._num_requests += 1
+                try:
+                    response = await loop.run_in_executor(self._executor, self._get, url, headers)
+                except (requests.ConnectionError, requests.Timeout) as error:
+                    failure = f"{type(error).__name__}: {error}"
+                else:
+                    if response.status_code == 304:
+                        self._num_not_modified += 1
+                        return 304, None
+
+                    if response.status_code == 200:
+                        self._update_validators(url, response)
+                        return 200, response.text
+
+                    if response.status_code not in RETRY_STATUS_CODES:
+                        print(f"Encountered error {response.status_code} while fetching webpage {url}")
+                        raise RuntimeError
+
+                    failure = f"status code {response.status_code}"
+                    retry_after = response.headers.get("Retry-After")
+
+            if attempt == self._max_retries:
+                break
+
+            # Sleep outside of the semaphore so other requests can go ahead in the meantime.
+            delay = self._backoff * 2 ** attempt
+            try:
+                delay = max(delay, float(retry_after))
+            except (TypeError, ValueError):
+                pass
+
+            print(f"Fetching {url} failed ({failure}). Retrying in {delay:.1f} seconds.")
+            await asyncio.sleep(delay)
+
+        print(f"Could not fetch webpage {url} after {self._max_retries + 1} attempts. Last failure was {failure}.")
+        raise RuntimeError
+
+    async def scrape_to_file(self, url: str, fname_out: str, remove_brackets: bool = False) -> bool:
+        """
+        Fetches a page, formats it as text, and saves it.
+
+        Parameters
+        ----------
+        url
+            The URL being scraped.
+
+        fname_out
+            The file the formatted page is saved to.
+
+        remove_brackets : optional
+            Removes the instances in the page of the form ``(WORD)``.
+
+        Returns
+        -------
+        saved
+            Whether the file was (re)written.  ``False`` if the page hasn't changed since it was last saved.
+        """
+
+        # Without the file, there's nothing to fall back on if the server says the page hasn't changed.
+        status_code, html = await self.fetch(url, conditional=os.path.exists(fname_out))
+        if status_code == 304:
+            print(f"{fname_out} is up to date.")
+            return False
+
+        text = html_to_text(html)
+        if remove_brackets:
+            text = strip_brackets(text)
+        atomic_write(fname_out, text)
+        print(f"Saved to {fname_out}")
+
+        return True
+
+    async def scrape_season(self, season_num: int, output_dir: str) -> List[str]:
+        """
+        Scrapes the scripts of every episode in a season.  The scripts are saved as ``{output_dir}/sXXeYY.txt``.
+
+        Parameters
+        ----------
+        season_num
+            The season being scraped.
+
+        output_dir
+            Directory the scripts are saved to.
+
+        Returns
+        -------
+        fnames
+            The path to the script of each episode.
+        """
+
+        # The episode list always has to be fetched as it's needed to find the episodes.
+        _, html = await self.fetch(season_url(season_num, self._base_url), conditional=False)
+        episode_names = extract_episode_names(html_to_text(html))
+
+        fnames = [
+            f"{output_dir}/s{season_num:02}e{episode_num:02}.txt"
+            for episode_num in range(1, len(episode_names) + 1)
+        ]
+
+        await asyncio.gather(*[
+            self.scrape_to_file(episode_url(episode_name, self._base_url), fname, remove_brackets=True)
+            for episode_name, fname in zip(episode_names, fnames)
+        ])
+
+        return fnames
+
+    def save_validators(self) -> None:
+        """
+        Saves the ``ETag`` and ``Last-Modified`` of each page to the sidecar file.
+        """
+
+        if self._validators_path is None:
+            return
+
+        atomic_write(self._validators_path, json.dumps(self._validators, indent=2, sort_keys=True))
+
+    def _get(self, url: str, headers: Dict[str, str]) -> requests.Response:
+        return self._session.get(url, headers=headers, timeout=self._timeout)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+            self._rate_lock = asyncio.Lock()
+        return self._semaphore
+
+    async def _wait_for_rate_limit(self) -> None:
+
+        if self._rate_limit is None:
+            return
+
+        # Space the start of each request at least ``1 / rate_limit`` seconds apart.
+        async with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request_time - now
+            self._next_request_time = max(now, self._next_request_time) + 1.0 / self._rate_limit
+
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _update_validators(self, url: str, response: requests.Response) -> None:
+
+        validators = {}
+        if "ETag" in response.headers:
+            validators["etag"] = response.headers["ETag"]
+        if "Last-Modified" in response.headers:
+            validators["last_modified"] = response.headers["Last-Modified"]
+
+        if len(validators) > 0:
+            self._validators[url] = validators
+        else:
+            self._validators.pop(url, None)
+
+    def _load_validators(self) -> Dict[str, Dict[str, str]]:
+
+        if self._validators_path is None:
+            return {}
+
+        try:
+            with open(self._validators_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            print(f"{self._validators_path} is corrupted. Ignoring it.")
+            return {}
+
+
+def scrape_seasons(season_nums: List[int], output_dir: str, **scraper_kwargs) -> Dict[int, List[str]]:
+    """
+    Scrapes the scripts of every episode in the given seasons concurrently.
+
+    Parameters
+    ----------
+    season_nums
+        The seasons being scraped.
+
+    output_dir
+        Directory the scripts are saved to.  Created if it does not exist.  The ``ETag`` and ``Last-Modified`` of each
+        page are saved to ``{output_dir}/.scrape_validators.json``.
+
+    **scraper_kwargs
+        Passed to :py:class:`~AsyncScraper` (e.g., ``base_url``, ``concurrency``, ``rate_limit``).
+
+    Returns
+    -------
+    fnames
+        The path to the script of each episode. Key is the season number.
+    """
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    scraper_kwargs.setdefault("validators_path", f"{output_dir}/{VALIDATORS_FNAME}")
+    scraper = AsyncScraper(**scraper_kwargs)
+
+    async def scrape_all():
+        season_fnames = await asyncio.gather(*[
+            scraper.scrape_season(season_num, output_dir) for season_num in season_nums
+        ])
+        return dict(zip(season_nums, season_fnames))
+
+    start_time = time.perf_counter()
+    try:
+        fnames = asyncio.run(scrape_all())
+    finally:
+        scraper.close()
+
+    print(f"Scraped {sum(len(season) for season in fnames.values())} episodes in "
+          f"{time.perf_counter() - start_time:.1f} seconds using {scraper.num_requests} requests. "
+          f"{scraper.num_not_modified} were unchanged.")
+
+    return fnames
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Scrapes the scripts of every episode in the given seasons.")
+    parser.add_argument("--seasons", type=int, nargs="+", default=list(range(1, 9)))
+    parser.add_argument("--output-dir", default="./scripts")
+    parser.add_argument("--base-url", default="https://genius.com", help="The server the pages are fetched from.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum number of requests in flight at once.")
+    parser.add_argument("--rate-limit", type=float, help="Maximum number of requests started per second.")
+    parser.add_argument("--retries", type=int, default=3, help="Number of times a failed request is retried.")
+    args = parser.parse_args()
+
+    scrape_seasons(
+        args.seasons, args.output_dir, base_url=args.base_url, concurrency=args.concurrency,
+        rate_limit=args.rate_limit, max_retries=args.retries,
+    )
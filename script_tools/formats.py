@@ -0,0 +1,117 @@
+"""
+This module reads the file listing the character and scene formats of each episode (``formats.txt``).  The file is
+parsed once into a dictionary keyed by ``(season_num, episode_num)`` so that looking up the formats of an episode is a
+single dictionary access.
+
+The file is space separated with a header naming the columns ``season_num``, ``episode_num``, ``character_format``,
+and ``scene_format``.  Anything after a ``#`` is a comment.
+
+Author: Jacob Seiler
+"""
+
+import os
+from typing import Dict, Tuple
+
+from containers.episode import ALLOWED_CHARACTER_FORMATS, ALLOWED_SCENE_FORMATS
+
+FORMAT_COLUMNS = ["season_num", "episode_num", "character_format", "scene_format"]
+
+# Parsed format files keyed by their path. Each entry also records the modification time of the file so that it is
+# parsed again if the file changes.
+_registry_cache: Dict[str, Tuple[int, Dict[Tuple[int, int], Tuple[str, str]]]] = {}
+
+
+def read_formats(formats_path: str = "./formats.txt") -> Dict[Tuple[int, int], Tuple[str, str]]:
+    """
+    Parses the file listing the character and scene formats of each episode.
+
+    Parameters
+    ----------
+    formats_path : optional
+        Path to the file listing the formats.
+
+    Returns
+    -------
+    formats
+        Key is ``(season_num, episode_num)`` and value is ``(character_format, scene_format)``.  If an episode is
+        listed multiple times, the first entry is used.
+
+    Raises
+    ------
+    ValueError
+        If the header is missing a column, a row has the wrong number of columns, the season or episode number is not
+        an integer, or a format is not one of :py:data:`~containers.episode.ALLOWED_CHARACTER_FORMATS` or
+        :py:data:`~containers.episode.ALLOWED_SCENE_FORMATS`.
+    """
+
+    formats = {}
+    column_idx = None
+
+    with open(formats_path, "r") as f:
+        for line_num, line in enumerate(f, start=1):
+
+            fields = line.split("#", 1)[0].split()
+            if len(fields) == 0:
+                continue
+
+            # The first row that isn't a comment names the columns.
+            if column_idx is None:
+                missing = [column for column in FORMAT_COLUMNS if column not in fields]
+                if len(missing) > 0:
+                    print(f"The header of {formats_path} (line {line_num}) is missing the columns {missing}.")
+                    raise ValueError
+                column_idx = [fields.index(column) for column in FORMAT_COLUMNS]
+                num_columns = len(fields)
+                continue
+
+            if len(fields) != num_columns:
+                print(f"Line {line_num} of {formats_path} has {len(fields)} columns. Expected {num_columns}.")
+                raise ValueError
+
+            season_num, episode_num, character_format, scene_format = [fields[idx] for idx in column_idx]
+
+            try:
+                key = (int(season_num), int(episode_num))
+            except ValueError:
+                print(f"Line {line_num} of {formats_path} has a season number of {season_num} and an episode number "
+                      f"of {episode_num}. Both must be integers.")
+                raise
+
+            if character_format not in ALLOWED_CHARACTER_FORMATS:
+                print(f"Line {line_num} of {formats_path} has a character format of {character_format}. The only "
+                      f"allowed formats are {ALLOWED_CHARACTER_FORMATS}")
+                raise ValueError
+
+            if scene_format not in ALLOWED_SCENE_FORMATS:
+                print(f"Line {line_num} of {formats_path} has a scene format of {scene_format}. The only allowed "
+                      f"formats are {ALLOWED_SCENE_FORMATS}")
+                raise ValueError
+
+            # Some episodes are listed twice. Keep the first entry.
+            formats.setdefault(key, (character_format, scene_format))
+
+    if column_idx is None:
+        print(f"{formats_path} has no header. Expected the columns {FORMAT_COLUMNS}.")
+        raise ValueError
+
+    return formats
+
+
+def get_formats(formats_path: str = "./formats.txt") -> Dict[Tuple[int, int], Tuple[str, str]]:
+    """
+    Same as :py:func:`~read_formats` but only parses ``formats_path`` the first time it is requested (or if it has
+    since been modified).  The returned dictionary is shared and should not be modified.
+    """
+
+    mtime = os.stat(formats_path).st_mtime_ns
+
+    try:
+        cached_mtime, formats = _registry_cache[formats_path]
+    except KeyError:
+        cached_mtime = None
+
+    if cached_mtime != mtime:
+        formats = read_formats(formats_path)
+        _registry_cache[formats_path] = (mtime, formats)
+
+    return formats
@@ -0,0 +1,356 @@
+"""
+This module writes synthetic scripts for testing how the parser and analysis scale to corpora far larger than the
+bundled Game of Thrones scripts.  Scripts can be written in every character format and scene format understood by
+:py:mod:`~script_tools.parse_script` (see ``formats.txt``) and a matching ``formats.txt`` is written alongside them.
+
+How often each character speaks follows a Zipf distribution, so a handful of characters get most of the lines just like
+a real cast.  Scripts are generated from a seed, so the same arguments always write the same corpus.
+
+Run from the root of the repo:
+
+.. code::
+
+    $ python -m script_tools.generate_synthetic --output-dir ./synthetic --seasons 20 --episodes 10
+
+The corpus can then be parsed with ``parse_all_eps(season_nums, episode_nums, script_dir="./synthetic",
+formats_path="./synthetic/formats.txt")``.
+
+Author: Jacob Seiler
+"""
+
+import argparse
+import itertools
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+CHARACTER_FORMATS = ["CHARACTER_NAME:", "**CHARACTER_NAME:**"]
+SCENE_FORMATS = ["SCENE", "DASHES", "STARS", "INT/EXT", "CUT", "INT/EXT/CUT", "ONE_SCENE"]
+
+# Lines that mark a scene change in each scene format. ``{place}`` is replaced with a random location.
+SCENE_MARKERS = {
+    "SCENE": ["Scene shifts to {place}.", "_Scene shifts to {place}._"],
+    "DASHES": ["\\- - - - -", "\\-----"],
+    "STARS": ["* * *", "***"],
+    "INT/EXT": ["INT. {PLACE} - NIGHT", "EXT. {PLACE} - DAY", "Exterior of {place}."],
+    "CUT": ["CUT TO: {PLACE}", "CUT TO:"],
+    "INT/EXT/CUT": ["INT. {PLACE} - DAY", "EXT. {PLACE} - NIGHT", "CUT TO:"],
+    "ONE_SCENE": [],
+}
+
+# Syllables used to build the names of characters and places.
+_SYLLABLES = [
+    "ar", "bel", "cor", "dar", "el", "fen", "gar", "hal", "ir", "jor", "kel", "lor", "mar", "nor", "or", "per",
+    "quin", "ros", "sam", "tor", "ul", "val", "wyn", "yar", "zan", "bra", "dro", "gil", "mel", "ser",
+]
+
+# Every word is lower case and none of them contain any of the markers of a scene change (e.g., 'scene', 'INT', 'EXT',
+# 'CUT TO', 'Interior', 'Exterior') nor the ':' and '*' used to mark a character's line.
+_WORDS = [
+    "the", "a", "and", "to", "of", "you", "i", "we", "they", "is", "was", "will", "not", "never", "always", "king",
+    "queen", "lord", "lady", "sword", "winter", "north", "south", "throne", "dragon", "wall", "city", "gold", "blood",
+    "fire", "ice", "war", "peace", "crown", "river", "road", "ship", "horse", "bread", "wine", "night", "day", "home",
+    "father", "mother", "brother", "sister", "son", "daughter", "friend", "enemy", "oath", "honour", "debt", "truth",
+    "lie", "fear", "hope", "love", "death", "life", "must", "should", "could", "would", "come", "go", "stay", "fight",
+    "run", "kneel", "rise", "speak", "listen", "remember", "forget", "know", "believe", "trust", "tell", "me", "him",
+    "her", "them", "us", "here", "there", "now", "soon", "tomorrow", "tonight", "again", "please", "yes", "no",
+]
+
+_DIRECTIONS = [
+    "[They stare at each other.]", "[A door slams.]", "[Wind howls.]", "[Footsteps approach.]", "[Silence.]",
+    "[Laughter.]", "[A bell rings in the distance.]",
+]
+
+
+def generate_names(num_names: int, random_state: np.random.RandomState, max_words: int = 2) -> List[str]:
+    """
+    Generates unique names made of random syllables, e.g., ``"Belmar Tor"``.
+
+    Parameters
+    ----------
+    num_names
+        Number of names to generate.
+
+    random_state
+        The source of randomness.
+
+    max_words : optional
+        Maximum number of words in each name.
+
+    Returns
+    -------
+    names
+        The names, in title case.  None of the names contain the markers of a scene change when upper cased.
+    """
+
+    names: List[str] = []
+    seen = set()
+    while len(names) < num_names:
+
+        words = []
+        for _ in range(random_state.randint(1, max_words + 1)):
+            num_syllables = random_state.randint(1, 4)
+            word = "".join(random_state.choice(_SYLLABLES, size=num_syllables))
+            words.append(word.capitalize())
+        name = " ".join(words)
+
+        # Upper case names are used for the "CHARACTER_NAME:" format so they mustn't look like a scene change.
+        upper_name = name.upper()
+        if name in seen or "INT" in upper_name or "EXT" in upper_name or "CUT" in upper_name:
+            continue
+
+        seen.add(name)
+        names.append(name)
+
+    return names
+
+
+def zipf_weights(num_characters: int, exponent: float = 1.1) -> np.ndarray:
+    """
+    Probability of each character speaking a line.  The ``i``-th character speaks with probability proportional to
+    ``1 / (i+1)**exponent``.
+    """
+
+    weights = 1.0 / np.arange(1, num_characters + 1) ** exponent
+
+    return weights / weights.sum()
+
+
+def format_dialogue(character_name: str, spoken_line: str, character_format: str) -> str:
+    """
+    Formats a line spoken by a character for the given character format.
+    """
+
+    if character_format == "CHARACTER_NAME:":
+        return f"{character_name.upper()}: {spoken_line}"
+    elif character_format == "**CHARACTER_NAME:**":
+        return f"**{character_name}:** {spoken_line}"
+    else:
+        print(f"Character format is {character_format}. The only allowed formats are {CHARACTER_FORMATS}")
+        raise ValueError
+
+
+def generate_script(
+    fname: str,
+    character_format: str,
+    scene_format: str,
+    character_names: List[str],
+    cast_weights: np.ndarray,
+    random_state: np.random.RandomState,
+    num_scenes: int = 40,
+    lines_per_scene: float = 12.0,
+    characters_per_scene: int = 4,
+    words_per_line: float = 10.0,
+    direction_fraction: float = 0.1,
+) -> Tuple[int, int]:
+    """
+    Writes a single synthetic script.
+
+    Parameters
+    ----------
+    fname
+        Path the script is written to.
+
+    character_format, scene_format
+        The formats of the script.  See :py:attr:`~containers.episode.Episode.character_format` and
+        :py:attr:`~containers.episode.Episode.scene_format`.
+
+    character_names
+        The cast.
+
+    cast_weights
+        Probability of each character appearing in a scene, e.g., from :py:func:`~zipf_weights`.
+
+    random_state
+        The source of randomness.
+
+    num_scenes : optional
+        Number of scenes in the script.  Ignored (i.e., 1) for the ``"ONE_SCENE"`` format.
+
+    lines_per_scene : optional
+        Mean number of lines spoken in each scene.  Every scene has at least one line.
+
+    characters_per_scene : optional
+        Maximum number of characters speaking in each scene.
+
+    words_per_line : optional
+        Mean number of words in each line.
+
+    direction_fraction : optional
+        Fraction of lines that are (ignored) stage directions rather than dialogue.
+
+    Returns
+    -------
+    num_lines, num_scenes
+        The number of lines spoken and scenes in the script, i.e., what the parser should find.
+    """
+
+    if scene_format not in SCENE_MARKERS:
+        print(f"Scene format is {scene_format}. The only allowed formats are {SCENE_FORMATS}")
+        raise ValueError
+
+    markers = SCENE_MARKERS[scene_format]
+    if len(markers) == 0:
+        num_scenes = 1
+
+    places = generate_names(8, random_state, max_words=1)
+
+    num_lines = 0
+    text = ["[Opening credits.]", ""]
+
+    for scene_idx in range(num_scenes):
+
+        if scene_idx > 0:
+            place = places[random_state.randint(len(places))]
+            marker = markers[random_state.randint(len(markers))]
+            text.append(marker.format(place=place, PLACE=place.upper()))
+            text.append("")
+
+        # A few characters (mostly the popular ones) share each scene.
+        num_speakers = min(random_state.randint(1, characters_per_scene + 1), len(character_names))
+        speakers = random_state.choice(len(character_names), size=num_speakers, replace=False, p=cast_weights)
+
+        for _ in range(max(1, random_state.poisson(lines_per_scene))):
+
+            if random_state.rand() < direction_fraction:
+                text.append(_DIRECTIONS[random_state.randint(len(_DIRECTIONS))])
+                text.append("")
+
+            num_words = max(1, random_state.poisson(words_per_line))
+            word_ids = random_state.randint(len(_WORDS), size=num_words).tolist()
+            spoken_line = " ".join([_WORDS[word_id] for word_id in word_ids]).capitalize() + "."
+
+            character_name = character_names[speakers[random_state.randint(num_speakers)]]
+            text.append(format_dialogue(character_name, spoken_line, character_format))
+            text.append("")
+            num_lines += 1
+
+    with open(fname, "w") as f:
+        f.write("\n".join(text))
+
+    return num_lines, num_scenes
+
+
+def write_formats(fname: str, formats: Dict[Tuple[int, int], Tuple[str, str]]) -> None:
+    """
+    Writes a ``formats.txt`` file.
+
+    Parameters
+    ----------
+    fname
+        Path the file is written to.
+
+    formats
+        The character and scene format of each episode.  Key is ``(season_num, episode_num)``.
+    """
+
+    with open(fname, "w") as f:
+        f.write("# Formats of the synthetic scripts. See the ``formats.txt`` in the root of the repo for the keys.\n")
+        f.write("season_num episode_num character_format scene_format\n")
+        for (season_num, episode_num), (character_format, scene_format) in formats.items():
+            f.write(f"{season_num} {episode_num} {character_format} {scene_format}\n")
+
+
+def generate_corpus(
+    output_dir: str,
+    num_seasons: int,
+    num_episodes: int,
+    num_characters: int = 200,
+    zipf_exponent: float = 1.1,
+    character_formats: Optional[List[str]] = None,
+    scene_formats: Optional[List[str]] = None,
+    seed: int = 0,
+    **script_kwargs,
+) -> Dict[Tuple[int, int], Tuple[int, int]]:
+    """
+    Writes a synthetic corpus of ``num_seasons`` x ``num_episodes`` scripts (named ``sXXeYY.txt``) and its
+    ``formats.txt`` to ``output_dir``.
+
+    Parameters
+    ----------
+    output_dir
+        Directory the scripts are written to.  Created if it does not exist.
+
+    num_seasons, num_episodes
+        Number of seasons and episodes per season.
+
+    num_characters : optional
+        Size of the cast.  The same cast is shared by every episode.
+
+    zipf_exponent : optional
+        Exponent of the Zipf distribution of lines across the cast.  See :py:func:`~zipf_weights`.
+
+    character_formats, scene_formats : optional
+        The formats to use.  Each episode cycles through every combination of these.  If not specified, uses all of
+        :py:data:`~CHARACTER_FORMATS` and :py:data:`~SCENE_FORMATS`.
+
+    seed : optional
+        Seed for the randomness.  The same arguments and seed always give the same corpus.
+
+    **script_kwargs
+        Passed to :py:func:`~generate_script` (e.g., ``num_scenes``, ``lines_per_scene``).
+
+    Returns
+    -------
+    expected
+        The number of lines and scenes in each episode.  Key is ``(season_num, episode_num)``.
+    """
+
+    if character_formats is None:
+        character_formats = CHARACTER_FORMATS
+    if scene_formats is None:
+        scene_formats = SCENE_FORMATS
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    random_state = np.random.RandomState(seed)
+
+    character_names = generate_names(num_characters, random_state)
+    cast_weights = zipf_weights(num_characters, zipf_exponent)
+
+    all_formats = itertools.cycle(itertools.product(character_formats, scene_formats))
+
+    formats = {}
+    expected = {}
+    for season_num in range(1, num_seasons + 1):
+        for episode_num in range(1, num_episodes + 1):
+
+            character_format, scene_format = next(all_formats)
+            formats[(season_num, episode_num)] = (character_format, scene_format)
+
+            fname = f"{output_dir}/s{season_num:02}e{episode_num:02}.txt"
+            expected[(season_num, episode_num)] = generate_script(
+                fname, character_format, scene_format, character_names, cast_weights, random_state, **script_kwargs
+            )
+
+    write_formats(f"{output_dir}/formats.txt", formats)
+
+    return expected
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output-dir", default="./synthetic_scripts")
+    parser.add_argument("--seasons", type=int, default=8)
+    parser.add_argument("--episodes", type=int, default=10)
+    parser.add_argument("--characters", type=int, default=200)
+    parser.add_argument("--scenes", type=int, default=40, help="Number of scenes in each episode.")
+    parser.add_argument("--lines-per-scene", type=float, default=12.0)
+    parser.add_argument("--zipf-exponent", type=float, default=1.1)
+    parser.add_argument("--character-formats", nargs="+", choices=CHARACTER_FORMATS)
+    parser.add_argument("--scene-formats", nargs="+", choices=SCENE_FORMATS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    expected = generate_corpus(
+        args.output_dir, args.seasons, args.episodes, num_characters=args.characters,
+        zipf_exponent=args.zipf_exponent, character_formats=args.character_formats, scene_formats=args.scene_formats,
+        seed=args.seed, num_scenes=args.scenes, lines_per_scene=args.lines_per_scene,
+    )
+
+    num_lines = sum(lines for lines, _ in expected.values())
+    num_scenes = sum(scenes for _, scenes in expected.values())
+    print(f"Wrote {len(expected)} scripts with {num_lines} lines and {num_scenes} scenes to {args.output_dir}")
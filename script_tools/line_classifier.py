@@ -0,0 +1,223 @@
+"""
+This module contains the ``LineClassifier`` class.  A ``LineClassifier`` decides whether a single line of a script is
+dialogue spoken by a character, marks a scene change, or is noise that should be ignored.
+
+All of the regular expressions used to make this decision are compiled once for each combination of character and
+scene format (see ``formats.txt``).  Use :py:func:`~get_line_classifier` to fetch the (shared) classifier for a given
+format.
+
+Author: Jacob Seiler
+"""
+
+import re
+from typing import Dict, Optional, Tuple
+
+# A line of the form "CHARACTER_NAME: <Spoken line>". The name starts at the first capital letter and runs until the
+# final ":" of the line.
+CAPITAL_CHARACTER_RE = re.compile(r"([A-Z].*\:)")
+CAPITAL_CHARACTER_ANCHORED_RE = re.compile(r"[^A-Z\n]*([A-Z].*)\:(.*)")
+
+# A line of the form "**Character name:** <Spoken line>". Be careful, sometimes the colon is inside the ** or outside
+# with a space...
+STARS_CHARACTER_RE = re.compile(r"\*\*([A-Z].*)\:\*\*|\*\*([A-Z].*)\*\*\:|\*\*([A-Z].*)\*\* \:", re.IGNORECASE)
+
+# The markers of a scene change for each scene format. See :py:attr:`~containers.episode.Episode.scene_format`.
+SCENE_CHANGE_PATTERNS = {
+    "SCENE": r"Blackout|(?i:scene)",
+    "DASHES": r"\\- - -|\\---",
+    "STARS": r"\* \* \*|\*\*\*",
+    "INT/EXT": r"INT|EXT|Interior|Exterior",
+    "CUT": r"CUT TO",
+    "INT/EXT/CUT": r"INT|EXT|CUT TO",
+}
+
+# The "SCENE" format matches 'scene' regardless of case. Restrict this to ASCII so it behaves like ``line.lower()``.
+SCENE_CHANGE_FLAGS = {
+    "SCENE": re.ASCII,
+}
+
+DIALOGUE = "dialogue"
+SCENE_CHANGE = "scene_change"
+NOISE = "noise"
+
+
+def is_scene_description(line: str) -> bool:
+    """
+    Determines if ``line`` is a scene description rather than dialogue.  Plain substring checks are considerably faster
+    than a regex alternation here.
+    """
+    return line[0] == "[" or line[0] == "_" or "CUT TO" in line or "_CUT" in line or "INT" in line or "EXT" in line
+
+
+class LineClassifier(object):
+    """
+    Classifies the lines of scripts that share a character format and scene format.
+    """
+
+    def __init__(self, character_format: str, scene_format: str):
+        """
+        Compiles the patterns used to classify the lines.
+
+        Parameters
+        ----------
+
+        character_format, scene_format : strings
+            The formats of the script. See :py:attr:`~containers.episode.Episode.character_format` and
+            :py:attr:`~containers.episode.Episode.scene_format`.
+        """
+
+        self._character_format = character_format
+        self._scene_format = scene_format
+
+        if character_format == "**CHARACTER_NAME:**":
+            self._parse_dialogue = self._parse_stars_dialogue
+        elif character_format == "CHARACTER_NAME:":
+            self._parse_dialogue = self._parse_capital_dialogue
+        else:
+            self._parse_dialogue = self._parse_unknown_dialogue
+
+        # Scene formats without any markers (e.g., "ONE_SCENE") never change scene.
+        try:
+            self._scene_change_re = re.compile(
+                SCENE_CHANGE_PATTERNS[scene_format], SCENE_CHANGE_FLAGS.get(scene_format, 0)
+            )
+        except KeyError:
+            self._scene_change_re = None
+
+    @property
+    def character_format(self):
+        """
+        string : Key that specifies how each character line is identified in the script.
+        """
+        return self._character_format
+
+    @property
+    def scene_format(self):
+        """
+        string : Key that specifies how a scene change is identified within the script.
+        """
+        return self._scene_format
+
+    def classify(self, line: str) -> Tuple[str, Optional[str], Optional[str]]:
+        """
+        Classifies a single (non-empty) line of the script.
+
+        Parameters
+        ----------
+        line
+            The line of the script.
+
+        Returns
+        -------
+        kind
+            One of ``"dialogue"``, ``"scene_change"``, or ``"noise"``.
+
+        character_name, spoken_line
+            For dialogue, the name of the character and the line they spoke. ``None`` otherwise.
+        """
+
+        character_name = None
+        spoken_line = None
+
+        if not is_scene_description(line):
+            character_name, spoken_line = self._parse_dialogue(line)
+
+        if character_name is not None:
+            return DIALOGUE, character_name, spoken_line
+
+        if self.is_scene_change(line):
+            return SCENE_CHANGE, None, None
+
+        return NOISE, None, None
+
+    def parse_dialogue(self, line: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Determines the name of the character speaking and the line spoken.  Returns ``(None, None)`` if ``line`` isn't
+        dialogue.
+        """
+
+        if is_scene_description(line):
+            return None, None
+
+        return self._parse_dialogue(line)
+
+    def is_scene_change(self, line: str) -> bool:
+        """
+        Determines if ``line`` marks a scene change.
+        """
+
+        if self._scene_change_re is None:
+            return False
+
+        return self._scene_change_re.search(line) is not None
+
+    def _parse_capital_dialogue(self, line: str) -> Tuple[Optional[str], Optional[str]]:
+
+        match = CAPITAL_CHARACTER_ANCHORED_RE.match(line)
+        if match is None:
+            return None, None
+
+        character_name = match.group(1).strip()
+
+        # To be a valid line, all letters must be upper case.
+        if character_name != character_name.upper():
+            return None, None
+
+        # The navigation alphabet on the webpage is captured as lines with nothing spoken.
+        spoken_line = match.group(2).strip()
+        if spoken_line == "":
+            return None, None
+
+        return character_name, spoken_line
+
+    def _parse_stars_dialogue(self, line: str) -> Tuple[Optional[str], Optional[str]]:
+
+        match = STARS_CHARACTER_RE.search(line)
+        if match is None:
+            return None, None
+
+        # A second match means the line is split into more pieces. This is rare, so only do the full split then.
+        if STARS_CHARACTER_RE.search(line, match.end()) is not None:
+            pieces = STARS_CHARACTER_RE.split(line)
+        else:
+            pieces = [line[:match.start()], *match.groups(), line[match.end():]]
+
+        # Extraneous "*...*" at the start of some lines leaves an extra piece at the front.
+        filtered_line = list(filter(None, pieces))
+        if len(filtered_line) == 2:
+            character_name = filtered_line[0]
+            spoken_line = filtered_line[1]
+        elif len(filtered_line) == 3:
+            character_name = filtered_line[1]
+            spoken_line = filtered_line[2]
+        else:
+            print("line is {0}\tregex line is {1}\tfiltered line is {2}".format(line, pieces, filtered_line))
+            raise ValueError
+
+        spoken_line = spoken_line.split("\n")[0].strip()
+
+        return character_name, spoken_line
+
+    def _parse_unknown_dialogue(self, line: str) -> Tuple[Optional[str], Optional[str]]:
+
+        print(f"Character format is {self._character_format}. This is not a recognised format.")
+        raise ValueError
+
+
+_classifiers: Dict[Tuple[str, str], LineClassifier] = {}
+
+
+def get_line_classifier(character_format: str, scene_format: str) -> LineClassifier:
+    """
+    Fetches the classifier for the given formats.  Classifiers are only built once for each combination of formats.
+    """
+
+    key = (character_format, scene_format)
+
+    try:
+        classifier = _classifiers[key]
+    except KeyError:
+        classifier = LineClassifier(character_format, scene_format)
+        _classifiers[key] = classifier
+
+    return classifier
@@ -0,0 +1,187 @@
+"""
+This module handles an on-disk cache of parsed episodes.  Parsing every script on every run is wasteful when the scripts
+rarely change, so the scenes and lines of each parsed episode are saved in a compact binary file.
+
+Each cached episode is keyed by a hash of the script contents, the character and scene formats used to parse it (i.e.,
+its row in ``formats.txt``), and the version of the parser.  If any of these change, the cached episode is ignored and
+the episode is parsed again.
+
+Author: Jacob Seiler
+"""
+
+import hashlib
+import os
+import pickle
+import zlib
+from typing import Optional
+
+from containers.episode import Episode
+from containers.file_utils import atomic_write
+from containers.line import Line
+from containers.scene import Scene
+
+# Every cache file starts with these bytes followed by the hash of the key.
+CACHE_MAGIC = b"SPAC1"
+
+
+def episode_cache_key(script_path: str, character_format: str, scene_format: str, parser_version: int) -> bytes:
+    """
+    Computes the key used to determine if a cached episode is still valid.
+
+    Parameters
+    ----------
+    script_path
+        Path to the script of the episode.
+
+    character_format, scene_format
+        The formats used to parse the script.  See :py:attr:`~containers.episode.Episode.character_format` and
+        :py:attr:`~containers.episode.Episode.scene_format`.
+
+    parser_version
+        Version of the parser.  Should be bumped whenever a change to the parser changes its output.
+
+    Returns
+    -------
+    key
+        SHA-256 digest of all the above.
+    """
+
+    digest = hashlib.sha256()
+
+    with open(script_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+
+    digest.update(f"\0{character_format}\0{scene_format}\0{parser_version}".encode("utf-8"))
+
+    return digest.digest()
+
+
+def _cache_path(cache_dir: str, episode: Episode) -> str:
+    return f"{cache_dir}/{episode.key}.bin"
+
+
+def load_cached_episode(cache_dir: str, episode: Episode, key: bytes) -> bool:
+    """
+    Attempts to fill ``episode`` with the scenes and lines saved in the cache.
+
+    Parameters
+    ----------
+    cache_dir
+        Directory where the cached episodes are saved.
+
+    episode
+        Episode instance that will be updated.
+
+    key
+        Key of the episode as computed by :py:func:`~episode_cache_key`.
+
+    Returns
+    -------
+    hit
+        Whether the episode was found in the cache.  If ``False``, ``episode`` is not touched.
+    """
+
+    fname = _cache_path(cache_dir, episode)
+
+    try:
+        with open(fname, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return False
+
+    header = CACHE_MAGIC + key
+    if not data.startswith(header):
+        return False
+
+    try:
+        character_names, scenes = pickle.loads(zlib.decompress(data[len(header):]))
+    except (zlib.error, pickle.UnpicklingError, EOFError, ValueError):
+        print(f"Cached episode {fname} is corrupted. Ignoring it.")
+        return False
+
+    # Rebuild the scenes and lines exactly as :py:func:`~script_tools.parse_script.parse_episode` would.
+    episode.scenes = []
+    for character_ids, spoken_lines in scenes:
+
+        scene = Scene(episode.season_num, episode.episode_num)
+
+        for character_id, spoken_line in zip(character_ids, spoken_lines):
+
+            character_name = character_names[character_id]
+
+            line = Line(character_name, spoken_line, episode.season_num, episode.episode_num)
+
+            if character_name not in episode.character_lines:
+                episode.character_lines[character_name] = []
+            episode.character_lines[character_name].append(line)
+
+            scene.lines.append(line)
+
+        episode.scenes.append(scene)
+
+    if len(episode.scenes) > 0:
+        episode.current_scene = episode.scenes[-1]
+
+    return True
+
+
+def save_cached_episode(cache_dir: str, episode: Episode, key: bytes) -> None:
+    """
+    Saves the scenes and lines of a parsed episode to the cache.
+
+    Parameters
+    ----------
+    cache_dir
+        Directory where the cached episodes are saved.  Created if it does not exist.
+
+    episode
+        The parsed episode.
+
+    key
+        Key of the episode as computed by :py:func:`~episode_cache_key`.
+
+    Returns
+    -------
+    None.  The episode is saved to ``{cache_dir}/{episode.key}.bin``.
+    """
+
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+
+    # Rather than storing the name of the character alongside every line, store each name once and refer to it by
+    # index.
+    character_ids = {}
+    scenes = []
+    for scene in episode.scenes:
+        scene_ids = []
+        scene_lines = []
+        for line in scene.lines:
+            character_id = character_ids.setdefault(line.character_name, len(character_ids))
+            scene_ids.append(character_id)
+            scene_lines.append(line.spoken_line)
+        scenes.append((scene_ids, scene_lines))
+
+    payload = (list(character_ids.keys()), scenes)
+    data = CACHE_MAGIC + key + zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+
+    atomic_write(_cache_path(cache_dir, episode), data, "wb")
+
+
+def clear_cache(cache_dir: str, episode: Optional[Episode] = None) -> None:
+    """
+    Removes cached episodes.  If ``episode`` is specified, only removes that episode.  Otherwise removes all cached
+    episodes in ``cache_dir``.
+    """
+
+    if not os.path.exists(cache_dir):
+        return
+
+    if episode is not None:
+        fnames = [_cache_path(cache_dir, episode)]
+    else:
+        fnames = [f"{cache_dir}/{fname}" for fname in os.listdir(cache_dir) if fname.endswith(".bin")]
+
+    for fname in fnames:
+        if os.path.exists(fname):
+            os.remove(fname)
@@ -7,15 +7,29 @@ Author: Jacob Seiler
 from containers.episode import Episode
 from containers.line import Line
 from containers.scene import Scene
+from script_tools.line_classifier import (
+    CAPITAL_CHARACTER_RE, DIALOGUE, SCENE_CHANGE, STARS_CHARACTER_RE, LineClassifier, get_line_classifier,
+    is_scene_description,
+)
+from script_tools.formats import get_formats
+from script_tools.parse_cache import episode_cache_key, load_cached_episode, save_cached_episode
+from script_tools.script_loader import iter_script_lines
 
-from typing import List
-import re
+from typing import Iterable, Iterator, List, Optional
 
-import pandas as pd
+# Bump this whenever a change to the parser changes the parsed output. Any episodes in the parse cache that were parsed
+# with a different version will be parsed again.
+PARSER_VERSION = 1
 
 
 def parse_all_eps(
-    season_nums: List[int], episode_nums: List[int], debug: bool = False, script_dir: str = "./script_tools/scripts"
+    season_nums: List[int],
+    episode_nums: List[int],
+    debug: bool = False,
+    script_dir: str = "./script_tools/scripts",
+    workers: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+    formats_path: str = "./formats.txt",
 ) -> List[Episode]:
     """
     Parse all the episodes in the given seasons.  That is, fetches all of the characters, lines, and scenes for each
@@ -29,6 +43,21 @@ def parse_all_eps(
     debug
         If specified, prints some messages that may help with debugging.
 
+    script_dir : optional
+        Directory containing the scripts.  Each script is named ``sXXeYY.txt``.
+
+    workers : optional
+        Number of processes used to parse the episodes.  If ``None`` or ``1``, the episodes are parsed serially in this
+        process.  Either way, the episodes are returned in the same order.
+
+    cache_dir : optional
+        If specified, parsed episodes are saved to (and loaded from) this directory.  Episodes are only parsed again if
+        their script, their entry in ``formats.txt``, or :py:data:`~PARSER_VERSION` has changed.  See
+        :py:mod:`~script_tools.parse_cache`.
+
+    formats_path : optional
+        Path to the file listing the character and scene formats of each episode.
+
     Returns
     -------
     episodes
@@ -40,23 +69,100 @@ def parse_all_eps(
     episode number across all seasons. Episodes will be skipped if there is not corresponding entry in ``formats.txt``.
     """
 
+    episodes = init_episodes(season_nums, episode_nums, script_dir, formats_path)
+
+    # If we're using the cache, only the episodes that aren't already cached need to be parsed.
+    to_parse = list(range(len(episodes)))
+    cache_keys = {}
+    if cache_dir is not None:
+        to_parse = []
+        for episode_idx, episode in enumerate(episodes):
+
+            # Episodes without scripts don't have anything to cache.
+            if episode.character_format == "NONE" and episode.scene_format == "NONE":
+                to_parse.append(episode_idx)
+                continue
+
+            key = episode_cache_key(episode.script_path, episode.character_format, episode.scene_format, PARSER_VERSION)
+            if load_cached_episode(cache_dir, episode, key):
+                continue
+
+            cache_keys[episode_idx] = key
+            to_parse.append(episode_idx)
+
+        if debug:
+            print(f"Loaded {len(episodes) - len(to_parse)} episodes from the cache in {cache_dir}.")
+
+    # Now go through each episode and parse the script.
+    episodes_to_parse = [episodes[episode_idx] for episode_idx in to_parse]
+    if workers is None or workers == 1:
+        for episode in episodes_to_parse:
+            parse_episode(episode.script_path, episode, debug)
+    else:
+        # Each script is independent so farm them out. The parsed episodes come back as copies, in the same order they
+        # were sent. Importing the process pool takes longer than parsing a few scripts so only do it when needed.
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            episodes_to_parse = list(
+                executor.map(_parse_episode_worker, episodes_to_parse, [debug] * len(episodes_to_parse))
+            )
+
+    for episode_idx, episode in zip(to_parse, episodes_to_parse):
+        episodes[episode_idx] = episode
+
+        # Save the freshly parsed episodes so we don't have to parse them again next time.
+        if episode_idx in cache_keys:
+            save_cached_episode(cache_dir, episode, cache_keys[episode_idx])
+
+    return episodes
+
+
+def init_episodes(
+    season_nums: List[int],
+    episode_nums: List[int],
+    script_dir: str = "./script_tools/scripts",
+    formats_path: str = "./formats.txt",
+) -> List[Episode]:
+    """
+    Sets up the episodes in the given seasons without parsing them.  Each episode knows where its script is and how to
+    parse it (i.e., its character and scene formats), so these can be passed to :py:func:`~parse_episode` or streamed
+    through :py:func:`~iter_scenes` and :py:func:`~iter_lines`.
+
+    Parameters
+    ----------
+    season_num, episode_nums
+        The season and episodes that will be set up.
+
+    script_dir : optional
+        Directory containing the scripts.  Each script is named ``sXXeYY.txt``.
+
+    formats_path : optional
+        Path to the file listing the character and scene formats of each episode.
+
+    Returns
+    -------
+    episodes
+        The episodes. These have no scenes or lines yet.
+
+    Notes
+    -----
+    Episodes are skipped if there is not corresponding entry in ``formats_path``.
+    """
+
     episodes = []
 
-    # Each episode can be parsed slightly differently. This pandas dataframe will provide the keys used to determine
-    # how to parse each episode.
-    formats = pd.read_csv("./formats.txt", sep=" ", comment="#")
+    # Each episode can be parsed slightly differently. This dictionary holds the formats used to determine how to parse
+    # each episode.
+    formats = get_formats(formats_path)
 
     for season_num in season_nums:
         for episode_num in episode_nums:
 
-            # Need the formats on how we parse the characters and scenes.
-            episode_format = formats[(formats["season_num"] == season_num) & (formats["episode_num"] == episode_num)]
-
-            # Some seasons don't have episodes 1-10. So try this and skip if we don't have.
+            # Some seasons don't have episodes 1-10. So skip if we don't have it.
             try:
-                character_format = str(episode_format["character_format"].values[0])
-                scene_format = str(episode_format["scene_format"].values[0])
-            except IndexError:
+                character_format, scene_format = formats[(int(season_num), int(episode_num))]
+            except KeyError:
                 continue
 
             key = f"s{season_num:02}e{episode_num:02}"
@@ -70,13 +176,19 @@ def parse_all_eps(
 
             episodes.append(episode)
 
-    # Now go through each episode and parse the script.
-    for episode in episodes:
-        parse_episode(episode.script_path, episode, debug)
-
     return episodes
 
 
+def _parse_episode_worker(episode: Episode, debug: bool = False) -> Episode:
+    """
+    Parses a single episode and returns it.  Used by :py:func:`~parse_all_eps` to parse episodes in worker processes.
+    """
+
+    parse_episode(episode.script_path, episode, debug)
+
+    return episode
+
+
 def parse_episode(fname: str, episode: Episode, debug: bool = False) -> None:
     """
     Goes through an episode script and determines all of the lines, characters, and scenes.
@@ -97,55 +209,149 @@ def parse_episode(fname: str, episode: Episode, debug: bool = False) -> None:
     None. ``episode`` is updated directly.
     """
 
+    # Scenes are handed over as soon as they're complete.  Episodes that are flagged as not having a script don't
+    # yield anything.
+    for scene in iter_script_scenes(fname, episode, debug=debug):
+
+        # episode.character_line is a dict["character_name": list of Lines].
+        for spoken_line in scene.lines:
+            if spoken_line.character_name not in episode.character_lines:
+                episode.character_lines[spoken_line.character_name] = []
+            episode.character_lines[spoken_line.character_name].append(spoken_line)
+
+        episode.scenes.append(scene)
+        episode.current_scene = scene
+
+
+def iter_script_scenes(fname: str, episode: Episode, debug: bool = False) -> Iterator[Scene]:
+    """
+    Goes through an episode script and yields each scene as soon as the scene change that ends it is found.  Only the
+    current scene is held in memory, so ``episode`` is not updated.
+
+    Parameters
+    ----------
+    fname
+        Path to the script.
+
+    episode
+        Episode instance that specifies the season, episode number, and formats of the script.
+
+    debug
+        If specified, prints some messages that may help with debugging.
+
+    Yields
+    ------
+    scene
+        Each scene of the episode with at least one line, in order.  The final scene of the script is always yielded,
+        even if it is empty, matching :py:func:`~parse_episode`.
+    """
+
     # There may be some episodes that don't have scripts yet.  Skip these and print a message.
     if episode.character_format == "NONE" and episode.scene_format == "NONE":
         print(f"Script has been flagged as not existing for s{episode.season_num:02}"
               f"e{episode.episode_num:02}. Skipping.")
         return
 
+    # All the patterns used to classify each line are only compiled once per format.
+    classifier = get_line_classifier(episode.character_format, episode.scene_format)
+
     # Start with a new scene.
-    episode.current_scene = Scene(episode.season_num, episode.episode_num)
+    current_scene = Scene(episode.season_num, episode.episode_num)
 
-    with open(fname, "r") as f:
+    # Strictly speaking I don't need to loop over lines here to get the character lines. I could instead pass the
+    # entire file and use regex to pull out all the character lines.  However, we want to pull out scenes
+    # chronologically. Hence it will be useful to iterate line-by-line. Lines that can't be dialogue or a scene change
+    # are skipped by the loader, unless we're debugging and want to see every line.
+    for line in iter_script_lines(fname, episode.scene_format, prefilter=not debug):
 
-        # Strictly speaking I don't need to loop over lines here to get the character
-        # lines. I could instead pass the entire file and use regex to pull out all the
-        # character lines.  However, we want to pull out scenes
-        # chronologically. Hence it will be useful to iterate line-by-line.
-        for line in f:
+        if debug:
+            print("Line {0}".format(line))
 
-            # Ignore empty lines.
-            try:
-                _ = (line.split())[0]
-            except IndexError:
-                continue
+        kind, character_name, spoken_line = classifier.classify(line)
+
+        if debug:
+            print(f"Classified as {kind}. Character name {character_name}. Spoken line {spoken_line}")
 
-            # Parse the line to see if a character spoke it (and add to the appropriate character).
-            parse_character_line(line, episode, debug=debug)
+        if kind == DIALOGUE:
+            current_scene.lines.append(Line(character_name, spoken_line, episode.season_num, episode.episode_num))
+        elif kind == SCENE_CHANGE:
+            # Careful, maybe something happened and there weren't actually any lines added to this scene yet.
+            if len(current_scene.lines) > 0:
+                yield current_scene
+            current_scene = Scene(episode.season_num, episode.episode_num)
 
-    # Add the final scene to the episode.
-    episode.scenes.append(episode.current_scene)
+    # The final scene.
+    yield current_scene
 
 
-def parse_character_line(line: str, episode: Episode, debug: bool = False) -> None:
+def iter_scenes(episodes: Iterable[Episode], debug: bool = False) -> Iterator[Scene]:
+    """
+    Streams the scenes of many scripts one at a time.  Unlike :py:func:`~parse_all_eps`, none of the scenes or lines
+    are kept once they've been consumed, so arbitrarily many scripts can be analysed with bounded memory.
+
+    Parameters
+    ----------
+    episodes
+        The episodes to stream, e.g., from :py:func:`~init_episodes`.  Each episode must have its
+        :py:attr:`~containers.episode.Episode.script_path` and formats set.  The episodes are not updated.
+
+    debug
+        If specified, prints some messages that may help with debugging.
+
+    Yields
+    ------
+    scene
+        Each scene of each episode, in order.  These are the same scenes that :py:func:`~parse_episode` adds to
+        :py:attr:`~containers.episode.Episode.scenes` (including the final scene of each script, even if it is empty)
+        so the number of scenes streamed matches :py:attr:`~containers.episode.Episode.num_scenes`.
+    """
+
+    for episode in episodes:
+        yield from iter_script_scenes(episode.script_path, episode, debug=debug)
+
+
+def iter_lines(episodes: Iterable[Episode], debug: bool = False) -> Iterator[Line]:
+    """
+    Streams the lines of many scripts one at a time.  See :py:func:`~iter_scenes`.
+
+    Yields
+    ------
+    line
+        Each line spoken in each episode, in order.  :py:attr:`~containers.line.Line.season_num` and
+        :py:attr:`~containers.line.Line.episode_num` record which episode the line belongs to.
+    """
+
+    for scene in iter_scenes(episodes, debug=debug):
+        yield from scene.lines
+
+
+def parse_character_line(
+    line: str, episode: Episode, debug: bool = False, classifier: Optional[LineClassifier] = None
+) -> None:
     """
     Parses a single line of text from the script and adds the data to ``episode``.
+
+    If ``classifier`` is not specified, uses the classifier for the formats of ``episode``.
     """
 
     if debug:
         print("Line {0}".format(line))
 
+    if classifier is None:
+        classifier = get_line_classifier(episode.character_format, episode.scene_format)
+
     # The format of the character line will change slightly depending upon the episode and season.  Separate the line
-    # into the character name and their spoken line.
-    spoken_line = regex_character_line(line, episode, debug=debug)
+    # into the character name and their spoken line or determine if it's a scene change.
+    kind, character_name, spoken_line = classifier.classify(line)
+
+    if debug:
+        print(f"Classified as {kind}. Character name {character_name}. Spoken line {spoken_line}")
 
     # A character didn't speak this line.
-    if spoken_line is None:
+    if kind != DIALOGUE:
 
         # However, it could be the case that we've hit a scene change.
-        scene_change = determine_if_scene_change(line, episode, debug=debug)
-
-        if scene_change:
+        if kind == SCENE_CHANGE:
             # If so, add all of lines to the list and reset the tracking.
 
             # Careful, maybe something happened and there weren't actually any lines added
@@ -158,10 +364,7 @@ def parse_character_line(line: str, episode: Episode, debug: bool = False) -> No
         return
 
     # At this point, we have verified that a character spoke the line. Add some extra info for further tracking.
-    spoken_line.season_num = episode.season_num
-    spoken_line.episode_num = episode.episode_num
-
-    character_name = spoken_line.character_name
+    spoken_line = Line(character_name, spoken_line, episode.season_num, episode.episode_num)
 
     # episode.character_line is a dict["character_name": list of Lines].
     # So let's check if we have already instantiated this character. If not, initialize.
@@ -178,31 +381,13 @@ def parse_character_line(line: str, episode: Episode, debug: bool = False) -> No
 def determine_if_scene_change(line: str, episode: Episode, debug: bool = False) -> bool:
     """
     Determines if ``line`` corresponds to a scene change. This determination is based on how a scene change is defined
-    as based on the format in ``formats.txt`` and stored in :py:attr:`~containers.episode.scene_format`.
+    as based on the format in ``formats.txt`` and stored in :py:attr:`~containers.episode.scene_format`.  The markers
+    for each format are listed in :py:data:`~script_tools.line_classifier.SCENE_CHANGE_PATTERNS`.
     """
 
-    scene_change = False
-
-    if episode.scene_format == "SCENE":
-        if "Scene shift" in line or "Blackout" in line or "scene" in line.lower():
-            scene_change = True
-    elif episode.scene_format == "DASHES":
-        if "\- - -" in line or "\---" in line:  # noqa: W605
-            scene_change = True
-    elif episode.scene_format == "STARS":
-        if "* * *" in line or "***" in line:
-            scene_change = True
-    elif episode.scene_format == "INT/EXT":
-        if "INT" in line or "EXT" in line or "Interior" in line or "Exterior" in line:
-            scene_change = True
-    elif episode.scene_format == "CUT":
-        if "CUT TO" in line:
-            scene_change = True
-    elif episode.scene_format == "INT/EXT/CUT":
-        if "INT" in line or "EXT" in line or "CUT TO" in line:
-            scene_change = True
-
-    return scene_change
+    classifier = get_line_classifier(episode.character_format, episode.scene_format)
+
+    return classifier.is_scene_change(line)
 
 
 def regex_character_line(line: str, episode: Episode, debug: bool = False) -> Line:
@@ -228,7 +413,7 @@ def regex_character_line(line: str, episode: Episode, debug: bool = False) -> Li
     """
 
     # These are all scene descriptions.
-    if line[0] == "[" or line[0] == "_" or "CUT TO" in line or "_CUT" in line or "INT" in line or "EXT" in line:
+    if is_scene_description(line):
         return None
 
     # These could probably be bundled into a single function and be smarter. But eh.
@@ -252,8 +437,7 @@ def parse_capital_character_line(line: str, debug: bool = False) -> Line:
     # A line spoken by a character will start with "CHARACTER_NAME:".
 
     # Search for any word starting with a capital word followed by a ":".
-    reg_exp = re.compile(r"([A-Z].*\:)")
-    character_line = reg_exp.split(line)  # Split on this search.
+    character_line = CAPITAL_CHARACTER_RE.split(line)  # Split on this search.
 
     if debug:
         print("Character Line {0}".format(character_line))
@@ -313,8 +497,7 @@ def parse_stars_character_line(line, debug=False):
     # Here '[A-Z]' means we only match actual characters. This allows us to ignore
     # extraneous '****' at the start of some lines (e.g., one line is '**********Catelyn
     # Stark:** 17 years ago you rode off with Robert Baratheon...'
-    reg_exp = re.compile(r"\*\*([A-Z].*)\:\*\*|\*\*([A-Z].*)\*\*\:|\*\*([A-Z].*)\*\* \:", re.IGNORECASE)
-    character_line = reg_exp.split(line)  # Split on this search.
+    character_line = STARS_CHARACTER_RE.split(line)  # Split on this search.
 
     if debug:
         print("Character Line {0}".format(character_line))
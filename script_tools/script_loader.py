@@ -0,0 +1,131 @@
+"""
+This module reads the lines of a script that need to be classified.  Most lines of a script are noise (empty lines,
+scene descriptions, the navigation of the webpage the script was scraped from, etc), so rather than decoding every
+line, the script is memory-mapped and the raw bytes are scanned for the only lines that can matter:
+
+- Dialogue always contains a ``:`` (see :py:class:`~script_tools.line_classifier.LineClassifier`).
+- Scene changes always contain one of the (ASCII) markers of the scene format (see
+  :py:data:`~script_tools.line_classifier.SCENE_CHANGE_PATTERNS`).
+
+Only the lines containing one of these are decoded into strings.  Every other line is skipped without being copied.
+The lines that are yielded are identical to those yielded when reading the script in text mode, so the parsed output
+does not change.
+
+Author: Jacob Seiler
+"""
+
+import mmap
+import re
+from typing import Dict, Iterator, Pattern
+
+from script_tools.line_classifier import SCENE_CHANGE_FLAGS, SCENE_CHANGE_PATTERNS
+
+# The scripts are always UTF-8.
+SCRIPT_ENCODING = "utf-8"
+
+_candidate_res: Dict[str, Pattern[bytes]] = {}
+
+
+def candidate_line_re(scene_format: str) -> Pattern[bytes]:
+    """
+    Fetches the bytes pattern that matches (somewhere within) every line that could be dialogue or a scene change for
+    the given scene format.  Patterns are only compiled once for each scene format.
+    """
+
+    try:
+        return _candidate_res[scene_format]
+    except KeyError:
+        pass
+
+    pattern = b":"
+
+    # The scene change markers are ASCII so matching the UTF-8 bytes is the same as matching the decoded text.
+    if scene_format in SCENE_CHANGE_PATTERNS:
+        pattern = b":|" + SCENE_CHANGE_PATTERNS[scene_format].encode("ascii")
+
+    # Bytes patterns are always ASCII-only, matching the flags of the text patterns.
+    flags = SCENE_CHANGE_FLAGS.get(scene_format, 0) & ~re.ASCII
+    candidate_re = re.compile(pattern, flags)
+
+    _candidate_res[scene_format] = candidate_re
+
+    return candidate_re
+
+
+def iter_script_lines(fname: str, scene_format: str, prefilter: bool = True) -> Iterator[str]:
+    """
+    Yields the lines of a script that need to be classified.
+
+    Parameters
+    ----------
+    fname
+        Path to the script.
+
+    scene_format
+        The scene format of the script. See :py:attr:`~containers.episode.Episode.scene_format`.
+
+    prefilter : optional
+        If specified, the script is memory-mapped and only lines that could be dialogue or a scene change are yielded.
+        Otherwise, every non-empty line is yielded.
+
+    Yields
+    ------
+    line
+        Each line (including its trailing newline), in order.
+    """
+
+    if not prefilter:
+        yield from _iter_text_lines(fname)
+        return
+
+    with open(fname, "rb") as f:
+
+        # Empty files can't be memory-mapped. They have no lines anyway.
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return
+
+        # Lines are decoded straight from a view of the map. Slicing the map itself would first copy each line into a
+        # new ``bytes``. The view is released (on leaving the ``with``) before the map is closed.
+        with buffer, memoryview(buffer) as view:
+
+            # Text mode translates "\r" and "\r\n" into "\n". Rather than replicate that, read these (rare) scripts in
+            # text mode.
+            if buffer.find(b"\r") != -1:
+                yield from _iter_text_lines(fname)
+                return
+
+            # Bind the methods used for every line. This loop runs once per candidate line so lookups add up.
+            search = candidate_line_re(scene_format).search
+            find = buffer.find
+            rfind = buffer.rfind
+            size = len(buffer)
+
+            # Jump straight to the next candidate. Everything in between is noise.
+            pos = 0
+            while True:
+
+                match = search(buffer, pos)
+                if match is None:
+                    return
+
+                start = rfind(b"\n", 0, match.start()) + 1
+                end = find(b"\n", match.end())
+                end = size if end == -1 else end + 1
+
+                yield str(view[start:end], SCRIPT_ENCODING)
+
+                pos = end
+
+
+def _iter_text_lines(fname: str) -> Iterator[str]:
+
+    with open(fname, "r", encoding=SCRIPT_ENCODING) as f:
+        for line in f:
+
+            # Ignore empty lines.
+            if line.isspace():
+                continue
+
+            yield line